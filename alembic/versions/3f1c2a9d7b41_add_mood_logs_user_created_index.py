@@ -0,0 +1,43 @@
+"""add composite (user_id, created_at desc) index on mood_logs
+
+Revision ID: 3f1c2a9d7b41
+Revises: 8e5f0c4bc987
+Create Date: 2026-10-17 10:12:41.318220
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1c2a9d7b41'
+down_revision: Union[str, Sequence[str], None] = '8e5f0c4bc987'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and avoids locking writes to mood_logs
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_mood_logs_user_id_created_at',
+            'mood_logs',
+            ['user_id', sa.text('created_at DESC')],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_mood_logs_user_id_created_at',
+            table_name='mood_logs',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
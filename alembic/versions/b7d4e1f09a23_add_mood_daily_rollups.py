@@ -0,0 +1,70 @@
+"""add mood_daily_rollups and mood_daily_weather_rollups tables
+
+Revision ID: b7d4e1f09a23
+Revises: 3f1c2a9d7b41
+Create Date: 2026-10-17 11:04:18.552907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7d4e1f09a23'
+down_revision: Union[str, Sequence[str], None] = '3f1c2a9d7b41'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'mood_daily_rollups',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('log_count', sa.Integer(), nullable=False),
+        sa.Column('mood_sum', sa.Integer(), nullable=False),
+        sa.Column('mood_min', sa.Integer(), nullable=False),
+        sa.Column('mood_max', sa.Integer(), nullable=False),
+        sa.Column('energy_sum', sa.Integer(), nullable=False),
+        sa.Column('energy_min', sa.Integer(), nullable=False),
+        sa.Column('energy_max', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'day')
+    )
+    op.create_table(
+        'mood_daily_weather_rollups',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('weather', sa.String(100), nullable=False),
+        sa.Column('log_count', sa.Integer(), nullable=False),
+        sa.Column('mood_sum', sa.Integer(), nullable=False),
+        sa.Column('energy_sum', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'day', 'weather')
+    )
+
+    # Seed the rollups from existing logs; `python -m src.mindfuly.cli backfill-rollups` rebuilds them later
+    op.execute("""
+        INSERT INTO mood_daily_rollups (user_id, day, log_count, mood_sum, mood_min, mood_max, energy_sum, energy_min, energy_max)
+        SELECT user_id, date(created_at), count(id), sum(mood_value), min(mood_value), max(mood_value),
+               sum(energy_level), min(energy_level), max(energy_level)
+        FROM mood_logs
+        WHERE created_at IS NOT NULL
+        GROUP BY user_id, date(created_at)
+    """)
+    op.execute("""
+        INSERT INTO mood_daily_weather_rollups (user_id, day, weather, log_count, mood_sum, energy_sum)
+        SELECT user_id, date(created_at), weather, count(id), sum(mood_value), sum(energy_level)
+        FROM mood_logs
+        WHERE created_at IS NOT NULL AND weather IS NOT NULL AND weather != ''
+        GROUP BY user_id, date(created_at), weather
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('mood_daily_weather_rollups')
+    op.drop_table('mood_daily_rollups')
@@ -0,0 +1,129 @@
+"""add weather_conditions, structured weather columns on mood_logs, and rebuild mood_daily_weather_rollups on them
+
+Revision ID: c2a8f5d31e67
+Revises: b7d4e1f09a23
+Create Date: 2026-10-17 15:42:07.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+from src.shared.weather import TEMPERATURE_BAND_WIDTH, parse_weather
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2a8f5d31e67'
+down_revision: Union[str, Sequence[str], None] = 'b7d4e1f09a23'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 5000
+
+
+def backfill_weather_columns() -> None:
+    """Parse the weather text of existing logs, in id batches so large tables are not read at once."""
+    bind = op.get_bind()
+    condition_ids = {}
+    last_id = 0
+
+    while True:
+        rows = bind.execute(sa.text(
+            "SELECT id, weather FROM mood_logs WHERE id > :last_id AND weather IS NOT NULL AND weather != '' "
+            "ORDER BY id LIMIT :batch_size"
+        ), {"last_id": last_id, "batch_size": BACKFILL_BATCH_SIZE}).all()
+        if not rows:
+            return
+
+        updates = []
+        for log_id, weather in rows:
+            temperature_c, condition = parse_weather(weather)
+            if condition is not None and condition not in condition_ids:
+                bind.execute(sa.text("INSERT INTO weather_conditions (name) VALUES (:name)"), {"name": condition})
+                condition_ids[condition] = bind.execute(
+                    sa.text("SELECT id FROM weather_conditions WHERE name = :name"), {"name": condition}
+                ).scalar_one()
+            updates.append({"id": log_id, "temperature_c": temperature_c, "weather_condition_id": condition_ids.get(condition)})
+
+        bind.execute(sa.text(
+            "UPDATE mood_logs SET temperature_c = :temperature_c, weather_condition_id = :weather_condition_id WHERE id = :id"
+        ), updates)
+        last_id = rows[-1][0]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        'weather_conditions',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('name', sa.String(100), nullable=False),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('name')
+    )
+    op.add_column('mood_logs', sa.Column('temperature_c', sa.Float(), nullable=True))
+    op.add_column('mood_logs', sa.Column('weather_condition_id', sa.Integer(), nullable=True))
+    op.create_foreign_key(
+        'mood_logs_weather_condition_id_fkey', 'mood_logs', 'weather_conditions', ['weather_condition_id'], ['id']
+    )
+
+    # Offline SQL cannot read the rows it would parse; run
+    # `python -m src.mindfuly.cli backfill-weather` after applying it instead
+    if not context.is_offline_mode():
+        backfill_weather_columns()
+
+    op.drop_table('mood_daily_weather_rollups')
+    op.create_table(
+        'mood_daily_weather_rollups',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('weather_condition_id', sa.Integer(), nullable=False),
+        sa.Column('temperature_band', sa.Integer(), nullable=True),
+        sa.Column('log_count', sa.Integer(), nullable=False),
+        sa.Column('mood_sum', sa.Integer(), nullable=False),
+        sa.Column('energy_sum', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['weather_condition_id'], ['weather_conditions.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_mood_daily_weather_rollups_user_id_day', 'mood_daily_weather_rollups', ['user_id', 'day'])
+
+    # Same band expression as models.temperature_band, floored for negative temperatures
+    band = f"(CAST(round(temperature_c) AS INTEGER) - (CAST(round(temperature_c) AS INTEGER) % {TEMPERATURE_BAND_WIDTH} + {TEMPERATURE_BAND_WIDTH}) % {TEMPERATURE_BAND_WIDTH})"
+    op.execute(f"""
+        INSERT INTO mood_daily_weather_rollups (user_id, day, weather_condition_id, temperature_band, log_count, mood_sum, energy_sum)
+        SELECT user_id, date(created_at), weather_condition_id, {band}, count(id), sum(mood_value), sum(energy_level)
+        FROM mood_logs
+        WHERE created_at IS NOT NULL AND weather_condition_id IS NOT NULL
+        GROUP BY user_id, date(created_at), weather_condition_id, {band}
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_mood_daily_weather_rollups_user_id_day', table_name='mood_daily_weather_rollups')
+    op.drop_table('mood_daily_weather_rollups')
+    op.create_table(
+        'mood_daily_weather_rollups',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('weather', sa.String(100), nullable=False),
+        sa.Column('log_count', sa.Integer(), nullable=False),
+        sa.Column('mood_sum', sa.Integer(), nullable=False),
+        sa.Column('energy_sum', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'day', 'weather')
+    )
+    op.execute("""
+        INSERT INTO mood_daily_weather_rollups (user_id, day, weather, log_count, mood_sum, energy_sum)
+        SELECT user_id, date(created_at), weather, count(id), sum(mood_value), sum(energy_level)
+        FROM mood_logs
+        WHERE created_at IS NOT NULL AND weather IS NOT NULL AND weather != ''
+        GROUP BY user_id, date(created_at), weather
+    """)
+
+    op.drop_constraint('mood_logs_weather_condition_id_fkey', 'mood_logs', type_='foreignkey')
+    op.drop_column('mood_logs', 'weather_condition_id')
+    op.drop_column('mood_logs', 'temperature_c')
+    op.drop_table('weather_conditions')
@@ -0,0 +1 @@
+"""Benchmarks for repository and API hot paths."""
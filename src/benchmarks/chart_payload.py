@@ -0,0 +1,63 @@
+"""
+Size and serialization cost of the analytics chart series as JSON [time, value] pairs versus base64 typed arrays.
+Times cover building the payload and serializing it to the JSON text that crosses the websocket.
+
+Usage:
+    python -m src.benchmarks.chart_payload --sizes 10000 100000 1000000
+"""
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+from src.shared.charts import encode_chart_series, epoch_ms
+
+PER_POINTS = 10_000
+
+
+def synthetic_series(points: int) -> dict[str, list]:
+    # Four logs a day and one running mean per day, like a long-running user of the app
+    start = datetime(2015, 1, 1)
+    logs = [epoch_ms(start + timedelta(hours=6 * i, seconds=random.randint(0, 3600))) for i in range(points)]
+    days = [epoch_ms((start + timedelta(days=i)).date()) for i in range(points)]
+    return {
+        "mood_logs": [(x, random.randint(1, 5)) for x in logs],
+        "energy_logs": [(x, random.randint(1, 5)) for x in logs],
+        "mood_running_mean": [(x, round(random.uniform(1, 5), 2)) for x in days],
+        "energy_running_mean": [(x, round(random.uniform(1, 5), 2)) for x in days],
+    }
+
+
+def timed(call, repeat: int) -> tuple[float, str]:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        payload = call()
+        best = min(best, time.perf_counter() - started)
+    return best, payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'points':>10} {'format':>7} {'bytes/point':>12} {'ms per 10k':>11} {'total (MB)':>11}")
+
+    for points in args.sizes:
+        series = synthetic_series(points)
+        total_points = sum(len(values) for values in series.values())
+
+        for name, build in (
+            ("json", lambda: json.dumps(series)),
+            ("binary", lambda: json.dumps(encode_chart_series(series))),
+        ):
+            elapsed, payload = timed(build, args.repeat)
+            print(f"{points:>10} {name:>7} {len(payload) / total_points:>12.1f} "
+                  f"{elapsed * 1000 * PER_POINTS / total_points:>11.3f} {len(payload) / 1e6:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
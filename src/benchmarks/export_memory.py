@@ -0,0 +1,89 @@
+"""
+Peak RSS of exporting a user's mood history, streamed through the server-side cursor versus fully materialized.
+Each size runs in a fresh process against a file-backed SQLite database so RSS is not shared between runs.
+
+Usage:
+    python -m src.benchmarks.export_memory --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.shared.models import Base, MoodLogRepositoryV2, MoodLogResponse
+from src.mindfuly.routes.mood import export_chunks
+from src.benchmarks.weekly_stats import USER_ID, load_rows
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+async def streamed_export(repo: MoodLogRepositoryV2) -> int:
+    written = 0
+    async for chunk in export_chunks(repo, USER_ID, "ndjson"):
+        written += len(chunk)
+    return written
+
+
+async def materialized_export(repo: MoodLogRepositoryV2) -> int:
+    # Everything as ORM objects and Pydantic models at once, what a get_mood_logs based export would do
+    logs = await repo.get_mood_logs(USER_ID, limit=sys.maxsize)
+    body = "".join(MoodLogResponse.from_db_model(log).model_dump_json() + "\n" for log in logs)
+    return len(body)
+
+
+async def measure(path: str, rows: int, mode: str) -> tuple[float, float, float]:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+    async with AsyncSessionLocal() as session:
+        await load_rows(session, rows)
+
+    async with AsyncSessionLocal() as session:
+        repo = MoodLogRepositoryV2(session)
+        before = peak_rss_mb()
+        started = time.perf_counter()
+        await (streamed_export(repo) if mode == "streamed" else materialized_export(repo))
+        elapsed = time.perf_counter() - started
+
+    await engine.dispose()
+    return before, peak_rss_mb(), elapsed
+
+
+def run_one(rows: int, mode: str, results):
+    with tempfile.TemporaryDirectory() as directory:
+        results.put(asyncio.run(measure(os.path.join(directory, "export.db"), rows, mode)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--modes", nargs="+", choices=["streamed", "materialized"], default=["streamed", "materialized"])
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context("spawn")
+    print(f"{'rows':>10} {'mode':>13} {'rss before (MB)':>16} {'peak rss (MB)':>14} {'time (s)':>9}")
+
+    for rows in args.sizes:
+        for mode in args.modes:
+            results = context.Queue()
+            process = context.Process(target=run_one, args=(rows, mode, results))
+            process.start()
+            before, peak, elapsed = results.get()
+            process.join()
+            print(f"{rows:>10} {mode:>13} {before:>16.1f} {peak:>14.1f} {elapsed:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
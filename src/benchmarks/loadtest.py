@@ -0,0 +1,355 @@
+"""
+Closed-loop load test of the Mindfuly API: virtual users run scripted journeys (login, home dashboard,
+mood submit, analytics, YouTube search) through httpx while concurrency is ramped stage by stage.
+Reports p50/p95/p99 latency and throughput per route and per journey, and writes them as JSON.
+
+By default the app runs in this process over httpx.ASGITransport, on a temporary SQLite file unless
+DATABASE_HOST is set (then it uses that Postgres, which must be migrated). --target drives a running
+server instead. Either way OpenWeatherMap and YouTube are replaced by the local stand-ins of
+src.benchmarks.upstreams; a separately started server has to be given their URLs, see that module.
+The NiceGUI pages load their data over a websocket, the journeys call the API routes behind the same queries.
+
+Usage:
+    python -m src.benchmarks.loadtest --concurrency 1 10 50 100 --duration 30 --output load.json
+    python -m src.benchmarks.loadtest --target http://127.0.0.1:8200 --users 200 --weather-latency-ms 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import tempfile
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Awaitable, Callable
+
+import httpx
+import numpy as np
+
+from src.benchmarks.synthetic import generate_user_logs, iter_rows
+from src.benchmarks.upstreams import (
+    WEATHER_PATH, YOUTUBE_SEARCH_PATH, add_latency_arguments, create_upstream_app, create_upstream_server, latencies_from_args
+)
+
+PASSWORD = "load-test-password"
+# Rows per /mood/logs/bulk request while seeding
+SEED_BATCH = 5000
+# Around Vancouver, wide enough that the weather cache sees a realistic mix of hits and misses
+CITY_LAT, CITY_LON, CITY_SPREAD = 49.28, -123.12, 0.15
+MOODS = ["sad", "calm", "peaceful", "happy", "energetic", "focused", "chill", "motivated"]
+SEARCHES = ["lofi", "jazz", "piano", "ambient", "indie", "classical"]
+PERCENTILES = (50, 95, 99)
+
+
+class JourneyFailed(Exception):
+    pass
+
+
+@dataclass
+class Recorder():
+    """
+    Latency samples of one stage as (label, seconds, ok), for requests and for whole journeys
+    """
+    requests: list = field(default_factory=list)
+    journeys: list = field(default_factory=list)
+
+
+@dataclass
+class VirtualUser():
+    client: httpx.AsyncClient
+    username: str
+    recorder: Recorder
+    token: str | None = None
+
+    async def request(self, label: str, method: str, url: str, **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, **kwargs)
+        except httpx.HTTPError as error:
+            self.recorder.requests.append((label, time.perf_counter() - started, False))
+            raise JourneyFailed(f"{label}: {error!r}") from error
+
+        ok = response.status_code < 400
+        self.recorder.requests.append((label, time.perf_counter() - started, ok))
+        if not ok:
+            raise JourneyFailed(f"{label}: HTTP {response.status_code}")
+        return response
+
+    def auth(self) -> dict:
+        return {"Authorization": f"Bearer {self.token}"} if self.token else {}
+
+
+def random_coordinates() -> dict:
+    return {"lat": CITY_LAT + random.uniform(-CITY_SPREAD, CITY_SPREAD), "lon": CITY_LON + random.uniform(-CITY_SPREAD, CITY_SPREAD)}
+
+
+async def login_journey(user: VirtualUser):
+    response = await user.request("POST /authorization/login", "POST", "/authorization/login",
+                                  json={"username": user.username, "password": PASSWORD})
+    user.token = response.json()["access_token"]
+    await user.request("GET /authorization/verify", "GET", "/authorization/verify", headers=user.auth())
+
+
+async def home_journey(user: VirtualUser):
+    # The browser fetches these side by side when the home page opens
+    await asyncio.gather(
+        user.request("GET /mood/dashboard/{username}", "GET", f"/mood/dashboard/{user.username}"),
+        user.request("GET /mood/insights/{username}", "GET", f"/mood/insights/{user.username}"),
+        user.request("GET /mood/most_recent_log_date/{username}", "GET", f"/mood/most_recent_log_date/{user.username}"),
+        user.request("GET /weather", "GET", "/weather", params=random_coordinates()),
+    )
+
+
+async def mood_submit_journey(user: VirtualUser):
+    weather = (await user.request("GET /weather", "GET", "/weather", params=random_coordinates())).json()
+    await user.request("POST /mood/log", "POST", "/mood/log", json={
+        "username": user.username,
+        "mood_value": random.randint(1, 5),
+        "energy_level": random.randint(1, 5),
+        "notes": "Load test log",
+        "weather": f"{weather['main']['temp']:.0f}°C – {weather['weather'][0]['description']}",
+    })
+    await user.request("GET /mood/latest_log/{username}", "GET", f"/mood/latest_log/{user.username}")
+
+
+async def analytics_journey(user: VirtualUser):
+    await asyncio.gather(
+        user.request("GET /mood/chart/{username}", "GET", f"/mood/chart/{user.username}", params={"encoding": "binary"}),
+        user.request("GET /mood/weekly_stats/{username}", "GET", f"/mood/weekly_stats/{user.username}"),
+        user.request("GET /mood/weather_stats/{username}", "GET", f"/mood/weather_stats/{user.username}"),
+        user.request("GET /mood/running_means/{username}", "GET", f"/mood/running_means/{user.username}",
+                     params={"limit": 365, "resolution": "week"}),
+    )
+
+
+async def youtube_journey(user: VirtualUser):
+    await user.request("GET /youtube/search/by-mood/{mood}", "GET", f"/youtube/search/by-mood/{random.choice(MOODS)}",
+                       params={"max_results": 15})
+    await user.request("GET /youtube/search", "GET", "/youtube/search", params={"query": random.choice(SEARCHES)})
+
+
+# Journey name -> (script, relative frequency), a home page view is the most common thing a user does
+JOURNEYS: dict[str, tuple[Callable[[VirtualUser], Awaitable[None]], int]] = {
+    "login": (login_journey, 1),
+    "home": (home_journey, 4),
+    "mood_submit": (mood_submit_journey, 2),
+    "analytics": (analytics_journey, 2),
+    "youtube": (youtube_journey, 1),
+}
+
+
+def percentile(ordered: list[float], q: float) -> float:
+    # Nearest rank, every reported value is a latency that was actually observed
+    return ordered[max(int(np.ceil(q / 100 * len(ordered))) - 1, 0)]
+
+
+def summarize(samples: list, elapsed: float) -> dict[str, dict]:
+    grouped = defaultdict(list)
+    errors = defaultdict(int)
+    for label, seconds, ok in samples:
+        grouped[label].append(seconds)
+        errors[label] += not ok
+
+    summary = {}
+    for label, latencies in sorted(grouped.items()):
+        latencies.sort()
+        summary[label] = {
+            "count": len(latencies),
+            "errors": errors[label],
+            "throughput_rps": round(len(latencies) / elapsed, 2),
+            **{f"p{q}_ms": round(percentile(latencies, q) * 1000, 2) for q in PERCENTILES},
+            "max_ms": round(latencies[-1] * 1000, 2),
+        }
+    return summary
+
+
+async def run_user(user: VirtualUser, deadline: float, think_ms: float):
+    names = list(JOURNEYS)
+    weights = [weight for _, weight in JOURNEYS.values()]
+
+    while time.perf_counter() < deadline:
+        name = random.choices(names, weights)[0]
+        started = time.perf_counter()
+        try:
+            await JOURNEYS[name][0](user)
+            ok = True
+        except JourneyFailed:
+            ok = False
+        user.recorder.journeys.append((name, time.perf_counter() - started, ok))
+        if think_ms:
+            await asyncio.sleep(random.expovariate(1000 / think_ms))
+
+
+async def run_stage(client: httpx.AsyncClient, concurrency: int, users: int, duration: float, think_ms: float) -> dict:
+    recorder = Recorder()
+    virtual_users = [VirtualUser(client, f"load_user_{index % users}", recorder) for index in range(concurrency)]
+
+    started = time.perf_counter()
+    await asyncio.gather(*(run_user(user, started + duration, think_ms) for user in virtual_users))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests": summarize(recorder.requests, elapsed),
+        "journeys": summarize(recorder.journeys, elapsed),
+    }
+
+
+async def seed_users(client: httpx.AsyncClient, users: int, logs_per_user: int, seed: int) -> int:
+    """
+    Create the load test users with a history each, users left over from an earlier run are reused
+    """
+    rng = np.random.default_rng(seed)
+    created = 0
+
+    for index in range(users):
+        username = f"load_user_{index}"
+        response = await client.post("/users/create_user", json={
+            "name": username, "email": f"{username}@example.com", "hashed_password": PASSWORD, "tier": 1
+        })
+        if response.status_code == 409:
+            continue
+        response.raise_for_status()
+        created += 1
+
+        for batch in iter_rows(generate_user_logs(rng, 0, logs_per_user), SEED_BATCH):
+            entries = [{
+                "username": username,
+                "mood_value": row["mood_value"],
+                "energy_level": row["energy_level"],
+                "notes": row["notes"],
+                "weather": row["weather"],
+                "created_at": row["created_at"].isoformat(),
+            } for row in batch]
+            (await client.post("/mood/logs/bulk", json=entries, timeout=120)).raise_for_status()
+
+    return created
+
+
+def use_sqlite(app, path: str):
+    """
+    Point the app's engines at a SQLite file, the lifespan leaves them alone without DATABASE_HOST
+    """
+    from fastapi import Depends
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+    from sqlalchemy.orm import Session, sessionmaker
+    from user_service_v2.models.user import UserRepositoryV2, get_user_repository_v2
+
+    from src.shared import database
+    from src.shared.models import Base
+
+    # Writers queue on the file lock instead of failing straight away
+    database.engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False, "timeout": 30})
+    database.async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}", connect_args={"timeout": 30})
+    database.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=database.engine)
+    database.AsyncSessionLocal = async_sessionmaker(bind=database.async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession)
+    Base.metadata.create_all(database.engine)
+
+    def user_repository(db: Session = Depends(database.get_db)) -> UserRepositoryV2:
+        return UserRepositoryV2(db)
+
+    app.dependency_overrides[get_user_repository_v2] = user_repository
+
+
+async def drive(client: httpx.AsyncClient, args: argparse.Namespace) -> list[dict]:
+    started = time.perf_counter()
+    created = await seed_users(client, args.users, args.logs_per_user, args.seed)
+    print(f"Seeded {created} new users ({args.users} total) in {time.perf_counter() - started:.1f}s")
+
+    stages = []
+    for concurrency in args.concurrency:
+        stage = await run_stage(client, concurrency, args.users, args.duration, args.think_ms)
+        print_stage(stage)
+        stages.append(stage)
+    return stages
+
+
+async def run(args: argparse.Namespace) -> dict:
+    upstream_url = f"http://{args.upstream_host}:{args.upstream_port}"
+    weather, youtube = latencies_from_args(args)
+    upstream = create_upstream_server(create_upstream_app(weather, youtube), args.upstream_host, args.upstream_port)
+    upstream_task = asyncio.create_task(upstream.serve())
+    while not upstream.started:
+        if upstream_task.done():
+            # Port taken or similar, serve() has already logged why
+            upstream_task.result()
+            raise SystemExit(f"Could not start the upstream stand-ins on {upstream_url}")
+        await asyncio.sleep(0.01)
+
+    try:
+        if args.target:
+            async with httpx.AsyncClient(base_url=args.target, timeout=args.timeout) as client:
+                stages = await drive(client, args)
+        else:
+            # Read when the routes are imported, so set before the app is
+            os.environ.setdefault("WEATHER_API_KEY", "load-test")
+            os.environ.setdefault("YOUTUBE_API_KEY", "load-test")
+            os.environ.setdefault("JWT_SECRET_KEY", "load-test")
+            os.environ["WEATHER_URL"] = upstream_url + WEATHER_PATH
+            os.environ["YOUTUBE_SEARCH_URL"] = upstream_url + YOUTUBE_SEARCH_PATH
+            from mindfuly.api import app
+
+            with tempfile.TemporaryDirectory() as directory:
+                if not os.environ.get("DATABASE_HOST"):
+                    use_sqlite(app, os.path.join(directory, "loadtest.db"))
+
+                async with app.router.lifespan_context(app):
+                    transport = httpx.ASGITransport(app=app)
+                    async with httpx.AsyncClient(transport=transport, base_url="http://mindfuly", timeout=args.timeout) as client:
+                        stages = await drive(client, args)
+                app.dependency_overrides.clear()
+    finally:
+        upstream.should_exit = True
+        await upstream_task
+
+    return {
+        "meta": {
+            "target": args.target or "in-process",
+            "users": args.users,
+            "logs_per_user": args.logs_per_user,
+            "duration": args.duration,
+            "think_ms": args.think_ms,
+            "upstream_calls": {"weather": weather.calls, "youtube": youtube.calls},
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+        },
+        "stages": stages,
+    }
+
+
+def print_stage(stage: dict):
+    print(f"\nconcurrency {stage['concurrency']} ({stage['seconds']:.1f}s)")
+    print(f"{'':>44} {'count':>7} {'errors':>7} {'rps':>8} {'p50 (ms)':>9} {'p95 (ms)':>9} {'p99 (ms)':>9}")
+    for kind in ("journeys", "requests"):
+        for label, summary in stage[kind].items():
+            print(f"{label:>44} {summary['count']:>7} {summary['errors']:>7} {summary['throughput_rps']:>8.1f} "
+                  f"{summary['p50_ms']:>9.1f} {summary['p95_ms']:>9.1f} {summary['p99_ms']:>9.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--target", help="base URL of a running server, default: the app in this process")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 10, 50, 100], help="virtual users of each stage")
+    parser.add_argument("--duration", type=float, default=30.0, help="seconds per stage")
+    parser.add_argument("--think-ms", type=float, default=100.0, help="mean pause between a user's journeys")
+    parser.add_argument("--users", type=int, default=100, help="distinct accounts the virtual users log in as")
+    parser.add_argument("--logs-per-user", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--upstream-host", default="127.0.0.1")
+    parser.add_argument("--upstream-port", type=int, default=9100)
+    add_latency_arguments(parser)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="loadtest.json")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Synthetic mood log histories for the benchmarks, generated with NumPy so a million rows take seconds.
+
+Histories look like real usage rather than uniform noise: moods follow the seasons and the weekday,
+temperatures and conditions follow the time of year, and a few heavy users own most of the logs.
+NumPy is only needed here, install it with the bench dependency group (uv sync --group bench).
+"""
+from datetime import datetime, timedelta
+from typing import Iterator
+
+try:
+    import numpy as np
+except ImportError as error:
+    raise ImportError("The synthetic benchmark data needs NumPy, install it with: uv sync --group bench") from error
+
+# Condition names the weather API returns, with how likely each is in winter and in summer
+WEATHER_CONDITIONS = {
+    "clear sky": (0.15, 0.35),
+    "few clouds": (0.10, 0.20),
+    "overcast clouds": (0.25, 0.12),
+    "light rain": (0.20, 0.12),
+    "moderate rain": (0.10, 0.06),
+    "thunderstorm": (0.01, 0.05),
+    "snow": (0.12, 0.00),
+    "mist": (0.07, 0.10),
+}
+# Mood shift each condition brings, on top of the seasonal and weekday effects
+CONDITION_MOOD_EFFECT = {
+    "clear sky": 0.4,
+    "few clouds": 0.2,
+    "overcast clouds": -0.2,
+    "light rain": -0.3,
+    "moderate rain": -0.5,
+    "thunderstorm": -0.6,
+    "snow": 0.1,
+    "mist": -0.2,
+}
+# Monday to Sunday
+WEEKDAY_MOOD_EFFECT = np.array([-0.35, -0.15, -0.05, 0.0, 0.3, 0.45, 0.25])
+# Share of logs written without a location, which have no weather at all
+NO_WEATHER_SHARE = 0.05
+HISTORY_END = datetime(2025, 1, 1)
+# Heavier histories are packed into at most ten years, so a million logs means logging very often
+MAX_HISTORY_DAYS = 3650
+
+
+def user_row_counts(rng: np.random.Generator, users: int, total_rows: int) -> np.ndarray:
+    """
+    Split total_rows over users with a long tail: most users log a little, a few log a lot
+    """
+    weights = rng.lognormal(mean=0.0, sigma=1.5, size=users)
+    counts = np.floor(weights / weights.sum() * total_rows).astype(np.int64)
+    counts = np.maximum(counts, 1)
+    # Rounding leaves a few rows over, the heaviest user takes them
+    counts[np.argmax(counts)] += max(total_rows - int(counts.sum()), 0)
+    return counts
+
+
+def generate_user_logs(rng: np.random.Generator, user_id: int, rows: int, logs_per_day: float = 3.0) -> dict[str, np.ndarray]:
+    """
+    Columns of one user's history, oldest first, ending at HISTORY_END
+    """
+    span_seconds = min(max(int(rows / logs_per_day * 86_400), 86_400), MAX_HISTORY_DAYS * 86_400)
+    days = rng.integers(0, span_seconds // 86_400 + 1, size=rows)
+    # Awake hours, centred on the early afternoon; mornings come with a little more energy
+    seconds = np.clip(rng.normal(13.5 * 3600, 4 * 3600, size=rows), 7 * 3600, 23.5 * 3600).astype(np.int64)
+    offsets = np.sort(days * 86_400 + seconds)
+    start = np.datetime64(HISTORY_END - timedelta(seconds=span_seconds), "s")
+    created_at = start + offsets.astype("timedelta64[s]")
+
+    day_of_year = (created_at - created_at.astype("datetime64[Y]")).astype("timedelta64[D]").astype(np.int64)
+    weekday = (created_at.astype("datetime64[D]").astype(np.int64) + 3) % 7
+    # 0 in mid January, 1 in mid July
+    summer = (1 - np.cos(2 * np.pi * (day_of_year - 15) / 365)) / 2
+
+    temperature = np.round(-2 + 24 * summer + rng.normal(0, 4, size=rows), 1)
+    names = list(WEATHER_CONDITIONS)
+    winter_odds, summer_odds = (np.array(odds) / sum(odds) for odds in zip(*WEATHER_CONDITIONS.values()))
+    # Inverse CDF sampling with odds blended by the time of year, one draw per log
+    cumulative = np.cumsum((1 - summer)[:, None] * winter_odds + summer[:, None] * summer_odds, axis=1)
+    condition = np.minimum((cumulative < rng.random(size=(rows, 1))).sum(axis=1), len(names) - 1)
+
+    # Every user has their own baseline and sensitivity to the weather
+    baseline = rng.normal(3.1, 0.4)
+    sensitivity = rng.uniform(0.3, 1.5)
+    mood = (baseline + 0.6 * (summer - 0.5) + WEEKDAY_MOOD_EFFECT[weekday]
+            + sensitivity * np.array([CONDITION_MOOD_EFFECT[name] for name in names])[condition]
+            + rng.normal(0, 0.8, size=rows))
+    energy = mood * 0.6 + rng.normal(1.2, 0.9, size=rows) + 0.2 * (offsets % 86_400 < 12 * 3600)
+
+    weather = np.array([f"{t:g}°C – {names[c]}" for t, c in zip(temperature.tolist(), condition.tolist())], dtype=object)
+    weather[rng.random(size=rows) < NO_WEATHER_SHARE] = None
+
+    return {
+        "user_id": np.full(rows, user_id, dtype=np.int64),
+        "mood_value": np.clip(np.rint(mood), 1, 5).astype(np.int64),
+        "energy_level": np.clip(np.rint(energy), 1, 5).astype(np.int64),
+        "created_at": created_at,
+        "weather": weather,
+    }
+
+
+def iter_rows(columns: dict[str, np.ndarray], batch_size: int) -> Iterator[list[dict]]:
+    """
+    Plain MoodLog row dicts in batches, converted from the arrays one batch at a time
+    """
+    rows = len(columns["user_id"])
+    for start in range(0, rows, batch_size):
+        end = min(start + batch_size, rows)
+        batch = {name: values[start:end].tolist() for name, values in columns.items()}
+        yield [{
+            "user_id": batch["user_id"][i],
+            "mood_value": batch["mood_value"][i],
+            "energy_level": batch["energy_level"][i],
+            "created_at": batch["created_at"][i],
+            "weather": batch["weather"][i],
+            "notes": f"Synthetic log #{start + i}",
+        } for i in range(end - start)]
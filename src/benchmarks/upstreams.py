@@ -0,0 +1,118 @@
+"""
+Local stand-ins for OpenWeatherMap and the YouTube Data API, answering with responses shaped like the real ones
+after a configurable delay. Point the app at them with WEATHER_URL and YOUTUBE_SEARCH_URL.
+
+Usage:
+    python -m src.benchmarks.upstreams --port 9100 --weather-latency-ms 80 --youtube-latency-ms 150
+    WEATHER_URL=http://127.0.0.1:9100/data/2.5/weather YOUTUBE_SEARCH_URL=http://127.0.0.1:9100/youtube/v3/search \\
+        WEATHER_API_KEY=load-test YOUTUBE_API_KEY=load-test uvicorn mindfuly.api:app --port 8200
+"""
+import argparse
+import asyncio
+import random
+import zlib
+from dataclasses import dataclass, field
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+WEATHER_PATH = "/data/2.5/weather"
+YOUTUBE_SEARCH_PATH = "/youtube/v3/search"
+WEATHER_DESCRIPTIONS = ["clear sky", "few clouds", "overcast clouds", "light rain", "moderate rain", "mist"]
+
+
+@dataclass
+class UpstreamLatency():
+    """
+    Delay before each answer: latency_ms plus up to jitter_ms, error_rate of the calls fail with a 503
+    """
+    latency_ms: float = 50.0
+    jitter_ms: float = 20.0
+    error_rate: float = 0.0
+    calls: int = field(default=0, init=False)
+
+    async def wait(self) -> bool:
+        self.calls += 1
+        await asyncio.sleep((self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000)
+        return random.random() >= self.error_rate
+
+
+def create_upstream_app(weather: UpstreamLatency, youtube: UpstreamLatency) -> FastAPI:
+    app = FastAPI(title="Mindfuly upstream stand-ins")
+    app.state.latency = {"weather": weather, "youtube": youtube}
+
+    @app.get(WEATHER_PATH)
+    async def fake_weather(lat: float, lon: float, units: str = "metric", appid: str = ""):
+        if not await weather.wait():
+            return fake_error(503, "Service Unavailable")
+        return {
+            "coord": {"lat": lat, "lon": lon},
+            "weather": [{"id": 800, "main": "Weather", "description": random.choice(WEATHER_DESCRIPTIONS), "icon": "01d"}],
+            "main": {"temp": round(random.uniform(-5, 30), 2), "feels_like": 10.0, "humidity": random.randint(30, 95)},
+            "wind": {"speed": round(random.uniform(0, 12), 1)},
+            "name": "Load Test City",
+            "cod": 200,
+        }
+
+    @app.get(YOUTUBE_SEARCH_PATH)
+    async def fake_youtube_search(q: str, maxResults: int = 5, key: str = ""):
+        if not await youtube.wait():
+            return fake_error(503, "Backend Error")
+        return {
+            "kind": "youtube#searchListResponse",
+            "items": [{
+                "id": {"kind": "youtube#video", "videoId": f"{zlib.crc32(q.encode()):08x}{i:03d}"},
+                "snippet": {
+                    "title": f"{q} #{i}",
+                    "channelTitle": "Load Test Channel",
+                    "thumbnails": {"medium": {"url": f"https://i.ytimg.com/vi/{i}/mqdefault.jpg"}},
+                },
+            } for i in range(maxResults)],
+        }
+
+    @app.get("/calls")
+    async def upstream_calls():
+        return {name: latency.calls for name, latency in app.state.latency.items()}
+
+    return app
+
+
+def fake_error(status_code: int, message: str) -> JSONResponse:
+    return JSONResponse(status_code=status_code, content={"error": {"code": status_code, "message": message, "errors": []}})
+
+
+def create_upstream_server(app: FastAPI, host: str, port: int) -> uvicorn.Server:
+    """
+    A uvicorn server for the stand-ins, started with `await server.serve()` inside a running loop
+    """
+    return uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning", lifespan="off"))
+
+
+def add_latency_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--weather-latency-ms", type=float, default=80.0)
+    parser.add_argument("--youtube-latency-ms", type=float, default=150.0)
+    parser.add_argument("--upstream-jitter-ms", type=float, default=40.0)
+    parser.add_argument("--upstream-error-rate", type=float, default=0.0)
+
+
+def latencies_from_args(args: argparse.Namespace) -> tuple[UpstreamLatency, UpstreamLatency]:
+    return (
+        UpstreamLatency(args.weather_latency_ms, args.upstream_jitter_ms, args.upstream_error_rate),
+        UpstreamLatency(args.youtube_latency_ms, args.upstream_jitter_ms, args.upstream_error_rate),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    add_latency_arguments(parser)
+    args = parser.parse_args()
+
+    weather, youtube = latencies_from_args(args)
+    asyncio.run(create_upstream_server(create_upstream_app(weather, youtube), args.host, args.port).serve())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Compare the SQL GROUP BY weekday aggregation with the previous load-everything-into-Python version.
+
+Usage:
+    python -m src.benchmarks.weekly_stats --sizes 10000 100000 1000000
+"""
+import argparse
+import asyncio
+import calendar
+import random
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from src.shared.models import Base, MoodLog, MoodLogRepositoryV2
+from src.shared.stats_cache import stats_cache
+
+USER_ID = 1
+INSERT_BATCH = 10000
+
+
+async def legacy_weekly_mood_stats(session: AsyncSession, user_id: int) -> list[dict]:
+    # The pre-aggregation implementation, kept here only as the benchmark baseline
+    result = await session.execute(
+        select(MoodLog).where(MoodLog.user_id == user_id)
+    )
+    logs = result.scalars().all()
+
+    weekday_groups = defaultdict(list)
+
+    for log in logs:
+        weekday_groups[calendar.day_name[log.created_at.weekday()]].append(log)
+
+    weekly_stats = []
+
+    for day, logs_for_day in weekday_groups.items():
+        weekly_stats.append({
+            "day": day,
+            "avg_mood": sum(log.mood_value for log in logs_for_day) / len(logs_for_day),
+            "avg_energy": sum(log.energy_level for log in logs_for_day) / len(logs_for_day),
+            "total_logs": len(logs_for_day),
+        })
+
+    return weekly_stats
+
+
+async def load_rows(session: AsyncSession, rows: int):
+    start = datetime(2020, 1, 1)
+    for offset in range(0, rows, INSERT_BATCH):
+        await session.execute(insert(MoodLog), [{
+            "user_id": USER_ID,
+            "mood_value": random.randint(1, 5),
+            "energy_level": random.randint(1, 5),
+            "notes": "Benchmark log #" + str(i),
+            "weather": "sunny",
+            "created_at": start + timedelta(minutes=37 * i),
+        } for i in range(offset, min(offset + INSERT_BATCH, rows))])
+    await session.commit()
+    # The repository reads the daily rollups, which a plain insert into mood_logs does not fill
+    await MoodLogRepositoryV2(session).rebuild_rollups(USER_ID)
+
+
+async def timed(call, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await call()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+async def run(sizes: list[int], repeat: int):
+    # Every repeat should run the query, not read the first run's result back
+    stats_cache.enabled = False
+    print(f"{'rows':>10} {'legacy (s)':>12} {'sql (s)':>12} {'speedup':>9}")
+
+    for rows in sizes:
+        engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+        AsyncSessionLocal = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+        async with AsyncSessionLocal() as session:
+            await load_rows(session, rows)
+            repo = MoodLogRepositoryV2(session)
+
+            # Only worth timing if both sides give the same answer, the legacy one in no particular day order
+            expected = sorted(await legacy_weekly_mood_stats(session, USER_ID), key=lambda entry: list(calendar.day_name).index(entry["day"]))
+            assert await repo.get_weekly_mood_stats(USER_ID) == expected, "SQL weekly stats differ from the legacy version"
+
+            legacy = await timed(lambda: legacy_weekly_mood_stats(session, USER_ID), repeat)
+            session.expunge_all()
+            aggregated = await timed(lambda: repo.get_weekly_mood_stats(USER_ID), repeat)
+
+        await engine.dispose()
+        print(f"{rows:>10} {legacy:>12.4f} {aggregated:>12.4f} {legacy / aggregated:>8.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    asyncio.run(run(args.sizes, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,17 +2,58 @@ from fastapi import Depends, HTTPException
 from nicegui import ui
 import logging, random
 import asyncio
-from datetime import timedelta
+import json
+from datetime import date, datetime, timedelta, timezone
 from typing import Optional
 import httpx
 
 from src.mindfuly.routes.users import create_user
 from user_service_v2.models.user import UserSchema, get_user_repository_v2, UserRepositoryV2
-from src.shared.models import get_mood_log_repository_v2, MoodLogRepositoryV2
+from src.shared.models import get_mood_log_repository_v2, MoodLogRepositoryV2, decode_cursor
+from src.shared.database import async_session_scope
+from src.shared.identity import forget_username
+from src.shared.insights import get_insights
+from src.shared.charts import encode_chart_series, epoch_ms, load_chart_data
+from src.shared.events import MOOD_LOG_CREATED, MOOD_LOGS_IMPORTED, MoodLogEvent, event_bus, extends_history
 from src.mindfuly.auth.jwt_utils import create_access_token, verify_token
+from src.mindfuly.auth.passwords import verify_user_password, create_user_hashed
 
 logger = logging.getLogger('uvicorn.error')
 
+JOURNAL_PAGE_SIZE = 20
+
+LOG_SERIES = ("mood_logs", "energy_logs")
+MEAN_SERIES = ("mood_running_mean", "energy_running_mean")
+
+# Browser half of charts.encode_series: typed arrays back into [time, value] rows of ECharts datasets
+CHART_DATASETS_JS = """
+function mindfulyDecodeSeries(encoded) {
+    const buffer = (data) => Uint8Array.from(atob(data), (c) => c.charCodeAt(0)).buffer;
+    const deltas = new globalThis[encoded.xType + "Array"](buffer(encoded.x));
+    const values = new globalThis[encoded.yType + "Array"](buffer(encoded.y));
+    const rows = new Array(encoded.length);
+    let x = encoded.base;
+    for (let i = 0; i < encoded.length; i++) {
+        x += deltas[i];
+        rows[i] = [x * encoded.unit, values[i] / encoded.scale];
+    }
+    return rows;
+}
+
+function mindfulySetDatasets(id, series) {
+    // The chart instance only exists once the app and the element have mounted
+    let chart;
+    try {
+        chart = getElement(id)?.chart;
+    } catch (error) {}
+    if (!chart) {
+        setTimeout(() => mindfulySetDatasets(id, series), 20);
+        return;
+    }
+    chart.setOption({dataset: series.map((encoded) => ({source: mindfulyDecodeSeries(encoded)}))});
+}
+"""
+
 # Middleware to check authentication
 async def require_auth(username: str = None):
     """Check if user is authenticated via JWT token in localStorage"""
@@ -185,7 +226,14 @@ async def login_page(user_repo: UserRepositoryV2 = Depends(get_user_repository_v
                     error_label.visible = True
                     return
 
-                if await user_repo.verify_password(user, password_input.value):
+                try:
+                    valid = await verify_user_password(user_repo, user, password_input.value)
+                except HTTPException as e:
+                    error_label.text = e.detail
+                    error_label.visible = True
+                    return
+
+                if valid:
                     # Create JWT token
                     access_token = create_access_token(
                         data={"sub": username_input.value},
@@ -277,7 +325,13 @@ async def signup_page(user_repo: UserRepositoryV2 = Depends(get_user_repository_
                     error_label.visible = True
                     return
 
-                result = await user_repo.create(username_input.value, email_input.value, password_input.value, tier=1)
+                try:
+                    result = await create_user_hashed(user_repo, username_input.value, email_input.value, password_input.value, tier=1)
+                except HTTPException as e:
+                    error_label.text = e.detail
+                    error_label.visible = True
+                    return
+
                 if not result:
                     error_label.text = "Username or email already exists. Please try again."
                     error_label.visible = True
@@ -335,14 +389,14 @@ async def user_overview_page(user_repo: UserRepositoryV2 = Depends(get_user_repo
 
 
 @ui.page("/users/{username}/home")
-async def user_home_screen(username: str, user_repo: UserRepositoryV2 = Depends(get_user_repository_v2), mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)):
+async def user_home_screen(username: str, mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)):
     # Verify user is authenticated and accessing their own page
     authenticated_user = await require_auth(username)
     if not authenticated_user:
         return
     
-    user = await user_repo.get_by_name(username)
-    if not user: 
+    user_id = await mood_log_repo.resolve_user_id(username)
+    if user_id is None: 
         ui.label("User not found.")
         return
     
@@ -458,7 +512,7 @@ async def user_home_screen(username: str, user_repo: UserRepositoryV2 = Depends(
                     
                     try:
                         mood_log = await mood_log_repo.create_mood_log(
-                            user_id=user.id,
+                            user_id=user_id,
                             mood_value=mood_value,
                             energy_level=energy_level,
                             notes=notes,
@@ -533,103 +587,25 @@ async def user_home_screen(username: str, user_repo: UserRepositoryV2 = Depends(
                 .props("id=weather-text")
 
             with ui.column().classes("bg-yellow-50 rounded-xl border p-4 items-center w-full text-center"):
-                weather_stats = await mood_log_repo.get_weather_mood_stats(user.id)
-                weekly_stats = await mood_log_repo.get_weekly_mood_stats(user.id)
-
-                def extract_weather_type(full_weather: str) -> str:
-
-                    if "–" in full_weather:
-                        weather_only = full_weather.split("–")[1].strip()
-                    else:
-                        weather_only = full_weather.strip()
-
-                    return weather_only
-                
-                def get_max_mood_weather(weather_stats):
-                    if not weather_stats:
-                        return "no data available yet."
-                    
-                    max_entry = max(weather_stats, key=lambda x: x["avg_mood"])
-                    return max_entry["weather"]
-
-                def get_min_mood_weather(weather_stats):
-                    if not weather_stats:
-                        return "no data available yet."
-
-                    min_entry = min(weather_stats, key = lambda x: x["avg_mood"])
-                    return min_entry["weather"]
-
-                def get_neutral_mood_weather(weather_stats):
-                    if not weather_stats:
-                        return "no data available yet."
-
-                    neutral_entry = min(weather_stats, key=lambda x: abs(x["avg_mood"] - 3))
-                    return neutral_entry["weather"]
-
-                def get_happiest_day(weekly_stats):
-                    if not weekly_stats:
-                        return "no data available yet."
-                    
-                    best_day = max(weekly_stats, key=lambda x: x["avg_mood"])
-                    return best_day["day"]
-
-                def get_saddest_day(weekly_stats):
-                    if not weekly_stats:
-                        return "no data available yet."
-
-                    saddest_day = min(weekly_stats, key = lambda x: x["avg_mood"])
-                    return saddest_day["day"]
-
-                def get_neutral_day(weekly_stats):
-                    if not weekly_stats:
-                        return "no data available yet."
-
-                    neutral_day = min(weekly_stats, key= lambda x: abs(x["avg_mood"] - 3))
-                    return neutral_day["day"]
-
+                # Computed once per logged mood, a page view only picks from the stored set
+                insights = (await get_insights(mood_log_repo, user_id))["insights"]
 
                 ui.label("Daily Tip").classes("font-semibold mb-1")
 
-                insights_mood_weather = []
-                
-                if (len(weather_stats) >= 1):
-                    no_temp1 = get_max_mood_weather(weather_stats)
-                    happiest_mood_weather = extract_weather_type(no_temp1)
-
-                    no_temp2 = get_min_mood_weather(weather_stats)
-                    saddest_mood_weather = extract_weather_type(no_temp2)
-
-                    no_temp3 = get_neutral_mood_weather(weather_stats)
-                    neutral_mood_weather = extract_weather_type(no_temp3)
-
-                    insights_mood_weather.append(f"You tend to feel the most happy when it is {happiest_mood_weather}")
-                    insights_mood_weather.append(f"You tend to feel the saddest when it is {saddest_mood_weather}")
-                    insights_mood_weather.append(f"You tend to feel neutral when it is {neutral_mood_weather}")
-
-                    chosen_insight1 = random.choice(insights_mood_weather)
-                    ui.label(chosen_insight1).classes("text-gray-700")
-
+                if insights["weather"]:
+                    ui.label(random.choice(insights["weather"])).classes("text-gray-700")
                 else:
                     ui.label("Not enough data for personalized insight.").classes("text-gray-700")
 
-
-                insights_weekly_mood = []
-
-                if (len(weekly_stats) >= 1):
-                    happiest_day = get_happiest_day(weekly_stats)
-                    saddest_day = get_saddest_day(weekly_stats)
-                    neutral_day = get_neutral_day(weekly_stats)
-
-                    insights_weekly_mood.append(f"You tend to feel the happiest on {happiest_day}")
-                    insights_weekly_mood.append(f"You tend to feel the saddest on {saddest_day}")
-                    insights_weekly_mood.append(f"You tend to feel the most neutral on {neutral_day}")
-
-                    chosen_insight2 = random.choice(insights_weekly_mood)
-                    ui.label(chosen_insight2).classes("text-gray-700 mt-1")
-
+                if insights["weekday"]:
+                    ui.label(random.choice(insights["weekday"])).classes("text-gray-700 mt-1")
                 else:
                     ui.label("Not enough data for personalized insight.").classes("text-gray-700 mt-1")
 
+                extra_insights = [message for name in ("streak", "energy_trend", "weather_sensitivity") for message in insights[name]]
+                if extra_insights:
+                    ui.label(random.choice(extra_insights)).classes("text-gray-700 mt-1")
+
     
     # Weather 
     await ui.run_javascript('''
@@ -1053,13 +1029,13 @@ async def user_home_screen(username: str, user_repo: UserRepositoryV2 = Depends(
 
 
 @ui.page("/users/{username}/journal")
-async def user_journal_page(username: str, user_repo: UserRepositoryV2 = Depends(get_user_repository_v2), mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)):
+async def user_journal_page(username: str, mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)):
     authenticated_user = await require_auth(username)
     if not authenticated_user:
         return
     
-    user = await user_repo.get_by_name(username)
-    if not user: 
+    user_id = await mood_log_repo.resolve_user_id(username)
+    if user_id is None: 
         ui.label("User not found.")
         return
     
@@ -1112,31 +1088,101 @@ async def user_journal_page(username: str, user_repo: UserRepositoryV2 = Depends
     with ui.column().classes('w-full items-center mt-10 mb-8 px-4'):
         ui.label(f"{username}'s Journal").classes('text-4xl font-bold text-center mb-1 text-gray-800')
 
-    mood_logs = await mood_log_repo.get_mood_logs(user.id, limit=20)
+    mood_logs, next_cursor = await mood_log_repo.get_mood_log_page(user_id, limit=JOURNAL_PAGE_SIZE)
+
+    def render_journal_card(log):
+        with ui.card().classes("dashboard-card p-6 mb-4 items-center text-center") as card:
+            with ui.row().classes("justify-between items-center mb-2"):
+                ui.label(f"Mood: {log.mood_value}").classes("font-semibold text-lg text-purple-600")
+                ui.label(f"Energy: {log.energy_level}").classes("font-semibold text-lg text-blue-600")
+                ui.label(f"Created on: {log.created_at.date()}").classes("text-gray-500 text-sm")
+            if log.notes:
+                ui.label(log.notes).classes("mt-2 text-gray-700")
+        return card
 
-    with ui.column().classes('w-full max-w-4xl mx-auto px-4 items-center'):
+    def render_journal(mood_logs):
         if not mood_logs:
             with ui.card().classes('dashboard-card p-8 text-center items-center'):
                 ui.label("No journal entries found. Start logging your mood today!").classes("text-gray-600 italic text-lg")
         else:
             for log in mood_logs:
-                with ui.card().classes("dashboard-card p-6 mb-4 items-center text-center"):
-                    with ui.row().classes("justify-between items-center mb-2"):
-                        ui.label(f"Mood: {log.mood_value}").classes("font-semibold text-lg text-purple-600")
-                        ui.label(f"Energy: {log.energy_level}").classes("font-semibold text-lg text-blue-600")
-                        ui.label(f"Created on: {log.created_at.date()}").classes("text-gray-500 text-sm")
-                    if log.notes:
-                        ui.label(log.notes).classes("mt-2 text-gray-700")
+                render_journal_card(log)
+
+    with ui.column().classes('w-full max-w-4xl mx-auto px-4 items-center') as journal_column:
+        render_journal(mood_logs)
+    journal_empty = not mood_logs
+
+    # Sentinel below the cards, older entries are fetched whenever it scrolls into view
+    ui.element('div').props('id=journal-sentinel').classes('w-full h-4')
+    loading = False
+
+    async def load_more_entries():
+        nonlocal next_cursor, loading
+        if loading or next_cursor is None:
+            return
+
+        loading = True
+        try:
+            # The page's request session is closed by now, so each page gets its own short session
+            async with async_session_scope() as db:
+                older_logs, next_cursor = await MoodLogRepositoryV2(db).get_mood_log_page(
+                    user_id, limit=JOURNAL_PAGE_SIZE, before=decode_cursor(next_cursor)
+                )
+            with journal_column:
+                for log in older_logs:
+                    render_journal_card(log)
+        finally:
+            loading = False
+
+    ui.on('journal_load_more', load_more_entries)
+
+    # Created on of the card on top, new logs older than it belong further down
+    newest_log_at = mood_logs[0].created_at if mood_logs else None
+
+    async def apply_mood_log_event(event: MoodLogEvent):
+        nonlocal next_cursor, journal_empty, newest_log_at
+        if extends_history(event, newest_log_at):
+            if journal_empty:
+                journal_column.clear()
+                journal_empty = False
+            with journal_column:
+                # Oldest first, so the newest ends up on top
+                for log in event.logs:
+                    render_journal_card(log).move(target_index=0)
+            newest_log_at = event.logs[-1].created_at if event.logs else newest_log_at
+            return
+
+        # Edits, clears, imports and backdated logs can change any card, so the first page is rendered again
+        async with async_session_scope() as db:
+            mood_logs, next_cursor = await MoodLogRepositoryV2(db).get_mood_log_page(user_id, limit=JOURNAL_PAGE_SIZE)
+        journal_column.clear()
+        with journal_column:
+            render_journal(mood_logs)
+        journal_empty = not mood_logs
+        newest_log_at = mood_logs[0].created_at if mood_logs else None
+
+    # New logs from other tabs and devices show up without a reload
+    ui.context.client.on_delete(event_bus.subscribe(user_id, apply_mood_log_event))
+
+    if next_cursor is not None:
+        await ui.run_javascript('''
+            const sentinel = document.getElementById('journal-sentinel');
+            if (sentinel) {
+                new IntersectionObserver((entries) => {
+                    if (entries[0].isIntersecting) emitEvent('journal_load_more');
+                }, { rootMargin: '400px' }).observe(sentinel);
+            }
+        ''')
 
 
 @ui.page("/users/{username}/analytics")
-async def user_analytics_page(username: str, user_repo: UserRepositoryV2 = Depends(get_user_repository_v2), mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)):
+async def user_analytics_page(username: str, mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)):
     authenticated_user = await require_auth(username)
     if not authenticated_user:
         return
     
-    user = await user_repo.get_by_name(username)
-    if not user: 
+    user_id = await mood_log_repo.resolve_user_id(username)
+    if user_id is None: 
         ui.label("User not found.")
         return
     
@@ -1189,22 +1235,72 @@ async def user_analytics_page(username: str, user_repo: UserRepositoryV2 = Depen
     with ui.column().classes('w-full items-center mt-10 mb-8 px-4'):
         ui.label(f"{username}'s Analytics").classes('text-4xl font-bold text-center mb-1 text-gray-800')
 
-    running_means = await mood_log_repo.get_running_means(user.id, limit=20)
-    mood_logs = await mood_log_repo.get_mood_logs(user.id, limit=20)
+    chart_data = await load_chart_data(mood_log_repo, user_id)
+
+    def series_extent(series: dict) -> tuple[int, int]:
+        return min(points[0][0] for points in series.values() if points), max(points[-1][0] for points in series.values() if points)
 
-    if not mood_logs:
-        with ui.card().classes('dashboard-card p-8 text-center max-w-4xl mx-auto mt-6'):
+    if not chart_data["total_logs"]:
+        with ui.card().classes('dashboard-card p-8 text-center max-w-4xl mx-auto mt-6') as empty_card:
             ui.label("Not enough data to display analytics. Start logging your mood today!").classes("text-gray-600 italic text-lg")
+
+        async def show_first_logs(event: MoodLogEvent):
+            # The charts are only built around existing data, the first logs need a full render
+            if event.kind in (MOOD_LOG_CREATED, MOOD_LOGS_IMPORTED):
+                with empty_card:
+                    ui.navigate.reload()
+
+        ui.context.client.on_delete(event_bus.subscribe(user_id, show_first_logs))
     else:
-        dates = [entry["date"] for entry in running_means][::-1]
-        mood_values = [entry["avg_mood"] for entry in running_means][::-1]
-        energy_values = [entry["avg_energy"] for entry in running_means][::-1]
+        ui.add_head_html(f"<script>{CHART_DATASETS_JS}</script>")
+
+        # Points currently on screen; they reach ECharts as typed arrays, decoded into its datasets in the browser
+        shown = dict(chart_data["series"])
+        # The axes span the whole history, so dataZoom percentages keep meaning the same dates after a refetch
+        first_ms, last_ms = series_extent(shown)
+
+        def push_series(chart, keys: tuple[str, ...]):
+            encoded = encode_chart_series({key: shown[key] for key in keys})
+            chart.client.run_javascript(f"mindfulySetDatasets({chart.id}, {json.dumps([encoded[key] for key in keys])})")
+
+        def zoom_window(e) -> Optional[tuple[float, float]]:
+            # Slider zooms report start/end directly, mouse wheel and pinch zooms in a batch
+            zoom = e.args["batch"][0] if e.args.get("batch") else e.args
+            if "start" not in zoom or "end" not in zoom:
+                return None
+            return zoom["start"], zoom["end"]
+
+        async def refetch_zoomed(chart, series_keys: tuple[str, ...], e):
+            window = zoom_window(e)
+            if window is None:
+                return
+
+            span = last_ms - first_ms
+            start = datetime.fromtimestamp((first_ms + span * window[0] / 100) / 1000, tz=timezone.utc).date()
+            end = datetime.fromtimestamp((first_ms + span * window[1] / 100) / 1000, tz=timezone.utc).date()
+
+            # The page's own session is closed once the page has rendered
+            async with async_session_scope() as db:
+                zoomed = await load_chart_data(MoodLogRepositoryV2(db), user_id, start=start, end=end)
+
+            for key in series_keys:
+                shown[key] = zoomed["series"][key]
+            for data_zoom in chart.options["dataZoom"]:
+                data_zoom["start"], data_zoom["end"] = window
+            chart.update()
+            push_series(chart, series_keys)
+
+        def zoom_controls() -> list[dict]:
+            return [
+                {"type": "inside", "filterMode": "none"},
+                {"type": "slider", "filterMode": "none"}
+            ]
 
         with ui.card().classes("dashboard-card p-6 max-w-4xl mx-auto mt-6"):
             with ui.row().classes("justify-center w-full mb-4"):
                 ui.label("Your Mood and Energy").classes("text-xl font-bold text-center text-gray-800")
             
-            ui.echart({
+            logs_chart = ui.echart({
                 "tooltip": {
                     "trigger": "axis"
                 },
@@ -1212,19 +1308,22 @@ async def user_analytics_page(username: str, user_repo: UserRepositoryV2 = Depen
                     "data": ["Mood Logs", "Energy Logs"]
                 },
                 "xAxis": {
-                    "type": "category",
-                    "data": [log.created_at.date().isoformat() for log in mood_logs][::-1]
+                    "type": "time",
+                    "min": first_ms,
+                    "max": last_ms
                 },
                 "yAxis": {
                     "type": "value",
                     "min": 1,
                     "max": 5
                 },
+                "dataZoom": zoom_controls(),
                 "series": [
                     {
                         "name": "Mood Logs",
                         "type": "scatter",
-                        "data": [log.mood_value for log in mood_logs][::-1],
+                        "datasetIndex": 0,
+                        "encode": {"x": 0, "y": 1},
                         "itemStyle": {
                             "color": "#42A5F5"
                         }
@@ -1232,19 +1331,26 @@ async def user_analytics_page(username: str, user_repo: UserRepositoryV2 = Depen
                     {
                         "name": "Energy Logs",
                         "type": "scatter",
-                        "data": [log.energy_level for log in mood_logs][::-1],
+                        "datasetIndex": 1,
+                        "encode": {"x": 0, "y": 1},
                         "itemStyle": {
                             "color": "#66BB6A"
                         }
                     }
                 ]
             })
+            logs_chart.on(
+                "chart:datazoom",
+                lambda e: refetch_zoomed(logs_chart, LOG_SERIES, e),
+                throttle=0.5,
+                leading_events=False
+            )
 
         with ui.card().classes("dashboard-card p-6 max-w-4xl mx-auto mt-6"):
             with ui.row().classes("justify-center w-full mb-4"):
                 ui.label("Average Mood and Energy Levels Over Time").classes("text-xl font-bold text-center text-gray-800")
 
-            ui.echart({
+            means_chart = ui.echart({
                 "tooltip": {
                     "trigger": "axis"
                 },
@@ -1252,19 +1358,22 @@ async def user_analytics_page(username: str, user_repo: UserRepositoryV2 = Depen
                     "data": ["Running Mean Mood", "Running Mean Energy"]
                 },
                 "xAxis": {
-                    "type": "category",
-                    "data": dates
+                    "type": "time",
+                    "min": first_ms,
+                    "max": last_ms
                 },
                 "yAxis": {
                     "type": "value",
                     "min": 1,
                     "max": 5
                 },
+                "dataZoom": zoom_controls(),
                 "series": [
                     {
                         "name": "Average Mood",
                         "type": "line",
-                        "data": mood_values,
+                        "datasetIndex": 0,
+                        "encode": {"x": 0, "y": 1},
                         "smooth": True,
                         "lineStyle": {
                             "color": "#42A5F5"
@@ -1273,7 +1382,8 @@ async def user_analytics_page(username: str, user_repo: UserRepositoryV2 = Depen
                     {
                         "name": "Average Energy",
                         "type": "line",
-                        "data": energy_values,
+                        "datasetIndex": 1,
+                        "encode": {"x": 0, "y": 1},
                         "smooth": True,
                         "lineStyle": {
                             "color": "#66BB6A"
@@ -1281,6 +1391,62 @@ async def user_analytics_page(username: str, user_repo: UserRepositoryV2 = Depen
                     }
                 ]
             })
+            means_chart.on(
+                "chart:datazoom",
+                lambda e: refetch_zoomed(means_chart, MEAN_SERIES, e),
+                throttle=0.5,
+                leading_events=False
+            )
+
+        push_series(logs_chart, LOG_SERIES)
+        push_series(means_chart, MEAN_SERIES)
+
+        newest_log_at = chart_data["newest_log_at"]
+
+        async def apply_mood_log_event(event: MoodLogEvent):
+            nonlocal first_ms, last_ms, newest_log_at
+            # Logs after the newest one only extend the series; backdated ones fall through to the reload
+            if extends_history(event, newest_log_at):
+                for log in event.logs:
+                    timestamp = epoch_ms(log.created_at)
+                    shown["mood_logs"].append((timestamp, log.mood_value))
+                    shown["energy_logs"].append((timestamp, log.energy_level))
+                    last_ms = max(last_ms, timestamp)
+                    newest_log_at = log.created_at
+
+                # Only the newest cumulative mean moves, which is a single-row query
+                async with async_session_scope() as db:
+                    latest = (await MoodLogRepositoryV2(db).get_running_means(user_id, limit=1))[0]
+                for key, value in zip(MEAN_SERIES, ("avg_mood", "avg_energy")):
+                    point = (epoch_ms(date.fromisoformat(latest["date"])), latest[value])
+                    if shown[key] and shown[key][-1][0] == point[0]:
+                        shown[key][-1] = point
+                    else:
+                        shown[key].append(point)
+            else:
+                # Edits, clears, imports and backdated logs can move every point, so the overview is loaded again
+                async with async_session_scope() as db:
+                    reloaded = await load_chart_data(MoodLogRepositoryV2(db), user_id)
+                if not reloaded["total_logs"]:
+                    with logs_chart:
+                        ui.navigate.reload()
+                    return
+
+                shown.update(reloaded["series"])
+                newest_log_at = reloaded["newest_log_at"]
+                first_ms, last_ms = series_extent(shown)
+                for chart in (logs_chart, means_chart):
+                    for data_zoom in chart.options["dataZoom"]:
+                        data_zoom["start"], data_zoom["end"] = 0, 100
+
+            for chart, keys in ((logs_chart, LOG_SERIES), (means_chart, MEAN_SERIES)):
+                chart.options["xAxis"]["min"] = first_ms
+                chart.options["xAxis"]["max"] = last_ms
+                chart.update()
+                push_series(chart, keys)
+
+        # Logs submitted in other tabs and devices are added to the charts without a reload
+        ui.context.client.on_delete(event_bus.subscribe(user_id, apply_mood_log_event))
 
 
 @ui.page("/users/{username}/settings")
@@ -1344,6 +1510,7 @@ async def users_settings_page(username: str, user_repo: UserRepositoryV2 = Depen
             new_name or None,
             new_email or None,
         )
+        forget_username(username)
 
         ui.notify("User Information Updated!", color="green", icon='check_circle')
         await asyncio.sleep(0.7)
@@ -1360,6 +1527,7 @@ async def users_settings_page(username: str, user_repo: UserRepositoryV2 = Depen
             return
     
         await user_repo.delete(current_user.id)
+        forget_username(username)
         ui.notify("User Deleted Successfully!", color="green", icon='check_circle')
         await asyncio.sleep(0.7)
         await ui.run_javascript("localStorage.clear()")
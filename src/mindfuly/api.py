@@ -1,13 +1,42 @@
 import os
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from src.mindfuly.routes import authorization, users, mood, weather, youtube
+from src.mindfuly.routes import authorization, users, mood, weather, youtube, metrics
+from src.shared.database import init_db, warm_pool, dispose_db
+from src.shared.http import create_http_client
+from src.mindfuly.auth.passwords import password_pool
+from src.shared.events import event_bus
+from src.shared.metrics import MetricsMiddleware, instrument_database
 
 from index.main import ui
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Build the engines once per process and pre-open connections before serving traffic
+    if os.environ.get("DATABASE_HOST"):
+        init_db()
+        await warm_pool()
+    # One pooled client for every outbound API call, keeps connections to upstreams alive
+    app.state.http_client = create_http_client()
+    # Keep the mood playlists cached so /youtube/search/by-mood rarely goes upstream
+    prefetcher = asyncio.create_task(youtube.run_prefetcher(app.state.http_client)) if youtube.YOUTUBE_API_KEY else None
+    yield
+    if prefetcher is not None:
+        prefetcher.cancel()
+    await app.state.http_client.aclose()
+    password_pool.shutdown()
+    # Page updates still running need the database
+    await event_bus.drain()
+    await dispose_db()
+
+
 app = FastAPI(
     title="Mindfuly",
     version="1.0.0",
     decription="Handles mood logs, YouTube music sessions, weather context, and user authentication",
+    lifespan=lifespan,
 )
 
 app.include_router(authorization.router)
@@ -15,10 +44,15 @@ app.include_router(users.router)
 app.include_router(mood.router)
 app.include_router(youtube.router)
 app.include_router(weather.router)
+app.include_router(metrics.router)
+
+# Counts and times the queries of every engine, the per-request totals need MetricsMiddleware
+instrument_database()
+app.add_middleware(MetricsMiddleware)
 
 ui.run_with(
     app,
     mount_path="/",
     favicon="💭",
     title="Mindfuly"
-)
\ No newline at end of file
+)
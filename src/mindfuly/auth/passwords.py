@@ -0,0 +1,130 @@
+# src/mindfuly/auth/passwords.py
+
+import os
+import time
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import HTTPException
+from sqlalchemy.exc import IntegrityError
+
+from user_service_v2.models.user import User
+
+logger = logging.getLogger('uvicorn.error')
+
+# Argon2 releases the GIL while hashing, so a small thread pool hashes in parallel off the event loop
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", min(4, os.cpu_count() or 1)))
+# Hashes allowed to wait or run at once, beyond that requests are turned away with 503
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", PASSWORD_HASH_WORKERS * 8))
+
+
+class PasswordHashPool():
+    """
+    Bounded worker pool for password hashing and verification, with latency counters
+    """
+
+    def __init__(self, workers: int = PASSWORD_HASH_WORKERS, max_pending: int = PASSWORD_HASH_MAX_PENDING):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.executor = None
+        self.pending = 0
+        self.completed = 0
+        self.rejected = 0
+        self.rehashed = 0
+        self.wait_seconds_total = 0.0
+        self.hash_seconds_total = 0.0
+        self.hash_seconds_max = 0.0
+
+    async def run(self, fn: Callable[..., Any], *args) -> Any:
+        """
+        Run fn(*args) on the pool, raises 503 when the queue is full
+        """
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Too many sign-in attempts right now, please retry shortly")
+
+        self.pending += 1
+        queued_at = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                self._record(started - queued_at, time.perf_counter() - started)
+
+        try:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="password-hash")
+            return await asyncio.get_running_loop().run_in_executor(self.executor, timed)
+        finally:
+            self.pending -= 1
+
+    def _record(self, wait_seconds: float, hash_seconds: float):
+        self.completed += 1
+        self.wait_seconds_total += wait_seconds
+        self.hash_seconds_total += hash_seconds
+        self.hash_seconds_max = max(self.hash_seconds_max, hash_seconds)
+
+    async def verify_and_update(self, password_hash, password: str, hashed: str) -> tuple[bool, str | None]:
+        """
+        Verify a password with pwdlib, also returning a fresh hash when the stored one uses outdated parameters
+        """
+        return await self.run(password_hash.verify_and_update, password, hashed)
+
+    def shutdown(self):
+        # The next run() starts a fresh executor, so the pool survives an application restart in-process
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+
+    def stats(self) -> dict:
+        return {
+            "workers": self.workers,
+            "max_pending": self.max_pending,
+            "pending": self.pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "rehashed": self.rehashed,
+            "wait_seconds_avg": round(self.wait_seconds_total / self.completed, 6) if self.completed else 0.0,
+            "hash_seconds_avg": round(self.hash_seconds_total / self.completed, 6) if self.completed else 0.0,
+            "hash_seconds_max": round(self.hash_seconds_max, 6),
+        }
+
+
+password_pool = PasswordHashPool()
+
+
+async def verify_user_password(user_repo, user, password: str) -> bool:
+    """
+    Check a user's password on the pool, rehashing it in place when the Argon2 parameters have changed
+    """
+    valid, updated_hash = await password_pool.verify_and_update(user_repo.password_hash, password, user.hashed_password)
+
+    if valid and updated_hash is not None:
+        user.hashed_password = updated_hash
+        # update_user commits the session, which persists the new hash with no profile changes
+        await user_repo.update_user(user, None, None)
+        password_pool.rehashed += 1
+        logger.info(f"Rehashed password for {user.name} with current parameters")
+
+    return valid
+
+
+async def create_user_hashed(user_repo, name: str, email: str, password: str, tier: int = 1):
+    """
+    Same as user_repo.create, with the password hashed on the pool and the insert kept on the request loop.
+    create hashes inside the call, so its insert is repeated here on the repository's session.
+    """
+    hashed = await password_pool.run(user_repo.password_hash.hash, password)
+
+    try:
+        user = User(name=name, email=email, hashed_password=hashed, tier=tier)
+        user_repo.session.add(user)
+        user_repo.session.commit()
+        return user
+    except IntegrityError:
+        user_repo.session.rollback()
+        return None
@@ -0,0 +1,118 @@
+"""
+Command line maintenance tasks
+
+Usage:
+    python -m src.mindfuly.cli backfill-rollups [--user-id ID]
+    python -m src.mindfuly.cli backfill-weather [--batch-size N]
+    python -m src.mindfuly.cli import-logs USERNAME FILE [--format csv|ndjson] [--chunk-size N] [--resume-from ROW]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+
+from src.shared import database
+from src.shared.models import MoodLogRepositoryV2
+from src.shared.importer import IMPORT_CHUNK_SIZE, IMPORT_FORMATS, import_mood_logs, format_from_filename
+
+# Rebuilds and imports run statements far longer than the request timeout allows, 0 turns it off
+CLI_STATEMENT_TIMEOUT_MS = 0
+
+
+async def backfill_rollups(args):
+    """
+    Rebuild mood_daily_rollups and mood_daily_weather_rollups from the raw mood_logs table
+    """
+    database.init_db(statement_timeout=CLI_STATEMENT_TIMEOUT_MS)
+    try:
+        async with database.AsyncSessionLocal() as session:
+            users = await MoodLogRepositoryV2(session).rebuild_rollups(args.user_id)
+    finally:
+        await database.dispose_db()
+
+    print(f"Rebuilt mood rollups for {users} user(s)")
+
+
+async def backfill_weather(args):
+    """
+    Parse temperature and condition out of the weather text of logs that have none yet, then rebuild the rollups
+    """
+    database.init_db(statement_timeout=CLI_STATEMENT_TIMEOUT_MS)
+    try:
+        async with database.AsyncSessionLocal() as session:
+            repo = MoodLogRepositoryV2(session)
+            logs = await repo.backfill_weather_fields(args.batch_size)
+            users = await repo.rebuild_rollups()
+    finally:
+        await database.dispose_db()
+
+    print(f"Parsed the weather of {logs} mood log(s), rebuilt mood rollups for {users} user(s)")
+
+
+async def import_logs(args):
+    """
+    Stream a CSV or NDJSON history file into a user's mood logs, committing every --chunk-size rows.
+    The last committed row is kept in a checkpoint file next to the input, so rerunning resumes after it.
+    """
+    format = args.format or format_from_filename(args.file)
+    if format is None:
+        sys.exit("Could not tell the file format, pass --format csv or --format ndjson")
+
+    checkpoint = args.checkpoint or args.file + ".checkpoint"
+    start_row = args.resume_from
+    if start_row is None and os.path.exists(checkpoint):
+        with open(checkpoint) as f:
+            start_row = json.load(f)["last_committed_row"]
+        print(f"Resuming after row {start_row} from {checkpoint}")
+
+    database.init_db(statement_timeout=CLI_STATEMENT_TIMEOUT_MS)
+    try:
+        async with database.AsyncSessionLocal() as session:
+            repo = MoodLogRepositoryV2(session)
+            user_id = await repo.resolve_user_id(args.username)
+            if user_id is None:
+                sys.exit(f"User not found: {args.username}")
+
+            with open(args.file, encoding="utf-8-sig", newline="") as stream:
+                async for progress in import_mood_logs(repo, user_id, stream, format, chunk_size=args.chunk_size, start_row=start_row or 0):
+                    with open(checkpoint, "w") as f:
+                        json.dump({"last_committed_row": progress.last_committed_row}, f)
+                    print(f"Committed through row {progress.last_committed_row}: {progress.imported} imported, {progress.skipped} skipped", flush=True)
+    finally:
+        await database.dispose_db()
+
+    for error in progress.errors:
+        print(f"Row {error['row']}: {error['error']}")
+    # Finished imports start from scratch next time
+    os.remove(checkpoint)
+    print(f"Imported {progress.imported} mood log(s) for {args.username}, skipped {progress.skipped}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m src.mindfuly.cli", description="Mindfuly maintenance tasks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    backfill = subparsers.add_parser("backfill-rollups", help="Rebuild the daily mood rollups from mood_logs")
+    backfill.add_argument("--user-id", type=int, default=None, help="Only rebuild this user (default: every user)")
+    backfill.set_defaults(handler=backfill_rollups)
+
+    weather = subparsers.add_parser("backfill-weather", help="Fill the structured weather columns from the weather text")
+    weather.add_argument("--batch-size", type=int, default=5000, help="Logs per transaction")
+    weather.set_defaults(handler=backfill_weather)
+
+    importer = subparsers.add_parser("import-logs", help="Import mood history from a CSV or NDJSON file")
+    importer.add_argument("username", help="User that receives the imported logs")
+    importer.add_argument("file", help="CSV with a header row, or NDJSON with one object per line")
+    importer.add_argument("--format", choices=IMPORT_FORMATS, default=None, help="Default: from the file extension")
+    importer.add_argument("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, help="Rows per transaction")
+    importer.add_argument("--resume-from", type=int, default=None, help="Skip rows up to and including this one (default: from the checkpoint file)")
+    importer.add_argument("--checkpoint", default=None, help="Checkpoint file (default: FILE.checkpoint)")
+    importer.set_defaults(handler=import_logs)
+
+    args = parser.parse_args(argv)
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
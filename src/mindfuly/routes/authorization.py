@@ -5,6 +5,7 @@ from pydantic import BaseModel
 
 from user_service_v2.models.user import get_user_repository_v2, UserRepositoryV2
 from src.mindfuly.auth.jwt_utils import create_access_token, verify_token, get_current_user
+from src.mindfuly.auth.passwords import password_pool, verify_user_password
 
 router = APIRouter(prefix="/authorization", tags=["Authorization"])
 
@@ -47,7 +48,7 @@ async def login(
         )
     
     # Verify password
-    if not await user_repo.verify_password(user, login_data.password):
+    if not await verify_user_password(user_repo, user, login_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -73,7 +74,7 @@ async def login_for_access_token(
     """
     user = await user_repo.get_by_name(form_data.username)
     
-    if not user or not await user_repo.verify_password(user, form_data.password):
+    if not user or not await verify_user_password(user_repo, user, form_data.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
@@ -109,4 +110,12 @@ async def refresh_token(current_user: str = Depends(get_current_user)):
         expires_delta=timedelta(hours=24)
     )
     
-    return {"access_token": access_token, "token_type": "bearer"}
\ No newline at end of file
+    return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.get("/hashing")
+async def get_password_hashing_stats():
+    """
+    Queue depth and latency of the password hashing pool
+    """
+    return {"password_hashing": password_pool.stats()}
@@ -0,0 +1,65 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.shared.database import get_pool_metrics
+from src.shared.events import event_bus
+from src.shared.identity import identity_cache
+from src.shared.metrics import CONTENT_TYPE, metrics
+from src.shared.models import weather_condition_ids
+from src.shared.stats_cache import stats_cache
+from src.mindfuly.auth.passwords import password_pool
+from src.mindfuly.routes.weather import weather_cache
+from src.mindfuly.routes.youtube import query_cache, quota_budget, search_cache
+
+router = APIRouter(tags=["Metrics"])
+
+# Caches reported by name, read only when /metrics is scraped
+CACHES = {
+    "weather": weather_cache,
+    "youtube_search": search_cache,
+    "youtube_query": query_cache,
+    "identity": identity_cache,
+    "weather_conditions": weather_condition_ids,
+}
+
+
+@metrics.collector
+def collect_caches():
+    caches = {name: cache.stats() for name, cache in CACHES.items()}
+    # The stats cache counts per query lookups itself, its backend also stores the version numbers
+    caches["stats"] = {**stats_cache.stats(), "size": stats_cache.backend.stats().get("size", 0)}
+
+    return [
+        ("mindfuly_cache_hits_total", "counter", "Cache lookups answered from the cache",
+         [({"cache": name}, stats["hits"]) for name, stats in caches.items()]),
+        ("mindfuly_cache_misses_total", "counter", "Cache lookups that had to load the value",
+         [({"cache": name}, stats["misses"]) for name, stats in caches.items()]),
+        ("mindfuly_cache_hit_ratio", "gauge", "Hits over lookups since the process started",
+         [({"cache": name}, stats["hit_ratio"]) for name, stats in caches.items()]),
+        ("mindfuly_cache_entries", "gauge", "Entries currently cached",
+         [({"cache": name}, stats["size"]) for name, stats in caches.items()]),
+    ]
+
+
+@metrics.collector
+def collect_pools():
+    pool = get_pool_metrics()
+    hashing = password_pool.stats()
+
+    return [
+        ("mindfuly_db_pool_checked_out", "gauge", "Database connections in use", [({}, pool["checked_out"])]),
+        ("mindfuly_db_pool_connects_total", "counter", "Database connections opened", [({}, pool["connects"])]),
+        ("mindfuly_db_pool_wait_seconds_total", "counter", "Time checkouts spent waiting for a free pooled connection, connecting excluded", [({}, pool["wait_seconds_total"])]),
+        ("mindfuly_password_hashing_pending", "gauge", "Password hashes queued or running", [({}, hashing["pending"])]),
+        ("mindfuly_password_hashing_rejected_total", "counter", "Password hashes refused because the queue was full", [({}, hashing["rejected"])]),
+        ("mindfuly_event_subscribers", "gauge", "Open pages subscribed to mood log events", [({}, event_bus.stats()["subscribers"])]),
+        ("mindfuly_youtube_quota_remaining", "gauge", "Local estimate of the YouTube quota units left in this worker's share for today", [({}, quota_budget.remaining())]),
+    ]
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics():
+    """
+    Every metric in the Prometheus text exposition format
+    """
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
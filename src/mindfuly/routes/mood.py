@@ -1,32 +1,54 @@
-from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, UploadFile
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
-from datetime import datetime, timedelta
-from typing import List, Optional
+from datetime import datetime, date, timedelta, timezone
+from typing import List, Literal, Optional
+import csv
+import io
+import json
 import random
 
 from src.shared.database import get_db
-from src.shared.models import MoodLog, MoodLogCreate, MoodLogResponse, get_mood_log_repository_v2, MoodLogRepositoryV2
-from user_service_v2.models.user import get_user_repository_v2, UserRepositoryV2
+from src.shared.dashboard import DASHBOARD_LIMIT, load_dashboard
+from src.shared.charts import CHART_DEFAULT_POINTS, CHART_ENCODING, encode_chart_series, load_chart_data
+from src.shared.insights import get_insights
+from src.shared.importer import IMPORT_CHUNK_SIZE, import_mood_logs, format_from_filename, validation_message
+from src.shared.stats_cache import stats_cache
+from src.shared.models import MoodLog, MoodLogCreate, MoodLogBulkEntry, MoodLogResponse, get_mood_log_repository_v2, MoodLogRepositoryV2, decode_cursor
 
 router = APIRouter(prefix="/mood", tags=["Mood"])
 
+# Largest batch accepted by /mood/logs/bulk, bigger imports should be split client side
+BULK_MAX_ROWS = 50000
+
+# Rows fetched per server-side cursor round trip and written per response chunk
+EXPORT_BATCH_SIZE = 1000
+EXPORT_COLUMNS = ["id", "created_at", "mood_value", "energy_level", "notes", "weather"]
+EXPORT_MEDIA_TYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Resolve the username through the identity cache, a warm cache leaves only the mood query itself
+async def require_user_id(username: str, mood_log_repo: MoodLogRepositoryV2) -> int:
+    user_id = await mood_log_repo.resolve_user_id(username)
+
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return user_id
+
 @router.post("/log", status_code=201)
 async def create_mood_log(
     mood_data: MoodLogCreate,
     response: Response,
-    user_repo: UserRepositoryV2 = Depends(get_user_repository_v2),
     mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)
 ):
     
-    user = await user_repo.get_by_name(mood_data.username)
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user_id = await require_user_id(mood_data.username, mood_log_repo)
 
     try:
         mood_log = await mood_log_repo.create_mood_log(
-            user_id=user.id,
+            user_id=user_id,
             mood_value=mood_data.mood_value,
             energy_level=mood_data.energy_level,
             notes=mood_data.notes,
@@ -42,21 +64,17 @@ async def create_mood_log(
 @router.put("/edit_log", status_code=200)
 async def edit_mood_log(
     mood_data: MoodLogCreate,
-    user_repo: UserRepositoryV2 = Depends(get_user_repository_v2),
     mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)
 ):
-    user = await user_repo.get_by_name(mood_data.username)
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user_id = await require_user_id(mood_data.username, mood_log_repo)
     
-    latest_log = await mood_log_repo.get_latest_mood_log(user.id)
+    latest_log = await mood_log_repo.get_latest_mood_log(user_id)
     if not latest_log:
         raise HTTPException(status_code=404, detail="No mood log found to edit")
     
     try:
         updated_log = await mood_log_repo.edit_latest_mood_log(
-            user_id=user.id,
+            user_id=user_id,
             mood_value=mood_data.mood_value,
             energy_level=mood_data.energy_level,
             notes=mood_data.notes
@@ -69,15 +87,11 @@ async def edit_mood_log(
 @router.get("/most_recent_log_date/{username}")
 async def get_most_recent_log_date(
     username: str,
-    user_repo: UserRepositoryV2 = Depends(get_user_repository_v2),
     mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2),
 ):
-    user = await user_repo.get_by_name(username)
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user_id = await require_user_id(username, mood_log_repo)
     
-    most_recent_date = await mood_log_repo.get_most_recent_log_date(user.id)
+    most_recent_date = await mood_log_repo.get_most_recent_log_date(user_id)
     if not most_recent_date:
         return {"most_recent_log_date": None}
     
@@ -87,110 +101,308 @@ async def get_most_recent_log_date(
 @router.get("/latest_log/{username}")
 async def get_latest_mood_log(
     username: str,
-    user_repo: UserRepositoryV2 = Depends(get_user_repository_v2),
     mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2),
 ):
-    user = await user_repo.get_by_name(username)
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user_id = await require_user_id(username, mood_log_repo)
     
-    latest_log = await mood_log_repo.get_latest_mood_log(user.id)
+    latest_log = await mood_log_repo.get_latest_mood_log(user_id)
     if not latest_log:
         return {"latest_mood_log": None}
     
     return {"latest_mood_log": MoodLogResponse.from_db_model(latest_log)}
     
+def parse_bulk_body(body: bytes, content_type: str) -> tuple[list, list[dict]]:
+    """
+    Split a bulk request into raw rows, either a JSON array (optionally under "mood_logs") or NDJSON.
+    Returns the rows and the errors of NDJSON lines that are not valid JSON.
+    """
+    if "ndjson" in content_type or "jsonlines" in content_type:
+        rows, errors = [], []
+        for index, line in enumerate(body.splitlines()):
+            if not line.strip():
+                continue
+            try:
+                rows.append((index, json.loads(line)))
+            except ValueError:
+                errors.append({"row": index, "error": "Invalid JSON"})
+        return rows, errors
+
+    try:
+        data = json.loads(body)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+
+    if isinstance(data, dict):
+        data = data.get("mood_logs")
+    if not isinstance(data, list):
+        raise HTTPException(status_code=400, detail="Expected a list of mood logs")
+
+    return list(enumerate(data)), []
+
+# Create many mood logs in one transaction, rows that fail validation are reported and skipped
+@router.post("/logs/bulk", status_code=201)
+async def bulk_create_mood_logs(
+    request: Request,
+    mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)
+):
+    raw_rows, errors = parse_bulk_body(await request.body(), request.headers.get("content-type", ""))
+
+    if len(raw_rows) > BULK_MAX_ROWS:
+        raise HTTPException(status_code=413, detail=f"At most {BULK_MAX_ROWS} mood logs per request")
+
+    entries = []
+    for index, raw in raw_rows:
+        try:
+            entries.append((index, MoodLogBulkEntry.model_validate(raw)))
+        except ValidationError as e:
+            errors.append({"row": index, "error": validation_message(e)})
+
+    user_ids = await mood_log_repo.resolve_user_ids({entry.username for _, entry in entries})
+
+    rows = []
+    for index, entry in entries:
+        user_id = user_ids.get(entry.username)
+        if user_id is None:
+            errors.append({"row": index, "error": "User not found"})
+            continue
+
+        created_at = entry.created_at
+        if created_at is not None and created_at.tzinfo is not None:
+            # Timestamps are stored as naive UTC
+            created_at = created_at.astimezone(timezone.utc).replace(tzinfo=None)
+
+        rows.append({
+            "user_id": user_id,
+            "mood_value": entry.mood_value,
+            "energy_level": entry.energy_level,
+            "notes": entry.notes,
+            "weather": entry.weather,
+            "created_at": created_at
+        })
+
+    try:
+        inserted = await mood_log_repo.bulk_create_mood_logs(rows)
+    except IntegrityError:
+        raise HTTPException(status_code=409, detail="Could not insert mood logs")
+
+    return {"inserted": inserted, "errors": sorted(errors, key=lambda error: error["row"])}
+
+def isoformat(value: Optional[datetime]) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+async def export_chunks(mood_log_repo: MoodLogRepositoryV2, user_id: int, format: str, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Serialize a user's mood history one cursor batch at a time, so memory does not grow with the history
+    """
+    if format == "csv":
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(EXPORT_COLUMNS)
+        yield buffer.getvalue()
+
+    async for rows in mood_log_repo.stream_mood_logs(user_id, batch_size=batch_size):
+        if format == "csv":
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            writer.writerows((row.id, isoformat(row.created_at), row.mood_value, row.energy_level, row.notes, row.weather) for row in rows)
+            yield buffer.getvalue()
+        else:
+            yield "".join(
+                json.dumps({
+                    "id": row.id,
+                    "created_at": isoformat(row.created_at),
+                    "mood_value": row.mood_value,
+                    "energy_level": row.energy_level,
+                    "notes": row.notes,
+                    "weather": row.weather
+                }) + "\n"
+                for row in rows
+            )
+
+# Download a user's full mood history, streamed oldest first
+@router.get("/export/{username}")
+async def export_mood_logs(
+    username: str,
+    format: Literal["ndjson", "csv"] = "ndjson",
+    mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)
+):
+    user_id = await require_user_id(username, mood_log_repo)
+
+    return StreamingResponse(
+        export_chunks(mood_log_repo, user_id, format, batch_size=EXPORT_BATCH_SIZE),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{username}-mood-logs.{format}"'}
+    )
+
+# Import a CSV or NDJSON history file, streaming one progress line per committed chunk.
+# After a failure, upload the same file again with start_row set to the last reported last_committed_row.
+@router.post("/import/{username}")
+async def import_mood_history(
+    username: str,
+    file: UploadFile,
+    format: Optional[Literal["csv", "ndjson"]] = None,
+    chunk_size: int = IMPORT_CHUNK_SIZE,
+    start_row: int = 0,
+    mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)
+):
+    user_id = await require_user_id(username, mood_log_repo)
+
+    format = format or format_from_filename(file.filename)
+    if format is None:
+        raise HTTPException(status_code=400, detail="Could not tell the file format, pass format=csv or format=ndjson")
+    if chunk_size < 1:
+        raise HTTPException(status_code=400, detail="chunk_size must be positive")
+
+    async def progress_lines():
+        # The upload is spooled to disk by Starlette, wrapping it keeps parsing line by line
+        stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+        progress = None
+
+        try:
+            async for progress in import_mood_logs(mood_log_repo, user_id, stream, format, chunk_size=chunk_size, start_row=start_row):
+                yield json.dumps({"done": False, **progress.to_dict()}) + "\n"
+        except (IntegrityError, UnicodeDecodeError, csv.Error) as e:
+            last_committed_row = progress.last_committed_row if progress is not None else start_row
+            yield json.dumps({"done": False, "error": str(e).splitlines()[0], "last_committed_row": last_committed_row}) + "\n"
+            return
+        finally:
+            stream.detach()
+
+        yield json.dumps({"done": True, **progress.to_dict()}) + "\n"
+
+    return StreamingResponse(progress_lines(), media_type="application/x-ndjson")
+
+# Get one page of mood logs, pass the returned next_cursor as 'before' to fetch older entries
 @router.get("/logs/{username}")
 async def get_mood_logs(
     username: str,
     limit: int = 20,
-    user_repo: UserRepositoryV2 = Depends(get_user_repository_v2),
+    before: Optional[str] = None,
     mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2),
 ):
-    user = await user_repo.get_by_name(username)
+    user_id = await require_user_id(username, mood_log_repo)
 
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    try:
+        cursor = decode_cursor(before) if before else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
     
-    mood_logs = await mood_log_repo.get_mood_logs(user.id, limit=limit)
-    return {"mood_logs": [MoodLogResponse.from_db_model(log) for log in mood_logs]}
+    mood_logs, next_cursor = await mood_log_repo.get_mood_log_page(user_id, limit=limit, before=cursor)
+    return {
+        "mood_logs": [MoodLogResponse.from_db_model(log) for log in mood_logs],
+        "next_cursor": next_cursor
+    }
+
+# Hit and miss counters of the per-user stats cache
+@router.get("/stats_cache")
+async def get_stats_cache_stats():
+    return {"stats_cache": stats_cache.stats()}
 
 # Get average mood, energy level, and total logs for a user
 @router.get("/stats/{username}")
 async def get_mood_stats(
     username: str,
-    user_repo: UserRepositoryV2 = Depends(get_user_repository_v2),
     mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)
 ):
-    user = await user_repo.get_by_name(username)
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user_id = await require_user_id(username, mood_log_repo)
     
-    stats = await mood_log_repo.get_mood_stats(user.id)
+    stats = await mood_log_repo.get_mood_stats(user_id)
     return {"mood_stats": stats}
 
 # Get average mood, energy level, and total logs for all days of the week
 @router.get("/weekly_stats/{username}")
 async def get_weekly_mood_stats(
     username: str,
-    user_repo: UserRepositoryV2 = Depends(get_user_repository_v2),
     mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)
 ):
-    user = await user_repo.get_by_name(username)
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user_id = await require_user_id(username, mood_log_repo)
     
     # TODO: Implement get_weekly_mood_stats in MoodLogRepositoryV2
-    weekly_stats = await mood_log_repo.get_weekly_mood_stats(user.id)
+    weekly_stats = await mood_log_repo.get_weekly_mood_stats(user_id)
     return {"weekly_mood_stats": weekly_stats}
 
 # Get average mood, energy level, and total logs for each weather condition
 @router.get("/weather_stats/{username}")
 async def get_weather_mood_stats(
     username: str,
-    user_repo: UserRepositoryV2 = Depends(get_user_repository_v2),
     mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)
 ):
-    user = await user_repo.get_by_name(username)
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user_id = await require_user_id(username, mood_log_repo)
     
-    weather_stats = await mood_log_repo.get_weather_mood_stats(user.id)
+    weather_stats = await mood_log_repo.get_weather_mood_stats(user_id)
     return {"weather_mood_stats": weather_stats}
 
-# Get running means for mood and energy levels for every day
+# Get running means for mood and energy levels per day, week or month
 @router.get("/running_means/{username}")
 async def get_running_means(
     username: str,
     limit: int = 20,
-    user_repo: UserRepositoryV2 = Depends(get_user_repository_v2),
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    resolution: Literal["day", "week", "month"] = "day",
     mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)
 ):
-    user = await user_repo.get_by_name(username)
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user_id = await require_user_id(username, mood_log_repo)
     
-    running_means = await mood_log_repo.get_running_means(user.id, limit=limit)
+    running_means = await mood_log_repo.get_running_means(user_id, limit=limit, start=start, end=end, resolution=resolution)
     return {"running_means": running_means}
 
+# Everything the dashboard pages show, stats, weekday and weather breakdowns, running means and recent logs
+@router.get("/dashboard/{username}")
+async def get_dashboard(
+    username: str,
+    limit: int = DASHBOARD_LIMIT,
+    mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)
+):
+    user_id = await require_user_id(username, mood_log_repo)
+
+    dashboard = await load_dashboard(mood_log_repo, user_id, limit=limit)
+    latest_log = dashboard["latest_mood_log"]
+    dashboard["latest_mood_log"] = MoodLogResponse.from_db_model(latest_log) if latest_log else None
+    dashboard["mood_logs"] = [MoodLogResponse.from_db_model(log) for log in dashboard["mood_logs"]]
+    return {"dashboard": dashboard}
+
+# Downsampled chart series for the analytics page, a narrower start/end range returns finer detail
+@router.get("/chart/{username}")
+async def get_chart_data(
+    username: str,
+    start: Optional[date] = None,
+    end: Optional[date] = None,
+    points: int = CHART_DEFAULT_POINTS,
+    encoding: Literal["json", "binary"] = "json",
+    mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)
+):
+    user_id = await require_user_id(username, mood_log_repo)
+
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    chart_data = await load_chart_data(mood_log_repo, user_id, start=start, end=end, points=points)
+    # binary packs each series into base64 typed arrays, see charts.encode_series for the layout
+    if encoding == "binary":
+        chart_data["series"] = encode_chart_series(chart_data["series"])
+        chart_data["encoding"] = CHART_ENCODING
+    return chart_data
+
+# Tips derived from a user's history, recomputed only after the user logs again
+@router.get("/insights/{username}")
+async def get_mood_insights(
+    username: str,
+    mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)
+):
+    user_id = await require_user_id(username, mood_log_repo)
+
+    return await get_insights(mood_log_repo, user_id)
+
 # Clear all mood logs for a user
 @router.delete("/clear_logs/{username}", status_code=204)
 async def clear_mood_logs(
     username: str,
-    user_repo: UserRepositoryV2 = Depends(get_user_repository_v2),
     mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)
 ):
-    user = await user_repo.get_by_name(username)
-
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+    user_id = await require_user_id(username, mood_log_repo)
     
-    await mood_log_repo.clear_mood_logs(user.id)
+    await mood_log_repo.clear_mood_logs(user_id)
     return Response(status_code=204)
 
 
@@ -199,26 +411,24 @@ async def clear_mood_logs(
 async def test_mood_logs(
     username: str,
     response: Response,
-    user_repo: UserRepositoryV2 = Depends(get_user_repository_v2),
     mood_log_repo: MoodLogRepositoryV2 = Depends(get_mood_log_repository_v2)
 ):
     
-    user = await user_repo.get_by_name(username)
+    user_id = await require_user_id(username, mood_log_repo)
     randWeather = ['light rain', 'heavy rain', 'partly cloudy', 'sunny', 'overcast', 'rain of spiders', 'purple rain', 'chocolate rain', 'hurricane', 'tornado']
 
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
-    
     try:
-        for x in range(100):
-            await mood_log_repo.create_log_on_date(
-                user_id=user.id,
-                mood_value=random.randint(1,5),
-                energy_level=random.randint(1,5),
-                date=datetime.now() - timedelta(days=x),
-                notes= "Test log #" + str(x),
-                weather=str(x) + "°C – " + random.choice(randWeather)
-            )
+        await mood_log_repo.bulk_create_mood_logs([
+            {
+                "user_id": user_id,
+                "mood_value": random.randint(1,5),
+                "energy_level": random.randint(1,5),
+                "created_at": datetime.now() - timedelta(days=x),
+                "notes": "Test log #" + str(x),
+                "weather": str(x) + "°C – " + random.choice(randWeather)
+            }
+            for x in range(100)
+        ])
         
         return {"Job Done!", ":)"}
     except (IntegrityError, AttributeError):
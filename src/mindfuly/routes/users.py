@@ -12,6 +12,9 @@ from user_service_v2.models.user import (
 
 from sqlalchemy.exc import IntegrityError
 
+from src.shared.identity import forget_username
+from src.mindfuly.auth.passwords import create_user_hashed
+
 router = APIRouter(prefix="/users", tags=["Users"])
 
 @router.get("/test")
@@ -22,7 +25,7 @@ def test():
 async def create_user(user: UserSchema, response: Response, user_repo: UserRepositoryV2 = Depends(get_user_repository_v2)):
     try:
         tier = getattr(user, "tier", 1)
-        new_user = await user_repo.create(user.name, user.email, user.hashed_password, tier=tier)
+        new_user = await create_user_hashed(user_repo, user.name, user.email, user.hashed_password, tier=tier)
         if not new_user:
             response.status_code = 409
             return {"detail": "User already exists"}
@@ -52,5 +55,6 @@ async def delete_user(username: str, response: Response, user_repo: UserReposito
         response.status_code = 404
         return {"detail": "User not found"}
     
-    result = await user_repo.delete(user.id)    
+    result = await user_repo.delete(user.id)
+    forget_username(username)
     return {"detail": "User deleted successfully"}
\ No newline at end of file
@@ -1,34 +1,56 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 import httpx, os
 
+from src.shared.http import get_http_client
+from src.shared.cache import TTLCache
+
 router = APIRouter(prefix="/weather", tags=["Weather"])
 
 WEATHER_API_KEY = os.getenv("WEATHER_API_KEY")
+# Overridable so load tests can point the app at a local stand-in
+WEATHER_URL = os.getenv("WEATHER_URL", "https://api.openweathermap.org/data/2.5/weather")
 
-@router.get("")
-async def get_weather(lat: float, lon: float):
+# Users within the same grid cell (0.01 degrees is roughly 1 km) share one cached answer
+WEATHER_CACHE_GRID_DEGREES = float(os.getenv("WEATHER_CACHE_GRID_DEGREES", 0.01))
+WEATHER_CACHE_TTL = float(os.getenv("WEATHER_CACHE_TTL", 600))
+
+weather_cache = TTLCache(maxsize=int(os.getenv("WEATHER_CACHE_SIZE", 4096)), ttl=WEATHER_CACHE_TTL)
+
+
+def weather_cell(lat: float, lon: float, grid: float = WEATHER_CACHE_GRID_DEGREES) -> tuple[float, float]:
+    """
+    Snap coordinates to the centre of their cache grid cell
+    """
+    return round(round(lat / grid) * grid, 6), round(round(lon / grid) * grid, 6)
 
-    print("API KEY:", WEATHER_API_KEY)
-    print("LAT:", lat)
-    print("LON:", lon)
 
-    
+@router.get("")
+async def get_weather(lat: float, lon: float, client: httpx.AsyncClient = Depends(get_http_client)):
     if not WEATHER_API_KEY:
         raise HTTPException(status_code=500, detail="Weather API Key not configured")
-    
-    url = "https://api.openweathermap.org/data/2.5/weather"
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, params={
-            "lat": lat,
-            "lon": lon,
+    cell_lat, cell_lon = weather_cell(lat, lon)
+
+    async def fetch_weather():
+        resp = await client.get(WEATHER_URL, params={
+            "lat": cell_lat,
+            "lon": cell_lon,
             "appid": WEATHER_API_KEY,
             "units": "metric"
-        })
+        }, extensions={"upstream": "weather"})
+
+        if resp.status_code != 200:
+            raise HTTPException(status_code=resp.status_code, detail="Weather API error")
+
+        return resp.json()
+
+    # Errors are raised out of the loader, so only successful answers are cached
+    return await weather_cache.get_or_load((cell_lat, cell_lon), fetch_weather)
 
-    print("WEATHER RESPONSE:", resp.status_code, resp.text)
 
-    if resp.status_code != 200:
-        raise HTTPException(status_code=resp.status_code, detail="Weather API error")
-    
-    return resp.json()
\ No newline at end of file
+@router.get("/cache")
+async def get_weather_cache_stats():
+    """
+    Hit/miss counters of the weather cache
+    """
+    return {"weather_cache": weather_cache.stats()}
@@ -1,17 +1,53 @@
 """
 YouTube API integration for mood-based music playback
+
+The search caches and the quota budget are per process. Each uvicorn worker gets an equal share of
+YOUTUBE_DAILY_QUOTA and YOUTUBE_QUOTA_RESERVE, split by WEB_CONCURRENCY (uvicorn's default worker count),
+so all workers together stay within the daily quota. Each worker prefetches and caches on its own.
 """
 from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Optional
+from datetime import datetime, timezone
+import asyncio
 import httpx
+import logging
 import os
 import random
+import time
+
+from src.shared.http import get_http_client
+from src.shared.cache import TTLCache
 
 router = APIRouter(prefix="/youtube", tags=["youtube"])
 
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "")
-YOUTUBE_SEARCH_URL = "https://www.googleapis.com/youtube/v3/search"
+# Overridable so load tests can point the app at a local stand-in
+YOUTUBE_SEARCH_URL = os.getenv("YOUTUBE_SEARCH_URL", "https://www.googleapis.com/youtube/v3/search")
+
+# A search.list call costs 100 units of the daily YouTube Data API quota
+SEARCH_QUOTA_COST = 100
+# Results are fetched once per query at the API maximum and shuffled locally per request
+SEARCH_PAGE_SIZE = 50
+YOUTUBE_CACHE_TTL = float(os.getenv("YOUTUBE_CACHE_TTL", 24 * 3600))
+YOUTUBE_REFRESH_AHEAD = float(os.getenv("YOUTUBE_REFRESH_AHEAD", 2 * 3600))
+YOUTUBE_PREFETCH_INTERVAL = float(os.getenv("YOUTUBE_PREFETCH_INTERVAL", 600))
+YOUTUBE_WORKERS = max(int(os.getenv("WEB_CONCURRENCY", 1)), 1)
+
+
+def worker_share(units: int, workers: int = YOUTUBE_WORKERS) -> int:
+    """
+    This process's part of a quota the workers split evenly, rounded down so their total never exceeds it
+    """
+    return units // workers
+
+
+# Per worker, see the module docstring
+YOUTUBE_DAILY_QUOTA = worker_share(int(os.getenv("YOUTUBE_DAILY_QUOTA", 10000)))
+# Units the prefetcher leaves untouched so on-demand misses can still be served
+YOUTUBE_QUOTA_RESERVE = worker_share(int(os.getenv("YOUTUBE_QUOTA_RESERVE", 2000)))
+
+logger = logging.getLogger('uvicorn.error')
 
 
 class VideoInfo(BaseModel):
@@ -86,10 +122,158 @@ MOOD_QUERIES = {
 }
 
 
+class QuotaBudget():
+    """
+    Local estimate of this worker's share of the daily YouTube quota, resets at midnight UTC
+    """
+
+    def __init__(self, daily_units: int = YOUTUBE_DAILY_QUOTA):
+        self.daily_units = daily_units
+        self.day = None
+        self.spent = 0
+
+    def _roll_over(self):
+        today = datetime.now(timezone.utc).date()
+        if self.day != today:
+            self.day = today
+            self.spent = 0
+
+    def remaining(self) -> int:
+        self._roll_over()
+        return max(self.daily_units - self.spent, 0)
+
+    def try_spend(self, units: int, reserve: int = 0) -> bool:
+        if self.remaining() - units < reserve:
+            return False
+        self.spent += units
+        return True
+
+    def exhaust(self):
+        # Upstream reported quotaExceeded, trust it over the local estimate until tomorrow
+        self._roll_over()
+        self.spent = self.daily_units
+
+
+class CachedSearch():
+    """
+    Videos of one search query and when they were fetched
+    """
+
+    def __init__(self, videos: List[VideoInfo], fetched_at: float):
+        self.videos = videos
+        self.fetched_at = fetched_at
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+quota_budget = QuotaBudget()
+# Mood queries only. Entries never expire on their own: stale results are still served while the prefetcher refreshes them
+search_cache = TTLCache(maxsize=int(os.getenv("YOUTUBE_CACHE_SIZE", 512)), ttl=None)
+# Free-text searches and unknown moods, kept apart so arbitrary queries cannot evict the mood entries
+query_cache = TTLCache(maxsize=int(os.getenv("YOUTUBE_QUERY_CACHE_SIZE", 512)), ttl=YOUTUBE_CACHE_TTL)
+
+
+async def fetch_videos(client: httpx.AsyncClient, query: str) -> List[VideoInfo]:
+    """
+    Run one YouTube search (100 quota units) and return its videos
+    """
+    response = await client.get(
+        YOUTUBE_SEARCH_URL,
+        params={
+            "part": "snippet",
+            "q": query,
+            "type": "video",
+            "videoCategoryId": "10",  # Music category
+            "maxResults": SEARCH_PAGE_SIZE,
+            "key": YOUTUBE_API_KEY,
+            "safeSearch": "moderate"
+        },
+        extensions={"upstream": "youtube"}
+    )
+
+    if response.status_code != 200:
+        error_data = response.json()
+        errors = error_data.get('error', {}).get('errors', [])
+        if any(error.get('reason') == 'quotaExceeded' for error in errors):
+            quota_budget.exhaust()
+        raise HTTPException(
+            status_code=response.status_code,
+            detail=f"YouTube API error: {error_data.get('error', {}).get('message', 'Unknown error')}"
+        )
+
+    data = response.json()
+
+    videos = []
+    for item in data.get("items", []):
+        videos.append(VideoInfo(
+            video_id=item["id"]["videoId"],
+            title=item["snippet"]["title"],
+            channel=item["snippet"]["channelTitle"],
+            thumbnail=item["snippet"]["thumbnails"]["medium"]["url"]
+        ))
+
+    return videos
+
+
+async def load_search(client: httpx.AsyncClient, query: str, cache: TTLCache = search_cache) -> CachedSearch:
+    """
+    Cached results for a query, fetching them once (single flight) on a cold miss
+    """
+    async def fetch():
+        if not quota_budget.try_spend(SEARCH_QUOTA_COST):
+            raise HTTPException(status_code=503, detail="YouTube quota exhausted, try again later")
+        return CachedSearch(await fetch_videos(client, query), time.time())
+
+    return await cache.get_or_load(query, fetch)
+
+
+async def prefetch_mood_searches(client: httpx.AsyncClient) -> int:
+    """
+    Fetch every mood query that is missing or about to go stale, within the daily budget.
+    Returns the number of queries refreshed.
+    """
+    refreshed = 0
+
+    for queries in MOOD_QUERIES.values():
+        for query in queries:
+            cached = search_cache.peek(query)
+            if cached is not None and cached.age() < YOUTUBE_CACHE_TTL - YOUTUBE_REFRESH_AHEAD:
+                continue
+            if not quota_budget.try_spend(SEARCH_QUOTA_COST, reserve=YOUTUBE_QUOTA_RESERVE):
+                return refreshed
+
+            try:
+                search_cache.set(query, CachedSearch(await fetch_videos(client, query), time.time()))
+                refreshed += 1
+            except (HTTPException, httpx.RequestError) as e:
+                logger.warning(f"YouTube prefetch failed for '{query}': {e}")
+
+    return refreshed
+
+
+async def run_prefetcher(client: httpx.AsyncClient):
+    """
+    Background task started by the application lifespan, keeps the mood cache warm
+    """
+    while True:
+        try:
+            await prefetch_mood_searches(client)
+        except Exception as e:
+            logger.warning(f"YouTube prefetcher error: {e}")
+        await asyncio.sleep(YOUTUBE_PREFETCH_INTERVAL)
+
+
+def pick_videos(videos: List[VideoInfo], max_results: int) -> List[VideoInfo]:
+    # Random sample gives each request its own shuffled playlist without touching the cached list
+    return random.sample(videos, min(max_results, len(videos)))
+
+
 @router.get("/search/by-mood/{mood}", response_model=SearchResults)
-async def search_by_mood(mood: str, max_results: int = 10):
+async def search_by_mood(mood: str, max_results: int = 10, client: httpx.AsyncClient = Depends(get_http_client)):
     """
-    Search for music videos based on mood - randomly selects from multiple query options
+    Search for music videos based on mood - randomly selects from multiple query options,
+    served from the prefetched cache whenever possible
     """
     if not YOUTUBE_API_KEY:
         raise HTTPException(
@@ -97,65 +281,28 @@ async def search_by_mood(mood: str, max_results: int = 10):
             detail="YouTube API key not configured"
         )
     
-    # Get the search queries for this mood
+    # Get the search queries for this mood, unknown moods are searched like free text
     mood_queries = MOOD_QUERIES.get(mood.lower())
-    
-    if mood_queries:
-        # Randomly select one of the query options for variety
-        query = random.choice(mood_queries)
-    else:
-        # Fallback for unknown moods
-        query = f"{mood} music playlist"
+    cache = search_cache if mood_queries else query_cache
+    mood_queries = mood_queries or [f"{mood} music playlist"]
+
+    # Prefer queries that are already cached, only go upstream when none of them are
+    cached_queries = [query for query in mood_queries if cache.peek(query) is not None]
+    query = random.choice(cached_queries or mood_queries)
     
     try:
-        async with httpx.AsyncClient() as client:
-            # Request more results to give us room to shuffle
-            response = await client.get(
-                YOUTUBE_SEARCH_URL,
-                params={
-                    "part": "snippet",
-                    "q": query,
-                    "type": "video",
-                    "videoCategoryId": "10",  # Music category
-                    "maxResults": min(max_results * 2, 50),  # Get 2x results for better variety
-                    "key": YOUTUBE_API_KEY,
-                    "safeSearch": "moderate"
-                }
-            )
-            
-            if response.status_code != 200:
-                error_data = response.json()
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"YouTube API error: {error_data.get('error', {}).get('message', 'Unknown error')}"
-                )
-            
-            data = response.json()
-            
-            videos = []
-            for item in data.get("items", []):
-                videos.append(VideoInfo(
-                    video_id=item["id"]["videoId"],
-                    title=item["snippet"]["title"],
-                    channel=item["snippet"]["channelTitle"],
-                    thumbnail=item["snippet"]["thumbnails"]["medium"]["url"]
-                ))
-            
-            # Shuffle the videos for random playback order
-            random.shuffle(videos)
-            
-            # Return only the requested number of videos
-            return SearchResults(videos=videos[:max_results])
-    
+        cached = await load_search(client, query, cache)
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to connect to YouTube API: {str(e)}"
         )
 
+    return SearchResults(videos=pick_videos(cached.videos, max_results))
+
 
 @router.get("/search", response_model=SearchResults)
-async def search_videos(query: str, max_results: int = 10):
+async def search_videos(query: str, max_results: int = 10, client: httpx.AsyncClient = Depends(get_http_client)):
     """
     Search for music videos by query - results are randomized
     """
@@ -166,49 +313,27 @@ async def search_videos(query: str, max_results: int = 10):
         )
     
     try:
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                YOUTUBE_SEARCH_URL,
-                params={
-                    "part": "snippet",
-                    "q": f"{query} music",
-                    "type": "video",
-                    "videoCategoryId": "10",  # Music category
-                    "maxResults": min(max_results * 2, 50),  # Get more for variety
-                    "key": YOUTUBE_API_KEY,
-                    "safeSearch": "moderate"
-                }
-            )
-            
-            if response.status_code != 200:
-                error_data = response.json()
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"YouTube API error: {error_data.get('error', {}).get('message', 'Unknown error')}"
-                )
-            
-            data = response.json()
-            
-            videos = []
-            for item in data.get("items", []):
-                videos.append(VideoInfo(
-                    video_id=item["id"]["videoId"],
-                    title=item["snippet"]["title"],
-                    channel=item["snippet"]["channelTitle"],
-                    thumbnail=item["snippet"]["thumbnails"]["medium"]["url"]
-                ))
-            
-            # Shuffle for random playback
-            random.shuffle(videos)
-            
-            return SearchResults(videos=videos[:max_results])
-    
+        cached = await load_search(client, f"{query} music", query_cache)
     except httpx.RequestError as e:
         raise HTTPException(
             status_code=500,
             detail=f"Failed to connect to YouTube API: {str(e)}"
         )
 
+    return SearchResults(videos=pick_videos(cached.videos, max_results))
+
+
+@router.get("/cache")
+async def get_search_cache_stats():
+    """
+    Search cache counters and the remaining local quota estimate
+    """
+    return {
+        "search_cache": search_cache.stats(),
+        "query_cache": query_cache.stats(),
+        "quota_remaining": quota_budget.remaining()
+    }
+
 
 @router.get("/moods")
 async def get_available_moods():
@@ -0,0 +1,215 @@
+import array
+import base64
+import sys
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Optional, Sequence
+
+from src.shared.models import MoodLogRepositoryV2
+
+# Roughly one point per two pixels of the analytics cards, clients with a wider viewport can ask for more
+CHART_DEFAULT_POINTS = 400
+CHART_MAX_POINTS = 5000
+# LTTB always keeps the first and last point and picks one per bucket in between
+CHART_MIN_POINTS = 3
+
+Point = tuple[int, float]
+
+CHART_ENCODING = "typed-arrays-v1"
+# JavaScript typed array name -> array module typecode of the same width
+TYPED_ARRAY_CODES = {"Int8": "b", "Int16": "h", "Uint8": "B", "Uint16": "H", "Uint32": "I"}
+# Narrowest unsigned type each delta range fits, picked per series
+DELTA_TYPES = ((0xFF, "Uint8"), (0xFFFF, "Uint16"), (0xFFFFFFFF, "Uint32"))
+DAY_MS = 86_400_000
+
+
+@dataclass(frozen=True)
+class SeriesEncoding():
+    """
+    How one series is packed: x as deltas in x_unit_ms steps, y as integers of y_scale per unit
+    """
+    x_unit_ms: int
+    y_type: str
+    y_scale: int = 1
+
+
+# Logs are placed to the second, moods and energies fit a byte; running means are daily with two decimals
+SERIES_ENCODINGS = {
+    "mood_logs": SeriesEncoding(x_unit_ms=1000, y_type="Int8"),
+    "energy_logs": SeriesEncoding(x_unit_ms=1000, y_type="Int8"),
+    "mood_running_mean": SeriesEncoding(x_unit_ms=DAY_MS, y_type="Int16", y_scale=100),
+    "energy_running_mean": SeriesEncoding(x_unit_ms=DAY_MS, y_type="Int16", y_scale=100),
+}
+
+
+def epoch_ms(value: datetime | date) -> int:
+    """
+    Milliseconds since the epoch, the x values of an ECharts time axis. Naive values are UTC.
+    """
+    if not isinstance(value, datetime):
+        value = datetime.combine(value, time.min)
+    return int(value.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def lttb(points: Sequence[Point], threshold: int) -> list[Point]:
+    """
+    Largest-Triangle-Three-Buckets: keep threshold points of a line series, picking from each bucket
+    the point that forms the largest triangle with the previous pick and the next bucket's average.
+    Peaks and dips survive, which plain striding or averaging would flatten.
+    """
+    if threshold >= len(points) or threshold < CHART_MIN_POINTS:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    previous = 0
+
+    for bucket in range(threshold - 2):
+        next_start = int((bucket + 1) * bucket_size) + 1
+        next_end = min(int((bucket + 2) * bucket_size) + 1, len(points))
+        next_points = points[next_start:next_end]
+        average_x = sum(x for x, _ in next_points) / len(next_points)
+        average_y = sum(y for _, y in next_points) / len(next_points)
+
+        previous_x, previous_y = points[previous]
+        largest_area = -1.0
+        for index in range(int(bucket * bucket_size) + 1, next_start):
+            x, y = points[index]
+            # Twice the triangle area, only the comparison matters
+            area = abs((previous_x - average_x) * (y - previous_y) - (previous_x - x) * (average_y - previous_y))
+            if area > largest_area:
+                largest_area = area
+                picked = index
+
+        sampled.append(points[picked])
+        previous = picked
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def minmax_downsample(points: Sequence[Point], threshold: int) -> list[Point]:
+    """
+    Keep the lowest and highest point of each of threshold / 2 equal-sized buckets, in time order.
+    Suits scatter series, where every extreme value should stay visible.
+    """
+    if threshold >= len(points):
+        return list(points)
+
+    buckets = max(threshold // 2, 1)
+    bucket_size = len(points) / buckets
+    sampled = []
+
+    for bucket in range(buckets):
+        window = points[int(bucket * bucket_size):int((bucket + 1) * bucket_size)]
+        if not window:
+            continue
+        lowest = min(range(len(window)), key=lambda index: window[index][1])
+        highest = max(range(len(window)), key=lambda index: window[index][1])
+        for index in sorted({lowest, highest}):
+            sampled.append(window[index])
+
+    return sampled
+
+
+def typed_array(type_name: str, values: Sequence[int]) -> str:
+    packed = array.array(TYPED_ARRAY_CODES[type_name], values)
+    # Browsers lay typed arrays out little-endian
+    if sys.byteorder == "big":
+        packed.byteswap()
+    return base64.b64encode(packed.tobytes()).decode("ascii")
+
+
+def encode_series(points: Sequence[Point], encoding: SeriesEncoding) -> dict:
+    """
+    Pack a time-ordered series into base64 typed arrays: x as deltas from the previous point
+    (the first from base) in the narrowest type they fit, y scaled to integers.
+    Daily points and logs a few hours apart cost 3 bytes a point, 4 once in base64.
+    """
+    xs = [x // encoding.x_unit_ms for x, _ in points]
+    base = xs[0] if xs else 0
+    deltas = [x - previous for previous, x in zip([base, *xs], xs)]
+    largest = max(deltas, default=0)
+    x_type = next((type_name for limit, type_name in DELTA_TYPES if largest <= limit), None)
+    if x_type is None:
+        raise ValueError("Points are too far apart to encode")
+
+    return {
+        "length": len(points),
+        "base": base,
+        "unit": encoding.x_unit_ms,
+        "x": typed_array(x_type, deltas),
+        "xType": x_type,
+        "y": typed_array(encoding.y_type, [round(y * encoding.y_scale) for _, y in points]),
+        "yType": encoding.y_type,
+        "scale": encoding.y_scale,
+    }
+
+
+def encode_chart_series(series: dict[str, Sequence[Point]]) -> dict[str, dict]:
+    return {key: encode_series(points, SERIES_ENCODINGS[key]) for key, points in series.items()}
+
+
+def decode_series(encoded: dict) -> list[Point]:
+    """
+    Inverse of encode_series, what the browser does before handing the points to ECharts
+    """
+    def unpack(type_name: str, data: str) -> array.array:
+        values = array.array(TYPED_ARRAY_CODES[type_name], base64.b64decode(data))
+        if sys.byteorder == "big":
+            values.byteswap()
+        return values
+
+    points = []
+    x = encoded["base"]
+    for delta, y in zip(unpack(encoded["xType"], encoded["x"]), unpack(encoded["yType"], encoded["y"])):
+        x += delta
+        points.append((x * encoded["unit"], y / encoded["scale"] if encoded["scale"] != 1 else y))
+    return points
+
+
+async def load_chart_data(repo: MoodLogRepositoryV2,
+                          user_id: int,
+                          start: Optional[date] = None,
+                          end: Optional[date] = None,
+                          points: int = CHART_DEFAULT_POINTS) -> dict:
+    """
+    The analytics chart series between start and end (inclusive, default: the whole history),
+    each downsampled to at most points points: min/max for the per-log scatter, LTTB for the running means.
+    A zoomed-in chart asks again with a narrower range and gets finer detail for the same point budget.
+    """
+    points = min(max(points, CHART_MIN_POINTS), CHART_MAX_POINTS)
+    log_start = datetime.combine(start, time.min) if start else None
+    log_end = datetime.combine(end + timedelta(days=1), time.min) if end else None
+
+    mood_logs = []
+    energy_logs = []
+    newest_log_at = None
+    async for rows in repo.stream_mood_logs(user_id, start=log_start, end=log_end):
+        for row in rows:
+            if row.created_at is None:
+                continue
+            newest_log_at = row.created_at
+            timestamp = epoch_ms(row.created_at)
+            mood_logs.append((timestamp, row.mood_value))
+            energy_logs.append((timestamp, row.energy_level))
+
+    # Newest first, and possibly shared through the stats cache, so it is reversed into new lists
+    running_means = await repo.get_running_means(user_id, limit=sys.maxsize, start=start, end=end)
+    mood_means = [(epoch_ms(date.fromisoformat(entry["date"])), entry["avg_mood"]) for entry in reversed(running_means)]
+    energy_means = [(epoch_ms(date.fromisoformat(entry["date"])), entry["avg_energy"]) for entry in reversed(running_means)]
+
+    return {
+        "start": start.isoformat() if start else None,
+        "end": end.isoformat() if end else None,
+        "points": points,
+        "total_logs": len(mood_logs),
+        # Downsampling may drop the newest log, pages compare new logs against this instead
+        "newest_log_at": newest_log_at,
+        "series": {
+            "mood_logs": minmax_downsample(mood_logs, points),
+            "energy_logs": minmax_downsample(energy_logs, points),
+            "mood_running_mean": lttb(mood_means, points),
+            "energy_running_mean": lttb(energy_means, points),
+        }
+    }
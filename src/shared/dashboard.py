@@ -0,0 +1,87 @@
+import asyncio
+import os
+from typing import Awaitable, Callable, Iterable
+
+from src.shared.database import async_session_scope
+from src.shared.models import MoodLogRepositoryV2
+
+DASHBOARD_LIMIT = 20
+# Pooled connections all dashboard loads of this process may check out besides their request's own
+DASHBOARD_MAX_CONNECTIONS = int(os.getenv("DASHBOARD_MAX_CONNECTIONS", 4))
+dashboard_connections = asyncio.Semaphore(DASHBOARD_MAX_CONNECTIONS)
+
+# Each query the dashboard needs, keyed by the section it feeds
+DASHBOARD_QUERIES: dict[str, Callable[[MoodLogRepositoryV2, int, int], Awaitable]] = {
+    "weekly_mood_stats": lambda repo, user_id, limit: repo.get_weekly_mood_stats(user_id),
+    "weather_mood_stats": lambda repo, user_id, limit: repo.get_weather_mood_stats(user_id),
+    "running_means": lambda repo, user_id, limit: repo.get_running_means(user_id, limit=limit),
+    "mood_logs": lambda repo, user_id, limit: repo.get_mood_logs(user_id, limit=limit),
+}
+
+# Sections answered from another section's rows instead of a query of their own
+DERIVED_SECTIONS = {
+    "mood_stats": "weekly_mood_stats",
+    "latest_mood_log": "mood_logs",
+}
+
+DASHBOARD_SECTIONS = ("mood_stats", "latest_mood_log", *DASHBOARD_QUERIES)
+
+
+def totals_from_weekly(weekly_stats: list[dict]) -> dict:
+    """
+    Overall mood stats rebuilt from the per-weekday rows, every log falls on exactly one weekday
+    """
+    total_logs = sum(entry["total_logs"] for entry in weekly_stats)
+    if not total_logs:
+        return {"avg_mood": 0.0, "avg_energy": 0.0, "total_logs": 0}
+
+    return {
+        "avg_mood": round(sum(entry["avg_mood"] * entry["total_logs"] for entry in weekly_stats) / total_logs, 2),
+        "avg_energy": round(sum(entry["avg_energy"] * entry["total_logs"] for entry in weekly_stats) / total_logs, 2),
+        "total_logs": total_logs
+    }
+
+
+async def run_concurrently(repo: MoodLogRepositoryV2, queries: list, user_id: int, limit: int) -> list:
+    # A session cannot run two statements at once, so every query but the first checks out a pooled connection
+    # of its own. Unbounded, each page view would hold one connection per query on top of the request's, and
+    # a handful of concurrent dashboards would drain the pool; the semaphore caps those extra connections
+    # process-wide and further queries wait for one of them instead.
+    async def run(query):
+        async with dashboard_connections:
+            async with async_session_scope() as session:
+                return await query(MoodLogRepositoryV2(session), user_id, limit)
+
+    first, *rest = queries
+    return await asyncio.gather(first(repo, user_id, limit), *(run(query) for query in rest))
+
+
+async def load_dashboard(repo: MoodLogRepositoryV2,
+                         user_id: int,
+                         sections: Iterable[str] = DASHBOARD_SECTIONS,
+                         limit: int = DASHBOARD_LIMIT) -> dict:
+    """
+    Everything the dashboard pages show for a user, in the time of the slowest query.
+    Queries run concurrently on Postgres, at most DASHBOARD_MAX_CONNECTIONS extra connections at a time
+    across the process; on SQLite (a single connection) they run one after another.
+    """
+    sections = list(sections)
+    unknown = set(sections) - set(DASHBOARD_SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown dashboard sections: {', '.join(sorted(unknown))}")
+
+    needed = list(dict.fromkeys(DERIVED_SECTIONS.get(section, section) for section in sections))
+    queries = [DASHBOARD_QUERIES[section] for section in needed]
+
+    if repo.session.get_bind().dialect.name == "postgresql":
+        results = await run_concurrently(repo, queries, user_id, limit)
+    else:
+        results = [await query(repo, user_id, limit) for query in queries]
+    loaded = dict(zip(needed, results))
+
+    if "mood_stats" in sections:
+        loaded["mood_stats"] = totals_from_weekly(loaded["weekly_mood_stats"])
+    if "latest_mood_log" in sections:
+        loaded["latest_mood_log"] = loaded["mood_logs"][0] if loaded["mood_logs"] else None
+
+    return {section: loaded[section] for section in sections}
@@ -1,25 +1,258 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 
 import os
+import time
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
 from dotenv import load_dotenv
 
+logger = logging.getLogger('uvicorn.error')
+
 engine = None
-def get_db():
-    global engine
-    if not engine:
-        host = os.environ['DATABASE_HOST']
-        username = os.environ['DATABASE_USER']
-        password = os.environ['DATABASE_PASSWORD']
-        
-        DATABASE_URL = f"postgresql+psycopg2://{username}:{password}@{host}:5432/"
-        
-        engine = create_engine(DATABASE_URL)
+async_engine = None
+SessionLocal = None
+AsyncSessionLocal = None
+# Statement timeout the current engines were built with, in milliseconds
+engine_statement_timeout = None
+
+
+def database_url(driver: str) -> str:
+    """
+    Build the connection URL for the given SQLAlchemy driver from the environment
+    """
+    host = os.environ['DATABASE_HOST']
+    username = os.environ['DATABASE_USER']
+    password = os.environ['DATABASE_PASSWORD']
+    port = os.environ.get('DATABASE_PORT', '5432')
+    # Postgres defaults the database name to the user name, keep that behaviour explicit
+    name = os.environ.get('DATABASE_NAME', username)
+
+    return f"{driver}://{username}:{password}@{host}:{port}/{name}"
+
+
+def pool_settings() -> dict:
+    """
+    Connection pool settings shared by the sync and async engines
+
+    DATABASE_POOL_SIZE: connections kept open per process (default 10)
+    DATABASE_MAX_OVERFLOW: extra connections allowed under burst load (default 20)
+    DATABASE_POOL_TIMEOUT: seconds to wait for a free connection (default 30)
+    DATABASE_POOL_RECYCLE: seconds before a connection is replaced (default 1800)
+    DATABASE_POOL_PRE_PING: test connections on checkout (default true)
+    """
+    return {
+        "pool_size": int(os.environ.get('DATABASE_POOL_SIZE', 10)),
+        "max_overflow": int(os.environ.get('DATABASE_MAX_OVERFLOW', 20)),
+        "pool_timeout": float(os.environ.get('DATABASE_POOL_TIMEOUT', 30)),
+        "pool_recycle": int(os.environ.get('DATABASE_POOL_RECYCLE', 1800)),
+        "pool_pre_ping": os.environ.get('DATABASE_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes'),
+    }
+
+
+def statement_timeout_ms() -> int:
+    """
+    Server-side statement timeout in milliseconds, 0 disables it (DATABASE_STATEMENT_TIMEOUT_MS)
+    """
+    return int(os.environ.get('DATABASE_STATEMENT_TIMEOUT_MS', 10000))
+
+
+def timeout_connect_args(timeout: int) -> tuple[dict, dict]:
+    """
+    connect_args of the sync (psycopg2) and async (asyncpg) engines that set the statement timeout, none for 0
+    """
+    if not timeout:
+        return {}, {}
+    return {"options": f"-c statement_timeout={timeout}"}, {"server_settings": {"statement_timeout": str(timeout)}}
+
+
+class PoolMetrics():
+    """
+    Counters for connection pool activity, fed by SQLAlchemy pool events
+    """
+
+    def __init__(self):
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.checked_out = 0
+        self.wait_count = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def attach(self, pool):
+        event.listen(pool, "connect", self._on_connect)
+        event.listen(pool, "checkout", self._on_checkout)
+        event.listen(pool, "checkin", self._on_checkin)
+
+    def _on_connect(self, dbapi_connection, connection_record):
+        self.connects += 1
+
+    def _on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        self.checkouts += 1
+        self.checked_out += 1
+
+    def _on_checkin(self, dbapi_connection, connection_record):
+        self.checkins += 1
+        self.checked_out = max(self.checked_out - 1, 0)
+
+    def record_wait(self, seconds: float):
+        self.wait_count += 1
+        self.wait_seconds_total += seconds
+        self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+
+    def snapshot(self, pool=None) -> dict:
+        stats = {
+            "connects": self.connects,
+            "checkouts": self.checkouts,
+            "checkins": self.checkins,
+            "checked_out": self.checked_out,
+            "wait_count": self.wait_count,
+            "wait_seconds_total": round(self.wait_seconds_total, 6),
+            "wait_seconds_avg": round(self.wait_seconds_total / self.wait_count, 6) if self.wait_count else 0.0,
+            "wait_seconds_max": round(self.wait_seconds_max, 6),
+        }
+        if pool is not None and hasattr(pool, "size"):
+            stats.update({
+                "pool_size": pool.size(),
+                "pool_checked_in": pool.checkedin(),
+                "pool_overflow": pool.overflow(),
+            })
+        return stats
+
+
+pool_metrics = PoolMetrics()
+
+
+class TimedCheckoutPool():
+    """
+    Pool mixin recording how long each checkout waited for a free connection. Only the pool's own get is timed,
+    pre-ping runs after it, and a connection opened during the get never waited, so neither counts as waiting.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        started_at = time.time()
+        record = super()._do_get()
+        # starttime is stamped when the record connects, a new one means this checkout opened it
+        pool_metrics.record_wait(0.0 if record.starttime >= started_at else time.perf_counter() - started)
+        return record
+
+
+class TimedAsyncQueuePool(TimedCheckoutPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def init_db(statement_timeout: Optional[int] = None):
+    """
+    Build the process-wide engines and session factories, safe to call more than once.
+    statement_timeout overrides DATABASE_STATEMENT_TIMEOUT_MS, batch jobs pass 0 to run without one.
+    It only applies to the call that builds the engines, later calls keep the existing ones and their timeout.
+    """
+    global engine, async_engine, SessionLocal, AsyncSessionLocal, engine_statement_timeout
+    if engine is not None and async_engine is not None:
+        if statement_timeout is not None and statement_timeout != engine_statement_timeout:
+            logger.warning(
+                f"init_db(statement_timeout={statement_timeout}) ignored, the engines already run with {engine_statement_timeout} ms"
+            )
+        return
+
+    settings = pool_settings()
+    timeout = statement_timeout_ms() if statement_timeout is None else statement_timeout
+    engine_statement_timeout = timeout
+
+    sync_connect_args, async_connect_args = timeout_connect_args(timeout)
+
+    engine = create_engine(database_url("postgresql+psycopg2"), connect_args=sync_connect_args, **settings)
+    async_engine = create_async_engine(
+        database_url("postgresql+asyncpg"), connect_args=async_connect_args, poolclass=TimedAsyncQueuePool, **settings
+    )
 
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    # expire_on_commit=False keeps returned ORM objects readable after commit without lazy IO
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession)
+
+    pool_metrics.attach(async_engine.sync_engine.pool)
+
+
+async def warm_pool(connections: int | None = None) -> int:
+    """
+    Open and return `connections` pooled connections so the first requests skip the connect cost.
+    Defaults to DATABASE_POOL_WARM. Returns the number of connections that were warmed.
+    """
+    if connections is None:
+        connections = int(os.environ.get('DATABASE_POOL_WARM', 0))
+    connections = min(connections, pool_settings()["pool_size"])
+    if connections <= 0:
+        return 0
+
+    init_db()
+    conns = await asyncio.gather(
+        *(async_engine.connect() for _ in range(connections)),
+        return_exceptions=True
+    )
+    warmed = 0
+    for conn in conns:
+        if isinstance(conn, Exception):
+            logger.warning(f"Could not warm database connection: {conn}")
+            continue
+        warmed += 1
+        await conn.close()
+
+    return warmed
+
+
+async def dispose_db():
+    """
+    Close every pooled connection, used on application shutdown
+    """
+    global engine, async_engine, SessionLocal, AsyncSessionLocal
+    if async_engine is not None:
+        await async_engine.dispose()
+    if engine is not None:
+        engine.dispose()
+    engine = async_engine = SessionLocal = AsyncSessionLocal = None
+
+
+def get_pool_metrics() -> dict:
+    """
+    Checkout and wait metrics for the async connection pool
+    """
+    pool = async_engine.sync_engine.pool if async_engine is not None else None
+    return pool_metrics.snapshot(pool)
+
+
+def get_db():
+    init_db()
 
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db():
+    """
+    Async counterpart of get_db, backed by asyncpg so queries never block the event loop
+    """
+    init_db()
+
+    # The connection is checked out on the first query, requests that never query hold none
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@asynccontextmanager
+async def async_session_scope():
+    """
+    Short-lived AsyncSession for work outside a request, such as NiceGUI event handlers and CLI tasks
+    """
+    init_db()
+
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,130 @@
+import asyncio
+import inspect
+import logging
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+MOOD_LOG_CREATED = "created"
+MOOD_LOG_EDITED = "edited"
+MOOD_LOGS_CLEARED = "cleared"
+# Too many new logs to send one by one, subscribers reload instead
+MOOD_LOGS_IMPORTED = "imported"
+
+# Largest number of logs carried by a single created event
+EVENT_MAX_LOGS = 100
+
+
+@dataclass
+class MoodLogEvent():
+    """
+    A committed change to a user's mood logs, logs holds MoodLogResponse models for created and edited events
+    """
+    user_id: int
+    kind: str
+    logs: list = field(default_factory=list)
+
+
+def extends_history(event: MoodLogEvent, newest: Optional[datetime]) -> bool:
+    """
+    Whether event only adds logs at or after newest, so a page kept in time order can add them at the head.
+    Backdated logs land in the middle of the history and change everything after them, pages reload instead.
+    """
+    return event.kind == MOOD_LOG_CREATED and all(newest is None or log.created_at >= newest for log in event.logs)
+
+
+Handler = Callable[[MoodLogEvent], Optional[Awaitable[None]]]
+
+
+class EventBusBackend():
+    """
+    Transport between publishers and the processes holding subscribers.
+    A cross-process backend publishes to its broker and calls deliver for every event it receives.
+    """
+
+    def attach(self, deliver: Callable[[MoodLogEvent], Awaitable[None]]):
+        self.deliver = deliver
+
+    async def publish(self, event: MoodLogEvent):
+        raise NotImplementedError
+
+
+class InProcessEventBackend(EventBusBackend):
+    """
+    Delivers straight to this process's subscribers, enough while the app runs as a single worker
+    """
+
+    async def publish(self, event: MoodLogEvent):
+        await self.deliver(event)
+
+
+class EventBus():
+    """
+    Per-user pub/sub for mood log changes. Handlers run as their own tasks, so a slow or
+    disconnected page never holds up the write that published the event.
+    """
+
+    def __init__(self, backend: EventBusBackend):
+        self.backend = backend
+        self.handlers: dict[int, list[Handler]] = {}
+        self._tasks: set[asyncio.Task] = set()
+        self.published = 0
+        self.delivered = 0
+        self.failed = 0
+        backend.attach(self.deliver)
+
+    def subscribe(self, user_id: int, handler: Handler) -> Callable[[], None]:
+        """
+        Call handler with every event for user_id, returns the function that unsubscribes it
+        """
+        self.handlers.setdefault(user_id, []).append(handler)
+
+        def unsubscribe():
+            handlers = self.handlers.get(user_id, [])
+            if handler in handlers:
+                handlers.remove(handler)
+            if not handlers:
+                self.handlers.pop(user_id, None)
+
+        return unsubscribe
+
+    async def publish(self, event: MoodLogEvent):
+        self.published += 1
+        await self.backend.publish(event)
+
+    async def deliver(self, event: MoodLogEvent):
+        for handler in list(self.handlers.get(event.user_id, ())):
+            task = asyncio.create_task(self._run(handler, event))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, handler: Handler, event: MoodLogEvent):
+        try:
+            result = handler(event)
+            if inspect.isawaitable(result):
+                await result
+            self.delivered += 1
+        except Exception:
+            self.failed += 1
+            logger.exception("Mood log event handler failed for user %s", event.user_id)
+
+    async def drain(self):
+        """
+        Wait for the handlers already started, used on shutdown and in tests
+        """
+        while self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "users": len(self.handlers),
+            "subscribers": sum(len(handlers) for handlers in self.handlers.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "failed": self.failed,
+        }
+
+
+event_bus = EventBus(InProcessEventBackend())
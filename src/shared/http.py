@@ -0,0 +1,118 @@
+import asyncio
+import os
+import random
+import time
+
+import httpx
+from fastapi import Request
+
+from src.shared.metrics import upstream_request_duration
+
+# Responses worth another attempt, upstream is overloaded or restarting
+RETRY_STATUSES = {429, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+# Metrics label of calls that do not name their upstream with extensions={"upstream": ...}
+UPSTREAM_HOSTS = {
+    "api.openweathermap.org": "weather",
+    "www.googleapis.com": "youtube",
+    "accounts.spotify.com": "spotify",
+    "api.spotify.com": "spotify",
+}
+
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps a transport and retries idempotent requests on connection errors and retryable
+    statuses, sleeping a jittered exponential backoff between attempts
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, retries: int = 2, backoff: float = 0.2, max_backoff: float = 2.0):
+        self.transport = transport
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def backoff_delay(self, attempt: int) -> float:
+        # "Full jitter": spreads retries from many workers instead of synchronising them
+        return random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        retryable = request.method in IDEMPOTENT_METHODS
+
+        for attempt in range(self.retries + 1):
+            last_attempt = attempt == self.retries or not retryable
+            try:
+                response = await self.transport.handle_async_request(request)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.ReadTimeout, httpx.RemoteProtocolError):
+                if last_attempt:
+                    raise
+            else:
+                if last_attempt or response.status_code not in RETRY_STATUSES:
+                    return response
+                await response.aclose()
+
+            await asyncio.sleep(self.backoff_delay(attempt))
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class MetricsTransport(httpx.AsyncBaseTransport):
+    """
+    Records the latency of every outbound call by upstream and status, until the response headers arrive
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        upstream = request.extensions.get("upstream") or UPSTREAM_HOSTS.get(request.url.host, "other")
+        started = time.perf_counter()
+        status = "error"
+        try:
+            response = await self.transport.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            upstream_request_duration.observe(time.perf_counter() - started, (upstream, status))
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def create_http_client(transport: httpx.AsyncBaseTransport | None = None) -> httpx.AsyncClient:
+    """
+    Build the process-wide outbound client, configured from the environment
+
+    HTTP_CONNECT_TIMEOUT / HTTP_READ_TIMEOUT: seconds (default 3 / 10)
+    HTTP_MAX_CONNECTIONS / HTTP_MAX_KEEPALIVE: pool limits (default 100 / 20)
+    HTTP_RETRIES: extra attempts for idempotent requests (default 2)
+
+    Pass a transport (e.g. httpx.MockTransport) to replace the network in tests.
+    """
+    timeout = httpx.Timeout(
+        connect=float(os.environ.get('HTTP_CONNECT_TIMEOUT', 3)),
+        read=float(os.environ.get('HTTP_READ_TIMEOUT', 10)),
+        write=10.0,
+        pool=5.0,
+    )
+
+    if transport is None:
+        limits = httpx.Limits(
+            max_connections=int(os.environ.get('HTTP_MAX_CONNECTIONS', 100)),
+            max_keepalive_connections=int(os.environ.get('HTTP_MAX_KEEPALIVE', 20)),
+            keepalive_expiry=60.0,
+        )
+        transport = httpx.AsyncHTTPTransport(http2=True, limits=limits)
+
+    return httpx.AsyncClient(
+        transport=MetricsTransport(RetryTransport(transport, retries=int(os.environ.get('HTTP_RETRIES', 2)))),
+        timeout=timeout,
+    )
+
+
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """
+    Dependency returning the shared client created in the application lifespan
+    """
+    return request.app.state.http_client
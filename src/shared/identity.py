@@ -0,0 +1,28 @@
+import os
+from typing import Optional
+
+from src.shared.cache import TTLCache
+
+# Renames and deletes invalidate the entry in this process, the TTL bounds staleness in other workers
+IDENTITY_CACHE_TTL = float(os.getenv("IDENTITY_CACHE_TTL", 300))
+
+identity_cache = TTLCache(maxsize=int(os.getenv("IDENTITY_CACHE_SIZE", 10000)), ttl=IDENTITY_CACHE_TTL)
+
+
+def cached_user_id(username: str) -> Optional[int]:
+    """
+    The cached id for a username, None when it has not been resolved yet
+    """
+    return identity_cache.get(username)
+
+
+def remember_user_id(username: str, user_id: int):
+    # Only found users are stored, so a signup is visible straight away
+    identity_cache.set(username, user_id)
+
+
+def forget_username(username: str):
+    """
+    Drop a username after the user is renamed or deleted
+    """
+    identity_cache.invalidate(username)
@@ -0,0 +1,148 @@
+import csv
+import json
+from datetime import datetime, timezone
+from typing import AsyncIterator, Iterator, Optional, TextIO
+
+from pydantic import BaseModel, Field, ValidationError, field_validator
+
+from src.shared.models import MoodLogRepositoryV2
+
+# Rows written per transaction, a failed import can resume after the last committed chunk
+IMPORT_CHUNK_SIZE = 1000
+# Row errors kept in the report, the count keeps going past it
+IMPORT_MAX_ERRORS = 100
+IMPORT_FORMATS = ("csv", "ndjson")
+
+
+class MoodLogImportRow(BaseModel):
+    created_at: datetime
+    mood_value: int = Field(ge=1, le=5)
+    energy_level: int = Field(ge=1, le=5)
+    notes: Optional[str] = None
+    weather: Optional[str] = None
+
+    @field_validator("notes", "weather", mode="before")
+    @classmethod
+    def empty_as_none(cls, value):
+        # CSV has no null, an empty cell means no value
+        return value or None
+
+    @field_validator("created_at")
+    @classmethod
+    def as_naive_utc(cls, value: datetime) -> datetime:
+        if value.tzinfo is not None:
+            return value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+
+class ImportProgress():
+    """
+    Running totals of an import, last_committed_row is the resume point
+    """
+
+    def __init__(self, start_row: int = 0):
+        self.start_row = start_row
+        self.rows_read = 0
+        self.imported = 0
+        self.skipped = 0
+        self.last_committed_row = start_row
+        self.errors = []
+
+    def add_error(self, row_number: int, error: str):
+        self.skipped += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({"row": row_number, "error": error})
+
+    def to_dict(self) -> dict:
+        return {
+            "rows_read": self.rows_read,
+            "imported": self.imported,
+            "skipped": self.skipped,
+            "last_committed_row": self.last_committed_row,
+            "errors": self.errors,
+        }
+
+
+def format_from_filename(filename: Optional[str]) -> Optional[str]:
+    """
+    Guess the import format from a file extension, None when it is not recognised
+    """
+    extension = (filename or "").rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        return "csv"
+    if extension in ("ndjson", "jsonl"):
+        return "ndjson"
+    return None
+
+
+def read_rows(stream: TextIO, format: str) -> Iterator[tuple[int, dict | str]]:
+    """
+    Lazily read (row number, raw row) pairs from a text stream, numbering data rows from 1.
+    An NDJSON line that is not a JSON object is yielded as an error message instead of a dict.
+    """
+    if format == "csv":
+        for row_number, row in enumerate(csv.DictReader(stream), 1):
+            yield row_number, row
+        return
+
+    row_number = 0
+    for line in stream:
+        if not line.strip():
+            continue
+        row_number += 1
+        try:
+            row = json.loads(line)
+        except ValueError:
+            yield row_number, "Invalid JSON"
+            continue
+        yield row_number, row if isinstance(row, dict) else "Expected a JSON object"
+
+
+def validation_message(error: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(part) for part in detail['loc'])}: {detail['msg']}" for detail in error.errors())
+
+
+async def import_mood_logs(repo: MoodLogRepositoryV2,
+                            user_id: int,
+                            stream: TextIO,
+                            format: str,
+                            chunk_size: int = IMPORT_CHUNK_SIZE,
+                            start_row: int = 0) -> AsyncIterator[ImportProgress]:
+    """
+    Stream rows from a CSV or NDJSON file into mood_logs, one transaction per chunk_size rows.
+    Yields the progress after every commit, the last one being the final totals.
+    Rows up to start_row are skipped so an interrupted import can pick up after its last committed chunk.
+    """
+    progress = ImportProgress(start_row)
+    batch = []
+
+    async def flush(row_number: int):
+        progress.imported += await repo.bulk_create_mood_logs(batch)
+        progress.last_committed_row = row_number
+        batch.clear()
+
+    row_number = start_row
+    for row_number, raw in read_rows(stream, format):
+        if row_number <= start_row:
+            continue
+        progress.rows_read += 1
+
+        if isinstance(raw, str):
+            progress.add_error(row_number, raw)
+        else:
+            try:
+                row = MoodLogImportRow.model_validate(raw)
+                batch.append({"user_id": user_id, **row.model_dump()})
+            except ValidationError as e:
+                progress.add_error(row_number, validation_message(e))
+
+        if row_number - progress.last_committed_row >= chunk_size:
+            await flush(row_number)
+            yield progress
+
+    if row_number > progress.last_committed_row:
+        await flush(row_number)
+        yield progress
+    elif progress.rows_read == 0:
+        # Nothing past start_row, still report the totals once
+        yield progress
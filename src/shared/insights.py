@@ -0,0 +1,172 @@
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Callable, Optional
+
+from src.shared.models import MoodLogRepositoryV2
+from src.shared.stats_cache import stats_cache
+
+# Days of history the streak and trend insights look back over
+INSIGHT_HISTORY_DAYS = 365
+NEUTRAL_MOOD = 3
+# Smallest change in average energy between two weeks worth calling a trend
+ENERGY_TREND_THRESHOLD = 0.3
+# Smallest gap in average mood between the best and worst weather worth calling weather sensitive
+WEATHER_SENSITIVITY_THRESHOLD = 1.0
+# Conditions need this many logs before they count towards weather sensitivity
+WEATHER_SENSITIVITY_MIN_LOGS = 2
+
+
+@dataclass
+class InsightInputs():
+    """
+    Everything the insight functions may read, loaded once per computation
+    """
+    weekly_stats: list[dict]
+    weather_stats: list[dict]
+    daily_stats: list[dict]
+    today: date
+
+
+# Each insight type turns the inputs into zero or more tip messages, keyed by type
+INSIGHT_TYPES: dict[str, Callable[[InsightInputs], list[str]]] = {}
+
+
+def insight(name: str):
+    """
+    Register an insight type, new ones are computed with the rest and add nothing to the page render
+    """
+    def register(function: Callable[[InsightInputs], list[str]]):
+        INSIGHT_TYPES[name] = function
+        return function
+    return register
+
+
+def describe_weather(entry: dict) -> str:
+    if entry["temperature_band"] is None:
+        return entry["weather"]
+
+    return f"{entry['weather']} and {entry['temperature_band']}"
+
+
+@insight("weather")
+def weather_insights(inputs: InsightInputs) -> list[str]:
+    if not inputs.weather_stats:
+        return []
+
+    happiest = max(inputs.weather_stats, key=lambda x: x["avg_mood"])
+    saddest = min(inputs.weather_stats, key=lambda x: x["avg_mood"])
+    neutral = min(inputs.weather_stats, key=lambda x: abs(x["avg_mood"] - NEUTRAL_MOOD))
+
+    return [
+        f"You tend to feel the most happy when it is {describe_weather(happiest)}",
+        f"You tend to feel the saddest when it is {describe_weather(saddest)}",
+        f"You tend to feel neutral when it is {describe_weather(neutral)}",
+    ]
+
+
+@insight("weekday")
+def weekday_insights(inputs: InsightInputs) -> list[str]:
+    if not inputs.weekly_stats:
+        return []
+
+    happiest = max(inputs.weekly_stats, key=lambda x: x["avg_mood"])
+    saddest = min(inputs.weekly_stats, key=lambda x: x["avg_mood"])
+    neutral = min(inputs.weekly_stats, key=lambda x: abs(x["avg_mood"] - NEUTRAL_MOOD))
+
+    return [
+        f"You tend to feel the happiest on {happiest['day']}",
+        f"You tend to feel the saddest on {saddest['day']}",
+        f"You tend to feel the most neutral on {neutral['day']}",
+    ]
+
+
+@insight("streak")
+def streak_insights(inputs: InsightInputs) -> list[str]:
+    days = [entry["day"] for entry in inputs.daily_stats]
+    if not days:
+        return []
+
+    longest = current = 1
+    for previous, day in zip(days, days[1:]):
+        current = current + 1 if day - previous == timedelta(days=1) else 1
+        longest = max(longest, current)
+
+    messages = []
+    # A streak is still alive until a whole day passes without a log
+    if inputs.today - days[-1] <= timedelta(days=1) and current > 1:
+        messages.append(f"You have logged your mood {current} days in a row, keep it going!")
+    if longest > 1 and longest > current:
+        messages.append(f"Your longest logging streak is {longest} days")
+    return messages
+
+
+@insight("energy_trend")
+def energy_trend_insights(inputs: InsightInputs) -> list[str]:
+    this_week_start = inputs.today - timedelta(days=6)
+    last_week_start = this_week_start - timedelta(days=7)
+
+    def average_energy(first: date, last: date) -> Optional[float]:
+        entries = [entry for entry in inputs.daily_stats if first <= entry["day"] <= last]
+        logs = sum(entry["total_logs"] for entry in entries)
+        if not logs:
+            return None
+        return sum(entry["avg_energy"] * entry["total_logs"] for entry in entries) / logs
+
+    this_week = average_energy(this_week_start, inputs.today)
+    last_week = average_energy(last_week_start, this_week_start - timedelta(days=1))
+    if this_week is None or last_week is None:
+        return []
+
+    change = this_week - last_week
+    if change >= ENERGY_TREND_THRESHOLD:
+        return [f"Your energy is up {change:.1f} points on the week before"]
+    if change <= -ENERGY_TREND_THRESHOLD:
+        return [f"Your energy is down {-change:.1f} points on the week before, be kind to yourself"]
+    return ["Your energy has been steady compared with the week before"]
+
+
+@insight("weather_sensitivity")
+def weather_sensitivity_insights(inputs: InsightInputs) -> list[str]:
+    # Temperature bands are merged back together, sensitivity is about the condition itself
+    totals: dict[str, tuple[float, int]] = {}
+    for entry in inputs.weather_stats:
+        mood_sum, logs = totals.get(entry["weather"], (0.0, 0))
+        totals[entry["weather"]] = (mood_sum + entry["avg_mood"] * entry["total_logs"], logs + entry["total_logs"])
+
+    averages = {weather: mood_sum / logs for weather, (mood_sum, logs) in totals.items() if logs >= WEATHER_SENSITIVITY_MIN_LOGS}
+    if len(averages) < 2:
+        return []
+
+    best = max(averages, key=averages.get)
+    worst = min(averages, key=averages.get)
+    gap = averages[best] - averages[worst]
+    if gap >= WEATHER_SENSITIVITY_THRESHOLD:
+        return [f"The weather makes a real difference to you, your mood is {gap:.1f} points higher when it is {best} than when it is {worst}"]
+    return ["Your mood stays steady whatever the weather"]
+
+
+async def load_insight_inputs(repo: MoodLogRepositoryV2, user_id: int, today: date) -> InsightInputs:
+    return InsightInputs(
+        weekly_stats=await repo.get_weekly_mood_stats(user_id),
+        weather_stats=await repo.get_weather_mood_stats(user_id),
+        daily_stats=await repo.get_daily_stats(user_id, since=today - timedelta(days=INSIGHT_HISTORY_DAYS)),
+        today=today
+    )
+
+
+async def compute_insights(repo: MoodLogRepositoryV2, user_id: int, today: date) -> dict[str, list[str]]:
+    """
+    Run every registered insight type over one load of the inputs
+    """
+    inputs = await load_insight_inputs(repo, user_id, today)
+    return {name: function(inputs) for name, function in INSIGHT_TYPES.items()}
+
+
+async def get_insights(repo: MoodLogRepositoryV2, user_id: int, today: Optional[date] = None) -> dict:
+    """
+    The user's insight set, computed once per data version (and per day, streaks depend on the date)
+    and served from the stats cache until the next write
+    """
+    today = today or datetime.utcnow().date()
+    insights = await stats_cache.get_or_compute(user_id, "insights", (today,), lambda: compute_insights(repo, user_id, today))
+    return {"version": await stats_cache.version(user_id), "insights": insights}
@@ -0,0 +1,257 @@
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.routing import Mount
+
+# Request latencies from a warm cache hit (a few ms) up to a slow upstream (seconds)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89)
+# Requests no route matched share one label, so scanners probing random paths cannot blow up the series count
+UNMATCHED_ROUTE = "unmatched"
+# NiceGUI serves its own scripts and styles without setting scope["route"], they share this label
+NICEGUI_PREFIX = "/_nicegui/"
+NICEGUI_ROUTE = "/_nicegui/{path}"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+LabelValues = tuple[str, ...]
+
+
+def format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if value == int(value):
+        return str(int(value))
+    return repr(value)
+
+
+def format_labels(names: Iterable[str], values: Iterable) -> str:
+    pairs = [
+        f'{name}="' + str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") + '"'
+        for name, value in zip(names, values)
+    ]
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric():
+    """
+    One metric family with a fixed set of label names; values are kept per tuple of label values
+    """
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+    def render(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}", *self.render_samples()]
+
+    def render_samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self.values: dict[LabelValues, float] = {}
+
+    def inc(self, labels: LabelValues = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render_samples(self) -> list[str]:
+        return [f"{self.name}{format_labels(self.labels, key)} {format_value(value)}" for key, value in sorted(self.values.items())]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, labels: LabelValues = (), amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) - amount
+
+    def set(self, value: float, labels: LabelValues = ()):
+        self.values[labels] = value
+
+
+class Histogram(Metric):
+    """
+    Observations counted into fixed buckets. Counts are stored per bucket and only made
+    cumulative when rendered, so an observation costs one bisect and two additions.
+    """
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets: tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [count per bucket..., count above the last bucket, sum]
+        self.values: dict[LabelValues, list] = {}
+
+    def observe(self, value: float, labels: LabelValues = ()):
+        counts = self.values.get(labels)
+        if counts is None:
+            counts = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        counts[bisect_left(self.buckets, value)] += 1
+        counts[-1] += value
+
+    def render_samples(self) -> list[str]:
+        lines = []
+        for key, counts in sorted(self.values.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), counts):
+                cumulative += count
+                lines.append(f"{self.name}_bucket{format_labels((*self.labels, 'le'), (*key, format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.labels, key)} {format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{format_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+# A scrape-time collector returns (name, type, help, [(labels, value), ...]) for values other modules already count
+Collector = Callable[[], Iterable[tuple[str, str, str, list[tuple[dict, float]]]]]
+
+
+class MetricsRegistry():
+    """
+    Every metric of the process, rendered in the Prometheus text format on each scrape
+    """
+
+    def __init__(self):
+        self.metrics: list[Metric] = []
+        self.collectors: list[Collector] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def collector(self, collect: Collector) -> Collector:
+        self.collectors.append(collect)
+        return collect
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.render())
+
+        for collect in self.collectors:
+            for name, type, help, samples in collect():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {type}")
+                lines.extend(f"{name}{format_labels(labels, labels.values())} {format_value(value)}" for labels, value in samples)
+
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry()
+
+http_requests = metrics.register(Counter(
+    "mindfuly_http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+))
+http_request_duration = metrics.register(Histogram(
+    "mindfuly_http_request_duration_seconds", "Time from receiving a request to sending the last byte of its response", ("method", "route")
+))
+http_requests_in_flight = metrics.register(Gauge(
+    "mindfuly_http_requests_in_flight", "HTTP requests currently being served"
+))
+http_request_db_queries = metrics.register(Histogram(
+    "mindfuly_http_request_db_queries", "Database queries run while serving a request", ("method", "route"), QUERY_COUNT_BUCKETS
+))
+http_request_db_duration = metrics.register(Histogram(
+    "mindfuly_http_request_db_duration_seconds", "Time spent in database queries while serving a request", ("method", "route")
+))
+db_query_duration = metrics.register(Histogram(
+    "mindfuly_db_query_duration_seconds", "Duration of every database query, in and outside requests", buckets=QUERY_BUCKETS
+))
+upstream_request_duration = metrics.register(Histogram(
+    "mindfuly_upstream_request_duration_seconds", "Outbound API calls until response headers, retries included", ("upstream", "status")
+))
+
+# [queries, seconds] of the request being served by the current task, None outside requests
+request_db_usage: ContextVar[Optional[list]] = ContextVar("request_db_usage", default=None)
+
+
+def route_label(scope: dict) -> str:
+    """
+    Path template of the route that served the request, e.g. /mood/stats/{username}
+    """
+    route = scope.get("route")
+    path = getattr(route, "path", None)
+    # No route, or only the NiceGUI app mounted at / matched and nothing inside it did
+    if not path:
+        return NICEGUI_ROUTE if scope["path"].startswith(NICEGUI_PREFIX) else UNMATCHED_ROUTE
+    # Static file mounts, one label for all the files under them
+    if isinstance(route, Mount):
+        return path + "/{path}"
+    return path
+
+
+class MetricsMiddleware():
+    """
+    Pure ASGI middleware timing every HTTP request, NiceGUI pages included, by route template.
+    Stays at a few microseconds per request: a couple of clock reads, dict updates and a bisect.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        db_usage = [0, 0.0]
+        token = request_db_usage.set(db_usage)
+        http_requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_flight.dec()
+            request_db_usage.reset(token)
+
+            key = (scope["method"], route_label(scope))
+            http_requests.inc((*key, str(status)))
+            http_request_duration.observe(elapsed, key)
+            http_request_db_queries.observe(db_usage[0], key)
+            http_request_db_duration.observe(db_usage[1], key)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_metrics_started", None)
+    if started is None:
+        return
+
+    elapsed = time.perf_counter() - started
+    db_query_duration.observe(elapsed)
+    # SQLAlchemy runs async drivers in a greenlet that shares the calling task's context
+    usage = request_db_usage.get()
+    if usage is not None:
+        usage[0] += 1
+        usage[1] += elapsed
+
+
+def instrument_database():
+    """
+    Time the queries of every engine, the async ones included, safe to call more than once
+    """
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
@@ -1,16 +1,31 @@
 from fastapi import Depends, HTTPException
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Float, insert, select, func
-from sqlalchemy.orm import Session
+from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey, Text, Float, Index, insert, select, update, delete, func, cast, extract, literal, type_coerce
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
-from pydantic import BaseModel
-from typing import Optional
-from datetime import datetime
-from collections import defaultdict
+from pydantic import BaseModel, Field
+from typing import AsyncIterator, Optional
+from datetime import datetime, date, timedelta
 import calendar
 
-from src.shared.database import get_db
+from src.shared.database import get_async_db
 
-from user_service_v2.models.user import Base, get_user_repository_v2, UserRepositoryV2
+from src.shared.identity import cached_user_id, remember_user_id
+from src.shared.cache import TTLCache
+from src.shared.stats_cache import cached_stats, stats_cache
+from src.shared.events import EVENT_MAX_LOGS, MOOD_LOG_CREATED, MOOD_LOG_EDITED, MOOD_LOGS_CLEARED, MOOD_LOGS_IMPORTED, MoodLogEvent, event_bus
+from src.shared.weather import TEMPERATURE_BAND_WIDTH, parse_weather, temperature_band_label
+
+from user_service_v2.models.user import Base, User, get_user_repository_v2, UserRepositoryV2
+
+class WeatherCondition(Base):
+    """
+    Dictionary of weather condition names ("light rain", "overcast", ...) referenced by id from mood_logs
+    """
+    __tablename__ = "weather_conditions"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String(100), nullable=False, unique=True)
 
 class MoodLog(Base):
     __tablename__ = "mood_logs"
@@ -21,15 +36,167 @@ class MoodLog(Base):
     energy_level = Column(Integer, nullable=False)
     notes = Column(Text, nullable=True)
     weather = Column(String(100), nullable=True)
+    # Parsed from weather on write, the text is kept for display
+    temperature_c = Column(Float, nullable=True)
+    weather_condition_id = Column(Integer, ForeignKey("weather_conditions.id"), nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # Every per-user query filters on user_id and walks created_at newest first
+    __table_args__ = (
+        Index("ix_mood_logs_user_id_created_at", user_id, created_at.desc()),
+    )
+
+class MoodDailyRollup(Base):
+    """
+    Per-user, per-day aggregates of mood_logs so stats cost scales with days rather than logs
+    """
+    __tablename__ = "mood_daily_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    log_count = Column(Integer, nullable=False)
+    mood_sum = Column(Integer, nullable=False)
+    mood_min = Column(Integer, nullable=False)
+    mood_max = Column(Integer, nullable=False)
+    energy_sum = Column(Integer, nullable=False)
+    energy_min = Column(Integer, nullable=False)
+    energy_max = Column(Integer, nullable=False)
+
+class MoodDailyWeatherRollup(Base):
+    """
+    Per-user, per-day counts and sums for each weather condition and temperature band, backing the weather stats
+    """
+    __tablename__ = "mood_daily_weather_rollups"
+
+    # Surrogate key since logs without a temperature have no band and primary key columns cannot be NULL
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    day = Column(Date, nullable=False)
+    weather_condition_id = Column(Integer, ForeignKey("weather_conditions.id"), nullable=False)
+    temperature_band = Column(Integer, nullable=True)
+    log_count = Column(Integer, nullable=False)
+    mood_sum = Column(Integer, nullable=False)
+    energy_sum = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_mood_daily_weather_rollups_user_id_day", user_id, day),
+    )
+
+DAILY_ROLLUP_COLUMNS = ["user_id", "day", "log_count", "mood_sum", "mood_min", "mood_max", "energy_sum", "energy_min", "energy_max"]
+WEATHER_ROLLUP_COLUMNS = ["user_id", "day", "weather_condition_id", "temperature_band", "log_count", "mood_sum", "energy_sum"]
+
+# Condition ids never change once assigned, so every process can keep them for good
+weather_condition_ids = TTLCache(maxsize=4096, ttl=None)
+
+def temperature_band(column):
+    """
+    Lower bound of the TEMPERATURE_BAND_WIDTH wide band a temperature falls in, rounded to whole degrees.
+    Integer modulo truncates toward zero on both Postgres and SQLite, so it is shifted to floor negative values.
+    """
+    rounded = cast(func.round(column), Integer)
+    return rounded - (rounded % TEMPERATURE_BAND_WIDTH + TEMPERATURE_BAND_WIDTH) % TEMPERATURE_BAND_WIDTH
+
+def daily_rollup_select(day, condition, group_by):
+    return select(
+        MoodLog.user_id,
+        day,
+        func.count(MoodLog.id),
+        func.sum(MoodLog.mood_value),
+        func.min(MoodLog.mood_value),
+        func.max(MoodLog.mood_value),
+        func.sum(MoodLog.energy_level),
+        func.min(MoodLog.energy_level),
+        func.max(MoodLog.energy_level)
+    ).where(condition).group_by(*group_by)
+
+def weather_rollup_select(day, condition, group_by):
+    band = temperature_band(MoodLog.temperature_c)
+    return select(
+        MoodLog.user_id,
+        day,
+        MoodLog.weather_condition_id,
+        band,
+        func.count(MoodLog.id),
+        func.sum(MoodLog.mood_value),
+        func.sum(MoodLog.energy_level)
+    ).where(
+        condition &
+        (MoodLog.weather_condition_id.isnot(None))
+    ).group_by(*group_by, MoodLog.weather_condition_id, band)
+
+def day_of_week(column, dialect_name: str):
+    """
+    Day of the week for a timestamp column, numbered Sunday = 0 to Saturday = 6 on every dialect
+    """
+    if dialect_name == "sqlite":
+        return cast(func.strftime('%w', column), Integer)
+    return cast(extract('dow', column), Integer)
+
+def encode_cursor(mood_log: MoodLog) -> str:
+    """
+    Keyset cursor pointing just past a mood log, formatted as "<created_at ISO>,<id>"
+    """
+    return f"{mood_log.created_at.isoformat()},{mood_log.id}"
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Parse a cursor produced by encode_cursor, raises ValueError when it is malformed
+    """
+    created_at, _, log_id = cursor.rpartition(",")
+    return datetime.fromisoformat(created_at), int(log_id)
+
+def user_ref(user: int | str):
+    """
+    A user id as is, or a scalar subquery on users for a username so lookups join in the same statement
+    """
+    if isinstance(user, str):
+        return select(User.id).where(User.name == user).scalar_subquery()
+    return user
+
+RESOLUTIONS = ("day", "week", "month")
+
+# Postgres' wire protocol numbers bind parameters with 16 bits, one statement may carry at most this many
+POSTGRES_MAX_BIND_PARAMS = 32767
+
+
+def bulk_insert_statements(rows: list[dict]):
+    """
+    Multi-row INSERTs covering rows, each sized from the row width so it stays under POSTGRES_MAX_BIND_PARAMS
+    """
+    chunk = POSTGRES_MAX_BIND_PARAMS // max(len(rows[0]), 1) if rows else 1
+    for start in range(0, len(rows), chunk):
+        yield insert(MoodLog).values(rows[start:start + chunk])
+
+def date_bucket(column, resolution: str, dialect_name: str):
+    """
+    Start of the day, ISO week (Monday) or month containing a date column
+    """
+    if resolution == "day":
+        return column
+    if dialect_name == "sqlite":
+        modifiers = ('weekday 0', '-6 days') if resolution == "week" else ('start of month',)
+        return type_coerce(func.date(column, *modifiers), Date)
+    return cast(func.date_trunc(resolution, column), Date)
+
 class MoodLogRepositoryV2():
     """
-    Controls manipulation of the mood_logs table
+    Controls manipulation of the mood_logs table through an AsyncSession
     """
 
-    def __init__(self, session):
+    def __init__(self, session: AsyncSession):
         self.session = session
+
+    # Resolve a username to its id, served from the identity cache after the first lookup
+    async def resolve_user_id(self, username: str) -> Optional[int]:
+        user_id = cached_user_id(username)
+        if user_id is not None:
+            return user_id
+
+        result = await self.session.execute(select(User.id).where(User.name == username))
+        user_id = result.scalar_one_or_none()
+        if user_id is not None:
+            remember_user_id(username, user_id)
+        return user_id
     
     # Create a new mood log entry
     async def create_mood_log(self,
@@ -39,24 +206,26 @@ class MoodLogRepositoryV2():
                                 notes: Optional[str] = None,
                                 weather: Optional[str] = None) -> MoodLog:
 
+        created_at = datetime.utcnow()
+        row = {
+            "user_id": user_id,
+            "mood_value": mood_value,
+            "energy_level": energy_level,
+            "notes": notes,
+            "weather": weather,
+            "created_at": created_at
+        }
+
         try:
-            self.session.execute(insert(MoodLog), [{
-                "user_id": user_id,
-                "mood_value": mood_value,
-                "energy_level": energy_level,
-                "notes": notes,
-                "weather": weather
-            }])
-            self.session.commit()
-            return MoodLog(
-                user_id=user_id,
-                mood_value=mood_value,
-                energy_level=energy_level,
-                notes=notes,
-                weather=weather
-            )
+            await self._add_weather_fields([row])
+            await self.session.execute(insert(MoodLog), [row])
+            await self._refresh_rollups(user_id, {created_at.date()})
+            await self.session.commit()
+            await stats_cache.bump(user_id)
+            await self._publish_created(user_id, [row])
+            return MoodLog(**row)
         except IntegrityError:
-            self.session.rollback()
+            await self.session.rollback()
             return None
         
     # Edit latest mood log entry for a user (can only edit mood_value, energy_level, notes)
@@ -75,55 +244,104 @@ class MoodLogRepositoryV2():
             latest_log.energy_level = energy_level
         if notes is not None:
             latest_log.notes = notes
-        self.session.commit()
+        await self.session.flush()
+        await self._refresh_rollups(user_id, {latest_log.created_at.date()})
+        await self.session.commit()
+        await stats_cache.bump(user_id)
+        await event_bus.publish(MoodLogEvent(user_id, MOOD_LOG_EDITED, [MoodLogResponse.from_db_model(latest_log)]))
         return latest_log
         
     # Get the date of the most recent mood log for a user
-    async def get_most_recent_log_date(self, user_id: int) -> Optional[datetime]:
-        result = self.session.execute(
-            select(MoodLog.created_at).where(MoodLog.user_id == user_id).order_by(MoodLog.created_at.desc()).limit(1)
+    async def get_most_recent_log_date(self, user_id: int | str) -> Optional[datetime]:
+        result = await self.session.execute(
+            select(MoodLog.created_at).where(MoodLog.user_id == user_ref(user_id)).order_by(MoodLog.created_at.desc()).limit(1)
         )
         
         most_recent = result.scalar_one_or_none()
         return most_recent
     
     # Get the latest mood log for a user
-    async def get_latest_mood_log(self, user_id: int) -> Optional[MoodLog]:
-        result = self.session.execute(
-            select(MoodLog).where(MoodLog.user_id == user_id).order_by(MoodLog.created_at.desc()).limit(1)
+    async def get_latest_mood_log(self, user_id: int | str) -> Optional[MoodLog]:
+        result = await self.session.execute(
+            select(MoodLog).where(MoodLog.user_id == user_ref(user_id)).order_by(MoodLog.created_at.desc()).limit(1)
         )
         mood_log = result.scalar_one_or_none()
         return mood_log
     
-    # Get all mood logs for a user, limited by 'limit'
-    async def get_mood_logs(self, user_id: int, limit: int = 10) -> list[MoodLog]:
-        result = self.session.execute(
-            select(MoodLog).where(MoodLog.user_id == user_id).order_by(MoodLog.created_at.desc()).limit(limit)
+    # Get mood logs for a user newest first, limited by 'limit' and optionally older than a (created_at, id) cursor
+    async def get_mood_logs(self, user_id: int | str, limit: int = 10, before: Optional[tuple[datetime, int]] = None) -> list[MoodLog]:
+        query = select(MoodLog).where(MoodLog.user_id == user_ref(user_id))
+
+        if before is not None:
+            created_at, log_id = before
+            # Keyset condition, the leading created_at bound lets the index seek straight to the page
+            query = query.where(
+                (MoodLog.created_at <= created_at) &
+                ((MoodLog.created_at < created_at) | (MoodLog.id < log_id))
+            )
+
+        result = await self.session.execute(
+            query.order_by(MoodLog.created_at.desc(), MoodLog.id.desc()).limit(limit)
+        )
+        return list(result.scalars().all())
+
+    # Stream the mood logs of a user oldest first as plain rows, batch_size rows at a time through a server-side cursor
+    async def stream_mood_logs(self,
+                               user_id: int | str,
+                               batch_size: int = 1000,
+                               start: Optional[datetime] = None,
+                               end: Optional[datetime] = None) -> AsyncIterator[list]:
+        query = select(
+            MoodLog.id,
+            MoodLog.created_at,
+            MoodLog.mood_value,
+            MoodLog.energy_level,
+            MoodLog.notes,
+            MoodLog.weather
+        ).where(MoodLog.user_id == user_ref(user_id))
+        # start is inclusive and end exclusive, so adjacent windows never share a log
+        if start is not None:
+            query = query.where(MoodLog.created_at >= start)
+        if end is not None:
+            query = query.where(MoodLog.created_at < end)
+
+        result = await self.session.stream(
+            query.order_by(MoodLog.created_at, MoodLog.id).execution_options(yield_per=batch_size)
         )
-        mood_logs = result.scalars().all()
 
-        return sorted(mood_logs, key=lambda log: log.created_at, reverse=True)
+        async for partition in result.partitions():
+            yield partition
+
+    # Get one page of mood logs and the cursor of the next (older) page, None on the last page
+    async def get_mood_log_page(self, user_id: int | str, limit: int = 20, before: Optional[tuple[datetime, int]] = None) -> tuple[list[MoodLog], Optional[str]]:
+        mood_logs = await self.get_mood_logs(user_id, limit=limit + 1, before=before)
+        page = mood_logs[:limit]
+        next_cursor = encode_cursor(page[-1]) if len(mood_logs) > limit else None
+        return page, next_cursor
 
     # Get average mood, energy level, and total logs for a user
-    async def get_mood_stats(self, user_id: int) -> dict:
-        result = self.session.execute(
+    @cached_stats
+    async def get_mood_stats(self, user_id: int | str) -> dict:
+        result = await self.session.execute(
             select(
-                func.avg(MoodLog.mood_value).label("avg_mood"),
-                func.avg(MoodLog.energy_level).label("avg_energy"),
-                func.count(MoodLog.id).label("total_logs")
-            ).where(MoodLog.user_id == user_id)
+                func.sum(MoodDailyRollup.mood_sum).label("mood_sum"),
+                func.sum(MoodDailyRollup.energy_sum).label("energy_sum"),
+                func.sum(MoodDailyRollup.log_count).label("total_logs")
+            ).where(MoodDailyRollup.user_id == user_ref(user_id))
         )
 
         stats = result.first()
+        total_logs = stats.total_logs or 0
 
         return {
-            "avg_mood": round(float(stats.avg_mood or 0), 2),
-            "avg_energy": round(float(stats.avg_energy or 0), 2),
-            "total_logs": stats.total_logs or 0
+            "avg_mood": round(stats.mood_sum / total_logs, 2) if total_logs else 0.0,
+            "avg_energy": round(stats.energy_sum / total_logs, 2) if total_logs else 0.0,
+            "total_logs": total_logs
         }
     
     # Get average mood, energy level, and total logs for all days of a week
-    async def get_weekly_mood_stats(self, user_id: int) -> list[dict]:
+    @cached_stats
+    async def get_weekly_mood_stats(self, user_id: int | str) -> list[dict]:
         """
         Get stats based on the days of the week
 
@@ -133,124 +351,178 @@ class MoodLogRepositoryV2():
         ...
         """
 
-        result = self.session.execute(
-            select(MoodLog).where(MoodLog.user_id == user_id)
-        )
-        logs = result.scalars().all()
-
-        weekday_groups = defaultdict(list)
+        weekday = day_of_week(MoodDailyRollup.day, self.session.get_bind().dialect.name)
 
-        for log in logs:
-            weekday_number = log.created_at.weekday()
-            weekday_name = calendar.day_name[weekday_number]
-            weekday_groups[weekday_name].append(log)
+        result = await self.session.execute(
+            select(
+                weekday.label("weekday"),
+                func.sum(MoodDailyRollup.mood_sum).label("mood_sum"),
+                func.sum(MoodDailyRollup.energy_sum).label("energy_sum"),
+                func.sum(MoodDailyRollup.log_count).label("total_logs")
+            ).where(MoodDailyRollup.user_id == user_ref(user_id))
+            .group_by(weekday)
+        )
 
         weekly_stats = []
 
-        for day, logs_for_day in weekday_groups.items():
-            if len(logs_for_day) == 0:
-                continue
-
-            avg_mood = sum(log.mood_value for log in logs_for_day) / len(logs_for_day)
-            avg_energy = sum(log.energy_level for log in logs_for_day) / len(logs_for_day)
-            total_logs = len(logs_for_day)
-
+        # SQL numbers days from Sunday = 0, shift so the list always runs Monday to Sunday
+        for entry in sorted(result.all(), key=lambda entry: (int(entry.weekday) + 6) % 7):
             weekly_stats.append({
-                "day": day,
-                "avg_mood": avg_mood,
-                "avg_energy": avg_energy,
-                "total_logs": total_logs,
+                "day": calendar.day_name[(int(entry.weekday) + 6) % 7],
+                "avg_mood": entry.mood_sum / entry.total_logs,
+                "avg_energy": entry.energy_sum / entry.total_logs,
+                "total_logs": entry.total_logs,
             })
 
         return weekly_stats
     
-    # Get average mood, energy level, and total logs for each weather condition
-    async def get_weather_mood_stats(self, user_id: int) -> list[dict]:
+    # Get average mood, energy level, and total logs for each weather condition and temperature band
+    @cached_stats
+    async def get_weather_mood_stats(self, user_id: int | str) -> list[dict]:
         """
-        Get stats based on weather conditions
+        Get stats based on weather conditions, split into temperature bands
 
         Example:
-        Sunny: avg_mood, avg_energy, total_logs
-        Rainy: avg_mood, avg_energy, total_logs
+        light rain, 10 to 15°C: avg_mood, avg_energy, total_logs
+        sunny, 20 to 25°C: avg_mood, avg_energy, total_logs
+        overcast, no temperature: avg_mood, avg_energy, total_logs
         ...
         """
 
-        result = self.session.execute(
+        result = await self.session.execute(
             select(
-                MoodLog.weather,
-                func.avg(MoodLog.mood_value).label("avg_mood"),
-                func.avg(MoodLog.energy_level).label("avg_energy"),
-                func.count(MoodLog.id).label("total_logs")
-            ).where(
-                (MoodLog.user_id == user_id) &
-                (MoodLog.weather.isnot(None)) &
-                (MoodLog.weather != "")
-            )
-            .group_by(MoodLog.weather)
-            .order_by(MoodLog.weather)
+                WeatherCondition.name,
+                MoodDailyWeatherRollup.temperature_band,
+                func.sum(MoodDailyWeatherRollup.mood_sum).label("mood_sum"),
+                func.sum(MoodDailyWeatherRollup.energy_sum).label("energy_sum"),
+                func.sum(MoodDailyWeatherRollup.log_count).label("total_logs")
+            ).join(WeatherCondition, WeatherCondition.id == MoodDailyWeatherRollup.weather_condition_id)
+            .where(MoodDailyWeatherRollup.user_id == user_ref(user_id))
+            .group_by(MoodDailyWeatherRollup.weather_condition_id, WeatherCondition.name, MoodDailyWeatherRollup.temperature_band)
+            .order_by(WeatherCondition.name, MoodDailyWeatherRollup.temperature_band)
         )
 
         weather_stats = []
 
         for entry in result.all():
             weather_stats.append({
-                "weather": entry.weather,
-                "avg_mood": round(float(entry.avg_mood or 0), 2),
-                "avg_energy": round(float(entry.avg_energy or 0), 2),
-                "total_logs": entry.total_logs or 0
+                "weather": entry.name,
+                "temperature_band": temperature_band_label(entry.temperature_band),
+                "avg_mood": round(entry.mood_sum / entry.total_logs, 2),
+                "avg_energy": round(entry.energy_sum / entry.total_logs, 2),
+                "total_logs": entry.total_logs
             })
 
         return weather_stats
     
-    # Calculate running means for mood and energy levels for each day
-    async def get_running_means(self, user_id: int, limit: int = 20) -> list[dict]:
+    # Calculate running means for mood and energy levels over a user's whole history
+    @cached_stats
+    async def get_running_means(self,
+                                user_id: int | str,
+                                limit: int = 20,
+                                start: Optional[date] = None,
+                                end: Optional[date] = None,
+                                resolution: str = "day") -> list[dict]:
         """
-        Average mood and energy aggregated by day, ordered by most recent date.
+        Cumulative mean of mood and energy, one point per day, week or month, ordered by most recent date.
         For example, the average on 2024-10-01 would be the mean of all mood and energy logs
-        created on and before 2024-10-01.
-        """
+        created on and before 2024-10-01, even when the window starts after the first log.
 
-        result = self.session.execute(
-            select(
-                func.date(MoodLog.created_at).label("log_date"),
-                func.avg(MoodLog.mood_value).label("avg_mood"),
-                func.avg(MoodLog.energy_level).label("avg_energy")
-            ).where(MoodLog.user_id == user_id)
-            .group_by(func.date(MoodLog.created_at))
-            .order_by(func.date(MoodLog.created_at).desc())
+        Weekly and monthly points carry the cumulative mean as of the last logged day in the period
+        and are dated by the start of the period. start/end bound the returned points, limit keeps the newest.
+        """
+        if resolution not in RESOLUTIONS:
+            raise ValueError(f"Unknown resolution: {resolution}")
+
+        dialect_name = self.session.get_bind().dialect.name
+        running_order = MoodDailyRollup.day
+
+        # Accumulate over the full history first so the window never forgets earlier days
+        cumulative = select(
+            MoodDailyRollup.day,
+            func.sum(MoodDailyRollup.mood_sum).over(order_by=running_order).label("mood_total"),
+            func.sum(MoodDailyRollup.energy_sum).over(order_by=running_order).label("energy_total"),
+            func.sum(MoodDailyRollup.log_count).over(order_by=running_order).label("log_total")
+        ).where(MoodDailyRollup.user_id == user_ref(user_id)).subquery()
+
+        period = date_bucket(cumulative.c.day, resolution, dialect_name)
+        in_window = select(
+            period.label("period"),
+            cumulative.c.mood_total,
+            cumulative.c.energy_total,
+            cumulative.c.log_total,
+            func.row_number().over(partition_by=period, order_by=cumulative.c.day.desc()).label("period_rank")
+        )
+        if start is not None:
+            in_window = in_window.where(cumulative.c.day >= start)
+        if end is not None:
+            in_window = in_window.where(cumulative.c.day <= end)
+        in_window = in_window.subquery()
+
+        result = await self.session.execute(
+            select(in_window)
+            .where(in_window.c.period_rank == 1)
+            .order_by(in_window.c.period.desc())
             .limit(limit)
         )
 
-        daily_averages = result.all()
-
         running_means = []
-        cumulative_mood = 0.0
-        cumulative_energy = 0.0
-        total_days = 0
-
-        for entry in daily_averages:
-            total_days += 1
-            cumulative_mood += float(entry.avg_mood or 0)
-            cumulative_energy += float(entry.avg_energy or 0)
-
-            running_mean_mood = round(cumulative_mood / total_days, 2)
-            running_mean_energy = round(cumulative_energy / total_days, 2)
 
+        for entry in result.all():
             running_means.append({
-                "date": entry.log_date.isoformat(),
-                "avg_mood": running_mean_mood,
-                "avg_energy": running_mean_energy
+                "date": entry.period.isoformat(),
+                "avg_mood": round(entry.mood_total / entry.log_total, 2),
+                "avg_energy": round(entry.energy_total / entry.log_total, 2)
             })
 
         return running_means
     
+    # Get the per-day mood and energy averages of a user, oldest first, optionally only from 'since' on
+    @cached_stats
+    async def get_daily_stats(self, user_id: int | str, since: Optional[date] = None) -> list[dict]:
+        query = select(
+            MoodDailyRollup.day,
+            MoodDailyRollup.log_count,
+            MoodDailyRollup.mood_sum,
+            MoodDailyRollup.energy_sum
+        ).where(MoodDailyRollup.user_id == user_ref(user_id))
+        if since is not None:
+            query = query.where(MoodDailyRollup.day >= since)
+
+        result = await self.session.execute(query.order_by(MoodDailyRollup.day))
+
+        daily_stats = []
+
+        for entry in result.all():
+            daily_stats.append({
+                "day": entry.day,
+                "avg_mood": round(entry.mood_sum / entry.log_count, 2),
+                "avg_energy": round(entry.energy_sum / entry.log_count, 2),
+                "total_logs": entry.log_count
+            })
+
+        return daily_stats
+
     # Clear all mood logs for a user (for testing purposes)
-    async def clear_mood_logs(self, user_id: int):
-        self.session.execute(
-            MoodLog.__table__.delete().where(MoodLog.user_id == user_id)
+    async def clear_mood_logs(self, user_id: int | str):
+        if isinstance(user_id, str):
+            user_id = await self.resolve_user_id(user_id)
+            if user_id is None:
+                return
+
+        await self.session.execute(
+            MoodLog.__table__.delete().where(MoodLog.user_id == user_ref(user_id))
+        )
+        await self.session.execute(
+            delete(MoodDailyRollup).where(MoodDailyRollup.user_id == user_ref(user_id))
+        )
+        await self.session.execute(
+            delete(MoodDailyWeatherRollup).where(MoodDailyWeatherRollup.user_id == user_ref(user_id))
         )
 
-        self.session.commit()
+        await self.session.commit()
+        await stats_cache.bump(user_id)
+        await event_bus.publish(MoodLogEvent(user_id, MOOD_LOGS_CLEARED))
     
     async def create_log_on_date(self,
                                 user_id: int,
@@ -259,30 +531,262 @@ class MoodLogRepositoryV2():
                                 date: datetime,
                                 notes: Optional[str] = None,
                                 weather: Optional[str] = None):
+        row = {
+            "user_id": user_id,
+            "mood_value": mood_value,
+            "energy_level": energy_level,
+            "notes": notes,
+            "weather": weather,
+            "created_at": date
+        }
+
         try:
-            self.session.execute(insert(MoodLog), [{
-                "user_id": user_id,
-                "mood_value": mood_value,
-                "energy_level": energy_level,
-                "notes": notes,
-                "weather": weather,
-                "created_at": date
-            }])
-            self.session.commit()
-            return MoodLog(
-                user_id=user_id,
-                mood_value=mood_value,
-                energy_level=energy_level,
-                notes=notes,
-                weather=weather,
-                created_at=date
-            )
+            await self._add_weather_fields([row])
+            await self.session.execute(insert(MoodLog), [row])
+            await self._refresh_rollups(user_id, {date.date()})
+            await self.session.commit()
+            await stats_cache.bump(user_id)
+            await self._publish_created(user_id, [row])
+            return MoodLog(**row)
         except IntegrityError:
-            self.session.rollback()
+            await self.session.rollback()
             return None
 
+    # Resolve many usernames at once, cached ones first and the rest in a single query
+    async def resolve_user_ids(self, usernames: set[str]) -> dict[str, int]:
+        user_ids = {}
+        missing = []
+        for username in usernames:
+            user_id = cached_user_id(username)
+            if user_id is None:
+                missing.append(username)
+            else:
+                user_ids[username] = user_id
+
+        if missing:
+            result = await self.session.execute(select(User.name, User.id).where(User.name.in_(missing)))
+            for username, user_id in result.all():
+                remember_user_id(username, user_id)
+                user_ids[username] = user_id
+
+        return user_ids
+
+    # Insert many mood logs in one transaction, rows are dicts of MoodLog columns with a resolved user_id
+    async def bulk_create_mood_logs(self, rows: list[dict]) -> int:
+        if not rows:
+            return 0
+
+        now = datetime.utcnow()
+        touched_days: dict[int, set[date]] = {}
+        user_rows: dict[int, list[dict]] = {}
+        for row in rows:
+            if row.get("created_at") is None:
+                row["created_at"] = now
+            touched_days.setdefault(row["user_id"], set()).add(row["created_at"].date())
+            user_rows.setdefault(row["user_id"], []).append(row)
 
-def get_mood_log_repository_v2(db: Session = Depends(get_db)) -> MoodLogRepositoryV2:
+        try:
+            await self._add_weather_fields(rows)
+            if self.session.get_bind().dialect.name == "postgresql":
+                # One multi-row INSERT per chunk instead of a round trip per row
+                for statement in bulk_insert_statements(rows):
+                    await self.session.execute(statement)
+            else:
+                await self.session.execute(insert(MoodLog), rows)
+
+            # Lock every user up front and in id order, so two batches over the same users cannot deadlock
+            await self._lock_rollups(touched_days)
+            for user_id, days in touched_days.items():
+                await self._refresh_rollup_range(user_id, min(days), max(days))
+
+            await self.session.commit()
+        except IntegrityError:
+            await self.session.rollback()
+            raise
+
+        await stats_cache.bump(*touched_days)
+        for user_id, created in user_rows.items():
+            await self._publish_created(user_id, created)
+        return len(rows)
+
+    # Tell open pages about committed logs; big batches only say that something was imported
+    async def _publish_created(self, user_id: int, rows: list[dict]):
+        if len(rows) > EVENT_MAX_LOGS:
+            await event_bus.publish(MoodLogEvent(user_id, MOOD_LOGS_IMPORTED))
+            return
+
+        logs = sorted((MoodLogResponse(**row) for row in rows), key=lambda log: log.created_at)
+        await event_bus.publish(MoodLogEvent(user_id, MOOD_LOG_CREATED, logs))
+
+    # Ids of weather condition names, creating the missing ones; concurrent writers may race to insert the same name
+    async def get_weather_condition_ids(self, names: set[str]) -> dict[str, int]:
+        condition_ids = {}
+        missing = []
+        for name in names:
+            condition_id = weather_condition_ids.get(name)
+            if condition_id is None:
+                missing.append(name)
+            else:
+                condition_ids[name] = condition_id
+
+        if missing:
+            result = await self.session.execute(
+                select(WeatherCondition.name, WeatherCondition.id).where(WeatherCondition.name.in_(missing))
+            )
+            for name, condition_id in result.all():
+                weather_condition_ids.set(name, condition_id)
+                condition_ids[name] = condition_id
+            missing = [name for name in missing if name not in condition_ids]
+
+        if missing:
+            # Not cached, the insert is part of the caller's transaction and is gone if it rolls back
+            dialect = postgresql if self.session.get_bind().dialect.name == "postgresql" else sqlite
+            await self.session.execute(
+                dialect.insert(WeatherCondition).values([{"name": name} for name in missing]).on_conflict_do_nothing()
+            )
+            result = await self.session.execute(
+                select(WeatherCondition.name, WeatherCondition.id).where(WeatherCondition.name.in_(missing))
+            )
+            condition_ids.update(result.all())
+
+        return condition_ids
+
+    # Fill temperature_c and weather_condition_id of rows about to be inserted from their weather text
+    async def _add_weather_fields(self, rows: list[dict]):
+        parsed = [parse_weather(row.get("weather")) for row in rows]
+        condition_ids = await self.get_weather_condition_ids({condition for _, condition in parsed if condition})
+
+        for row, (temperature_c, condition) in zip(rows, parsed):
+            row["temperature_c"] = temperature_c
+            row["weather_condition_id"] = condition_ids.get(condition)
+
+    # Parse the weather text of logs written before the structured columns existed, one commit per batch
+    async def backfill_weather_fields(self, batch_size: int = 5000) -> int:
+        updated = 0
+        last_id = 0
+
+        while True:
+            result = await self.session.execute(
+                select(MoodLog.id, MoodLog.weather)
+                .where(
+                    (MoodLog.id > last_id) &
+                    (MoodLog.weather_condition_id.is_(None)) &
+                    (MoodLog.weather.isnot(None)) &
+                    (MoodLog.weather != "")
+                )
+                .order_by(MoodLog.id)
+                .limit(batch_size)
+            )
+            batch = [{"id": log_id, "weather": weather} for log_id, weather in result.all()]
+            if not batch:
+                return updated
+
+            await self._add_weather_fields(batch)
+            await self.session.execute(
+                update(MoodLog),
+                [{"id": row["id"], "temperature_c": row["temperature_c"], "weather_condition_id": row["weather_condition_id"]} for row in batch]
+            )
+            await self.session.commit()
+
+            updated += len(batch)
+            last_id = batch[-1]["id"]
+
+    # Writers of the same user wait for each other here until commit, so a recompute always sees the logs
+    # committed before it and two recomputes of one day cannot interleave. NO KEY UPDATE does not conflict
+    # with the KEY SHARE lock the mood_logs foreign key takes on insert. SQLite serializes writers by itself.
+    async def _lock_rollups(self, user_ids):
+        if self.session.get_bind().dialect.name == "postgresql":
+            await self.session.execute(
+                select(User.id).where(User.id.in_(sorted(user_ids))).order_by(User.id).with_for_update(key_share=True)
+            )
+
+    # Insert the daily rollup rows of a select, replacing the rows of days that already have one
+    async def _upsert_daily_rollups(self, rollups):
+        dialect = postgresql if self.session.get_bind().dialect.name == "postgresql" else sqlite
+        stmt = dialect.insert(MoodDailyRollup).from_select(DAILY_ROLLUP_COLUMNS, rollups)
+        await self.session.execute(stmt.on_conflict_do_update(
+            index_elements=[MoodDailyRollup.user_id, MoodDailyRollup.day],
+            set_={column: stmt.excluded[column] for column in DAILY_ROLLUP_COLUMNS if column not in ("user_id", "day")}
+        ))
+
+    # Recompute the rollup rows of the given days for a user, in the caller's transaction
+    async def _refresh_rollups(self, user_id: int, days: set[date]):
+        await self._lock_rollups([user_id])
+        for day in days:
+            day_start = datetime(day.year, day.month, day.day)
+            in_day = (
+                (MoodLog.user_id == user_id) &
+                (MoodLog.created_at >= day_start) &
+                (MoodLog.created_at < day_start + timedelta(days=1))
+            )
+
+            await self._upsert_daily_rollups(daily_rollup_select(literal(day, Date), in_day, [MoodLog.user_id]))
+            await self.session.execute(
+                delete(MoodDailyWeatherRollup).where((MoodDailyWeatherRollup.user_id == user_id) & (MoodDailyWeatherRollup.day == day))
+            )
+            await self.session.execute(
+                insert(MoodDailyWeatherRollup).from_select(
+                    WEATHER_ROLLUP_COLUMNS,
+                    weather_rollup_select(literal(day, Date), in_day, [MoodLog.user_id])
+                )
+            )
+
+    # Recompute every rollup row between two days for a user with one grouped insert, used after bulk writes
+    async def _refresh_rollup_range(self, user_id: int, first: date, last: date):
+        log_day = func.date(MoodLog.created_at)
+        in_range = (
+            (MoodLog.user_id == user_id) &
+            (MoodLog.created_at >= datetime(first.year, first.month, first.day)) &
+            (MoodLog.created_at < datetime(last.year, last.month, last.day) + timedelta(days=1))
+        )
+
+        await self._upsert_daily_rollups(daily_rollup_select(log_day, in_range, [MoodLog.user_id, log_day]))
+        await self.session.execute(
+            delete(MoodDailyWeatherRollup).where(
+                (MoodDailyWeatherRollup.user_id == user_id) & (MoodDailyWeatherRollup.day >= first) & (MoodDailyWeatherRollup.day <= last)
+            )
+        )
+        await self.session.execute(
+            insert(MoodDailyWeatherRollup).from_select(
+                WEATHER_ROLLUP_COLUMNS,
+                weather_rollup_select(log_day, in_range, [MoodLog.user_id, log_day])
+            )
+        )
+
+    # Rebuild the rollup tables from mood_logs, for one user or every user, one commit per user
+    async def rebuild_rollups(self, user_id: Optional[int] = None) -> int:
+        if user_id is None:
+            result = await self.session.execute(select(MoodLog.user_id).distinct())
+            user_ids = result.scalars().all()
+        else:
+            user_ids = [user_id]
+
+        for uid in user_ids:
+            log_day = func.date(MoodLog.created_at)
+            user_logs = (MoodLog.user_id == uid) & (MoodLog.created_at.isnot(None))
+
+            await self._lock_rollups([uid])
+            await self.session.execute(delete(MoodDailyRollup).where(MoodDailyRollup.user_id == uid))
+            await self.session.execute(delete(MoodDailyWeatherRollup).where(MoodDailyWeatherRollup.user_id == uid))
+            await self.session.execute(
+                insert(MoodDailyRollup).from_select(
+                    DAILY_ROLLUP_COLUMNS,
+                    daily_rollup_select(log_day, user_logs, [MoodLog.user_id, log_day])
+                )
+            )
+            await self.session.execute(
+                insert(MoodDailyWeatherRollup).from_select(
+                    WEATHER_ROLLUP_COLUMNS,
+                    weather_rollup_select(log_day, user_logs, [MoodLog.user_id, log_day])
+                )
+            )
+            await self.session.commit()
+            await stats_cache.bump(uid)
+
+        return len(user_ids)
+
+
+def get_mood_log_repository_v2(db: AsyncSession = Depends(get_async_db)) -> MoodLogRepositoryV2:
     return MoodLogRepositoryV2(db)
 
 class MoodLogCreate(BaseModel):
@@ -292,7 +796,16 @@ class MoodLogCreate(BaseModel):
     notes: Optional[str] = None
     weather: Optional[str] = None
 
+class MoodLogBulkEntry(BaseModel):
+    username: str
+    mood_value: int = Field(ge=1, le=5)
+    energy_level: int = Field(ge=1, le=5)
+    notes: Optional[str] = None
+    weather: Optional[str] = None
+    created_at: Optional[datetime] = None
+
 class MoodLogResponse(BaseModel):
+    id: Optional[int] = None
     user_id: int
     mood_value: int
     energy_level: int
@@ -306,10 +819,11 @@ class MoodLogResponse(BaseModel):
     @classmethod
     def from_db_model(cls, mood_log: MoodLog) -> "MoodLogResponse":
         return cls(
+            id=mood_log.id,
             user_id=mood_log.user_id,
             mood_value=mood_log.mood_value,
             energy_level=mood_log.energy_level,
             notes=mood_log.notes,
             weather=mood_log.weather,
-            created_at=datetime.utcnow()  # or mood_log.created_at if you want the original timestamp
+            created_at=mood_log.created_at or datetime.utcnow()
         )
\ No newline at end of file
@@ -0,0 +1,163 @@
+"""
+Versioned cache for per-user aggregate queries.
+
+The default InProcessStatsBackend is per process: a write bumps the user's version only in the worker that
+handled it. With several uvicorn workers, another worker keeps serving the stats it cached before the write
+until its entries, version numbers included, expire after STATS_CACHE_TTL seconds. Staleness across workers
+is bounded by that TTL and nothing stricter; a shared StatsCacheBackend is needed for more.
+"""
+import functools
+import itertools
+import os
+from collections import Counter
+from typing import Any, Awaitable, Callable, Hashable, Optional
+
+from src.shared.cache import TTLCache
+
+# Also how long another worker may serve stats from before a write, see above
+STATS_CACHE_TTL = float(os.getenv("STATS_CACHE_TTL", 300))
+STATS_CACHE_SIZE = int(os.getenv("STATS_CACHE_SIZE", 10000))
+STATS_CACHE_ENABLED = os.getenv("STATS_CACHE_ENABLED", "1") != "0"
+
+
+class StatsCacheBackend():
+    """
+    Storage for the stats cache. Async so a shared backend can sit behind the same calls.
+    """
+
+    async def get(self, key: Hashable) -> Any:
+        raise NotImplementedError
+
+    async def set(self, key: Hashable, value: Any):
+        raise NotImplementedError
+
+    async def next_version(self) -> int:
+        """
+        A version number never handed out before, so entries stored under an older one can never match it
+        """
+        raise NotImplementedError
+
+    async def clear(self):
+        raise NotImplementedError
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = await self.get(key)
+        if value is None:
+            value = await loader()
+            await self.set(key, value)
+        return value
+
+    def stats(self) -> dict:
+        return {}
+
+
+class InProcessStatsBackend(StatsCacheBackend):
+    """
+    Size-bounded LRU in this process, concurrent loads of the same key share one query
+    """
+
+    def __init__(self, maxsize: int = STATS_CACHE_SIZE, ttl: Optional[float] = STATS_CACHE_TTL):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.versions = itertools.count(1)
+
+    async def get(self, key: Hashable) -> Any:
+        return self.entries.get(key)
+
+    async def set(self, key: Hashable, value: Any):
+        self.entries.set(key, value)
+
+    async def next_version(self) -> int:
+        return next(self.versions)
+
+    async def clear(self):
+        # The version counter keeps going, so nothing cached before the clear can be read again
+        self.entries.clear()
+
+    async def get_or_load(self, key: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        return await self.entries.get_or_load(key, loader)
+
+    def stats(self) -> dict:
+        return self.entries.stats()
+
+
+class StatsCache():
+    """
+    Per-user aggregates keyed by (user_id, data_version, query). Writes bump the user's version,
+    which orphans everything cached for the old one; orphaned entries age out of the backend.
+    """
+
+    def __init__(self, backend: StatsCacheBackend, enabled: bool = True):
+        self.backend = backend
+        self.enabled = enabled
+        self.lookups = Counter()
+        self.misses = Counter()
+
+    async def version(self, user_id: int) -> int:
+        version = await self.backend.get(("version", user_id))
+        if version is None:
+            # Evicted or never written, a fresh version cannot collide with entries cached before
+            version = await self.backend.next_version()
+            await self.backend.set(("version", user_id), version)
+        return version
+
+    async def bump(self, *user_ids: int):
+        for user_id in user_ids:
+            await self.backend.set(("version", user_id), await self.backend.next_version())
+
+    async def bump_all(self):
+        await self.backend.clear()
+
+    async def get_or_compute(self, user_id: int, name: str, params: Hashable, loader: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.enabled:
+            return await loader()
+
+        async def load():
+            self.misses[name] += 1
+            return await loader()
+
+        self.lookups[name] += 1
+        key = ("stats", user_id, await self.version(user_id), name, params)
+        return await self.backend.get_or_load(key, load)
+
+    def stats(self) -> dict:
+        queries = {}
+        for name, lookups in sorted(self.lookups.items()):
+            hits = lookups - self.misses[name]
+            queries[name] = {"hits": hits, "misses": self.misses[name], "hit_ratio": round(hits / lookups, 4)}
+
+        lookups = sum(self.lookups.values())
+        hits = lookups - sum(self.misses.values())
+        return {
+            "enabled": self.enabled,
+            "hits": hits,
+            "misses": lookups - hits,
+            "hit_ratio": round(hits / lookups, 4) if lookups else 0.0,
+            "queries": queries,
+            "backend": self.backend.stats(),
+        }
+
+    async def clear(self):
+        await self.backend.clear()
+        self.lookups.clear()
+        self.misses.clear()
+
+
+stats_cache = StatsCache(InProcessStatsBackend(), enabled=STATS_CACHE_ENABLED)
+
+
+def cached_stats(method):
+    """
+    Serve a repository aggregate from stats_cache, keyed by the remaining arguments
+    """
+    @functools.wraps(method)
+    async def wrapper(repo, user_id: int | str, *args, **kwargs):
+        if isinstance(user_id, str):
+            resolved = await repo.resolve_user_id(user_id)
+            if resolved is None:
+                return await method(repo, user_id, *args, **kwargs)
+            user_id = resolved
+
+        params = (args, tuple(sorted(kwargs.items())))
+        return await stats_cache.get_or_compute(user_id, method.__name__, params, lambda: method(repo, user_id, *args, **kwargs))
+
+    return wrapper
@@ -0,0 +1,33 @@
+import re
+from typing import Optional
+
+# Temperatures are grouped into bands this many degrees wide for the weather stats
+TEMPERATURE_BAND_WIDTH = 5
+
+# Strings written by the home page look like "12°C – light rain", or just "light rain" without a location
+WEATHER_PATTERN = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*°?\s*C\s*[–—-]\s*(.*?)\s*$", re.IGNORECASE)
+CONDITION_MAX_LENGTH = 100
+
+
+def parse_weather(weather: Optional[str]) -> tuple[Optional[float], Optional[str]]:
+    """
+    Split a free-text weather string into (temperature in °C, normalized condition name)
+    """
+    if not weather or not weather.strip():
+        return None, None
+
+    match = WEATHER_PATTERN.match(weather)
+    if match is None:
+        return None, weather.strip().lower()[:CONDITION_MAX_LENGTH]
+
+    condition = match.group(2).lower()[:CONDITION_MAX_LENGTH] or None
+    return float(match.group(1)), condition
+
+
+def temperature_band_label(band: Optional[int]) -> Optional[str]:
+    """
+    Human readable range of a band, identified by its lower bound
+    """
+    if band is None:
+        return None
+    return f"{band} to {band + TEMPERATURE_BAND_WIDTH}°C"
@@ -0,0 +1,101 @@
+import pytest
+import asyncio
+
+from pwdlib import PasswordHash
+
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+from sqlalchemy import create_engine, text
+
+from user_service_v2.models.user import (
+    Base,
+    UserRepositoryV2,
+    get_user_repository_v2
+)
+
+from src.shared.models import MoodLogRepositoryV2, get_mood_log_repository_v2, weather_condition_ids
+from src.shared.identity import identity_cache
+from src.shared.stats_cache import stats_cache
+from mindfuly.api import app
+
+"""
+FIXTURES AND HELPERS
+"""
+
+@pytest.fixture(autouse=True)
+def clear_identity_cache():
+    identity_cache.clear()
+    weather_condition_ids.clear()
+    # Test databases reuse user ids, so nothing cached for one test may leak into the next
+    asyncio.run(stats_cache.clear())
+    yield
+
+@pytest.fixture(scope='function')
+def engine():
+    engine = create_engine("sqlite:///:memory:?check_same_thread=False")
+    Base.metadata.create_all(bind=engine)
+    yield engine
+
+@pytest.fixture(scope='function')
+def session(engine):
+    conn = engine.connect()
+    conn.begin()
+    db = Session(bind=conn)
+    yield db
+    db.rollback()
+    conn.close()
+
+@pytest.fixture(scope='function')
+def repo_v2(session):
+    yield UserRepositoryV2(session)
+
+@pytest.fixture(scope='function')
+def async_engine():
+    # StaticPool keeps the single in-memory aiosqlite connection alive across event loops
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:", poolclass=StaticPool)
+
+    async def create_tables():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_tables())
+    yield engine
+    asyncio.run(engine.dispose())
+
+@pytest.fixture(scope='function')
+def async_session(async_engine):
+    AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False, class_=AsyncSession)
+    db = AsyncSessionLocal()
+    yield db
+    asyncio.run(db.close())
+
+@pytest.fixture(scope='function')
+def mood_repo(async_session):
+    yield MoodLogRepositoryV2(async_session)
+
+@pytest.fixture(scope='function')
+def client(repo_v2, mood_repo):
+    app.dependency_overrides[get_user_repository_v2] = lambda: repo_v2
+    app.dependency_overrides[get_mood_log_repository_v2] = lambda: mood_repo
+    with TestClient(app) as c:
+        yield c
+    app.dependency_overrides.clear()
+
+@pytest.fixture(scope='function')
+def created_user(session, async_session):
+    # Store a proper hashed password so repository verify_password (pwdlib) can identify it
+    hashed = PasswordHash.recommended().hash("bass")
+    user_data = {"name": "foo", "id": 5,  "email": "fee", "hashed_password": hashed, "tier": 1}
+    insert_user = text("INSERT INTO users (name, id, email, hashed_password, tier) VALUES (:name, :id, :email, :hashed_password, :tier)")
+    session.execute(insert_user, user_data)
+    session.commit()
+
+    # Production has one database, mirror the user into the async one so mood routes resolve it too
+    async def insert_async():
+        await async_session.execute(insert_user, user_data)
+        await async_session.commit()
+
+    asyncio.run(insert_async())
+    return user_data
@@ -1,58 +1,6 @@
-import pytest
 import asyncio
 
-from pwdlib import PasswordHash
-
-from fastapi.testclient import TestClient
-from sqlalchemy.orm import Session
-from sqlalchemy import create_engine, text
-
-from user_service_v2.models.user import (
-    Base,
-    UserRepositoryV2,
-    User,
-    get_user_repository_v2
-)
-
-from mindfuly.api import app
-
-"""
-FIXTURES AND HELPERS
-"""
-
-@pytest.fixture(scope='function')
-def engine():
-    engine = create_engine("sqlite:///:memory:?check_same_thread=False")
-    Base.metadata.create_all(bind=engine)
-    yield engine
-
-@pytest.fixture(scope='function')
-def session(engine):
-    conn = engine.connect()
-    conn.begin()
-    db = Session(bind=conn)
-    yield db
-    db.rollback()
-    conn.close()
-
-@pytest.fixture(scope='function')
-def repo_v2(session):
-    yield UserRepositoryV2(session)
-
-@pytest.fixture(scope='function')
-def client(repo_v2):
-    app.dependency_overrides[get_user_repository_v2] = lambda: repo_v2
-    with TestClient(app) as c:
-        yield c
-
-@pytest.fixture(scope='function')
-def created_user(session):
-    # Store a proper hashed password so repository verify_password (pwdlib) can identify it
-    hashed = PasswordHash.recommended().hash("bass")
-    user_data = {"name": "foo", "id": 5,  "email": "fee", "hashed_password": hashed, "tier": 1}
-    session.execute(text("INSERT INTO users (name, id, email, hashed_password, tier) VALUES (:name, :id, :email, :hashed_password, :tier)"), user_data)
-    session.commit()
-    return user_data
+from user_service_v2.models.user import User
 
 def test_delete_user(client, created_user):
     response = client.delete(f"/users/{created_user['id']}")
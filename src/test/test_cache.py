@@ -0,0 +1,128 @@
+import pytest
+import asyncio
+
+from src.shared.cache import TTLCache
+from src.shared.stats_cache import InProcessStatsBackend, StatsCache
+
+"""
+FIXTURES AND HELPERS
+"""
+
+class FakeClock():
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+"""
+TTL CACHE TESTS
+"""
+
+# Ensure that entries expire after their TTL
+def test_entries_expire():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=4, ttl=10, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 9.9
+    assert cache.get("a") == 1 # Entry should still be fresh
+    clock.now = 10.0
+    assert cache.get("a") is None # Entry should have expired
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1 # Counters should follow lookups
+
+# Ensure that the least recently used entry is evicted first
+def test_lru_eviction():
+    cache = TTLCache(maxsize=2, ttl=None)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("b") is None # Least recently used entry should be evicted
+    assert cache.get("a") == 1 and cache.get("c") == 3 # Recent entries should remain
+    assert cache.stats()["evictions"] == 1
+
+# Ensure that peeking neither counts a lookup nor keeps an entry from eviction
+def test_peek():
+    clock = FakeClock()
+    cache = TTLCache(maxsize=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    assert cache.peek("a") == 1 and cache.peek("missing") is None
+    assert cache.stats()["hits"] == 0 and cache.stats()["misses"] == 0 # Probes should not skew the counters
+    cache.set("c", 3)
+    assert cache.peek("a") is None # A peeked entry should still be the least recently used
+    clock.now = 10.0
+    assert cache.peek("b") is None # Expired entries should not be returned
+
+# Ensure that concurrent misses for one key trigger a single load
+def test_single_flight():
+    cache = TTLCache()
+    calls = []
+
+    async def loader():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def run():
+        return await asyncio.gather(*(cache.get_or_load("key", loader) for _ in range(10)))
+
+    assert asyncio.run(run()) == ["value"] * 10 # Every caller should get the value
+    assert len(calls) == 1 # Loader should run once
+    assert cache.stats()["coalesced"] == 9 # The other callers should wait on the same load
+
+# Ensure that failed loads are not cached
+def test_failed_load_not_cached():
+    cache = TTLCache()
+
+    async def failing():
+        raise RuntimeError("upstream down")
+
+    async def succeeding():
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(cache.get_or_load("key", failing))
+    assert asyncio.run(cache.get_or_load("key", succeeding)) == "ok" # Next call should load again
+
+"""
+STATS CACHE TESTS
+"""
+
+# Ensure that bumping a user's version orphans only that user's entries
+def test_stats_cache_versions():
+    cache = StatsCache(InProcessStatsBackend(maxsize=100, ttl=None))
+    loads = []
+
+    def loader(value):
+        async def load():
+            loads.append(value)
+            return value
+        return load
+
+    async def run():
+        await cache.get_or_compute(1, "stats", (), loader("a"))
+        await cache.get_or_compute(2, "stats", (), loader("b"))
+        assert await cache.get_or_compute(1, "stats", (), loader("stale")) == "a" # Unchanged data should be served from the cache
+        await cache.bump(1)
+        assert await cache.get_or_compute(1, "stats", (), loader("c")) == "c" # A write should force a reload
+        assert await cache.get_or_compute(2, "stats", (), loader("stale")) == "b" # Other users should keep their entries
+
+    asyncio.run(run())
+    assert loads == ["a", "b", "c"]
+    assert cache.stats()["queries"]["stats"] == {"hits": 2, "misses": 3, "hit_ratio": 0.4}
+
+# Ensure that an evicted version can never bring back entries cached before a write
+def test_stats_cache_evicted_version():
+    cache = StatsCache(InProcessStatsBackend(maxsize=3, ttl=None))
+
+    async def run():
+        await cache.get_or_compute(1, "stats", (), lambda: asyncio.sleep(0, "old"))
+        await cache.bump(1)
+        await cache.bump_all()
+        return await cache.get_or_compute(1, "stats", (), lambda: asyncio.sleep(0, "new"))
+
+    assert asyncio.run(run()) == "new" # Fresh versions should not collide with older ones
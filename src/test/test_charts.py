@@ -0,0 +1,90 @@
+import asyncio
+import math
+from datetime import date, datetime, timedelta
+
+from src.shared.charts import SERIES_ENCODINGS, decode_series, encode_chart_series, epoch_ms, load_chart_data, lttb, minmax_downsample
+
+"""
+DOWNSAMPLING TESTS
+"""
+
+# Ensure that LTTB keeps the endpoints and the spikes of a line series
+def test_lttb_keeps_extremes():
+    points = [(x, math.sin(x / 10)) for x in range(1000)]
+    points[500] = (500, 10.0)
+
+    sampled = lttb(points, 50)
+    assert len(sampled) == 50 # Should hit the target exactly
+    assert sampled[0] == points[0] and sampled[-1] == points[-1] # Endpoints should be kept
+    assert (500, 10.0) in sampled # A spike should survive downsampling
+    assert [x for x, _ in sampled] == sorted(x for x, _ in sampled) # Points should stay in time order
+
+    assert lttb(points[:10], 50) == points[:10] # Short series should pass through untouched
+
+# Ensure that min/max bucketing keeps the lowest and highest value of every bucket
+def test_minmax_downsample():
+    points = [(x, x % 5 + 1) for x in range(100)]
+
+    sampled = minmax_downsample(points, 20)
+    assert len(sampled) == 20 # Two points per bucket
+    assert {y for _, y in sampled} == {1, 5} # Extremes of every bucket should be kept
+    assert [x for x, _ in sampled] == sorted(x for x, _ in sampled)
+
+"""
+BINARY ENCODING TESTS
+"""
+
+# Ensure that series survive the typed array round trip and deltas use the narrowest type
+def test_encode_series_round_trip():
+    logs = [(epoch_ms(datetime(2024, 1, 1, 9) + timedelta(hours=5 * i)), i % 5 + 1) for i in range(1000)]
+    means = [(epoch_ms(date(2024, 1, 1) + timedelta(days=i)), round(1 + i % 400 / 100, 2)) for i in range(1000)]
+
+    encoded = encode_chart_series({"mood_logs": logs, "mood_running_mean": means})
+    assert decode_series(encoded["mood_logs"]) == logs # Log timestamps are whole seconds, nothing should be lost
+    assert decode_series(encoded["mood_running_mean"]) == means # Two decimals should survive the Int16 scaling
+    assert encoded["mood_logs"]["xType"] == "Uint16" # Five hours in seconds fits 16 bits
+    assert encoded["mood_running_mean"]["xType"] == "Uint8" # Consecutive days fit a byte
+    assert len(encoded["mood_logs"]["x"]) + len(encoded["mood_logs"]["y"]) <= 4010 # Three bytes a point, about four in base64
+
+    assert decode_series(encode_chart_series({"energy_logs": []})["energy_logs"]) == [] # Empty series should encode
+
+"""
+CHART DATA TESTS
+"""
+
+# Ensure that chart data is bounded by the point budget and a narrower range brings back finer detail
+def test_load_chart_data(mood_repo):
+    start = datetime(2024, 1, 1, 9)
+    rows = [
+        {"user_id": 5, "mood_value": i % 5 + 1, "energy_level": 3, "notes": None, "weather": None, "created_at": start + timedelta(hours=6 * i)}
+        for i in range(2000)
+    ]
+    asyncio.run(mood_repo.bulk_create_mood_logs(rows))
+
+    full = asyncio.run(load_chart_data(mood_repo, 5, points=100))
+    assert full["total_logs"] == 2000
+    assert full["newest_log_at"] == rows[-1]["created_at"] # Kept even when downsampling drops the newest point
+    assert all(len(points) <= 100 for points in full["series"].values()) # Every series should fit the budget
+    assert full["series"]["mood_running_mean"][0][0] == epoch_ms(date(2024, 1, 1)) # The line should start on the first day
+
+    zoomed = asyncio.run(load_chart_data(mood_repo, 5, start=date(2024, 2, 1), end=date(2024, 2, 7), points=100))
+    assert zoomed["total_logs"] == 28 # Four logs a day for a week
+    assert len(zoomed["series"]["mood_logs"]) == 28 # Few enough to send at full resolution
+    assert zoomed["series"]["mood_logs"][0][0] == epoch_ms(datetime(2024, 2, 1, 3))
+
+"""
+API TESTS
+"""
+
+# Ensure that the chart route validates the range
+def test_chart_route(client, created_user):
+    response = client.get(f"/mood/chart/{created_user['name']}?start=2024-02-01&end=2024-01-01")
+    assert response.status_code == 400 # Reversed ranges should be rejected
+
+    response = client.get(f"/mood/chart/{created_user['name']}")
+    assert response.status_code == 200
+    assert response.json()["total_logs"] == 0
+
+    response = client.get(f"/mood/chart/{created_user['name']}?encoding=binary")
+    assert response.json()["encoding"] == "typed-arrays-v1"
+    assert set(response.json()["series"]) == set(SERIES_ENCODINGS) # Every series should be packed
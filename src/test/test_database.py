@@ -0,0 +1,79 @@
+import pytest
+import threading
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+
+from src.shared import database
+from src.shared.database import PoolMetrics, TimedCheckoutPool, pool_settings, database_url, timeout_connect_args
+
+# Ensure that pool settings are read from the environment
+def test_pool_settings_from_env(monkeypatch):
+    monkeypatch.setenv("DATABASE_POOL_SIZE", "3")
+    monkeypatch.setenv("DATABASE_MAX_OVERFLOW", "7")
+    monkeypatch.setenv("DATABASE_POOL_PRE_PING", "false")
+
+    settings = pool_settings()
+    assert settings["pool_size"] == 3 # Pool size should match
+    assert settings["max_overflow"] == 7 # Overflow should match
+    assert settings["pool_pre_ping"] is False # Pre-ping should be disabled
+
+# Ensure that the URL carries the port and database name
+def test_database_url(monkeypatch):
+    monkeypatch.setenv("DATABASE_HOST", "db")
+    monkeypatch.setenv("DATABASE_USER", "user")
+    monkeypatch.setenv("DATABASE_PASSWORD", "pw")
+    monkeypatch.delenv("DATABASE_PORT", raising=False)
+    monkeypatch.delenv("DATABASE_NAME", raising=False)
+
+    assert database_url("postgresql+asyncpg") == "postgresql+asyncpg://user:pw@db:5432/user"
+
+# Ensure that checkout waits are aggregated
+def test_pool_metrics_wait():
+    metrics = PoolMetrics()
+    metrics.record_wait(0.1)
+    metrics.record_wait(0.3)
+
+    snapshot = metrics.snapshot()
+    assert snapshot["wait_count"] == 2 # Both waits should be counted
+    assert snapshot["wait_seconds_max"] == 0.3 # Max wait should match
+    assert snapshot["wait_seconds_avg"] == pytest.approx(0.2) # Average wait should match
+
+# Ensure that the statement timeout reaches both drivers and that 0 leaves it unset
+def test_timeout_connect_args():
+    assert timeout_connect_args(500) == ({"options": "-c statement_timeout=500"}, {"server_settings": {"statement_timeout": "500"}})
+    assert timeout_connect_args(0) == ({}, {}) # No timeout should mean no server setting
+
+
+class TimedQueuePool(TimedCheckoutPool, QueuePool):
+    pass
+
+# Ensure that only time spent waiting for a busy pool counts as waiting, not opening a connection
+def test_checkout_wait_excludes_connect(tmp_path, monkeypatch):
+    metrics = PoolMetrics()
+    monkeypatch.setattr(database, "pool_metrics", metrics)
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool, pool_size=1, max_overflow=0,
+                           connect_args={"check_same_thread": False})
+
+    held = engine.connect()
+    assert metrics.wait_seconds_total == 0.0 # The first checkout opened the connection, it did not wait
+
+    threading.Timer(0.1, held.close).start()
+    with engine.connect():
+        pass
+    assert metrics.wait_count == 2
+    assert metrics.wait_seconds_max >= 0.09 # The second checkout waited for the first to be returned
+    engine.dispose()
+
+# Ensure that asking for another timeout once the engines exist is reported instead of silently ignored
+def test_init_db_timeout_after_init(monkeypatch, caplog):
+    monkeypatch.setattr(database, "engine", object())
+    monkeypatch.setattr(database, "async_engine", object())
+    monkeypatch.setattr(database, "engine_statement_timeout", 10000)
+
+    with caplog.at_level("WARNING", logger="uvicorn.error"):
+        database.init_db()
+        database.init_db(statement_timeout=10000)
+        assert caplog.records == [] # Same or default timeout should pass quietly
+        database.init_db(statement_timeout=0)
+    assert "ignored" in caplog.text # A different timeout cannot be applied to existing engines
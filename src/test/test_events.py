@@ -0,0 +1,85 @@
+import asyncio
+from datetime import datetime
+
+from src.shared.events import EVENT_MAX_LOGS, EventBus, InProcessEventBackend, MoodLogEvent, event_bus, extends_history
+
+"""
+FIXTURES AND HELPERS
+"""
+
+def collect_events(mood_repo, user_id: int, write) -> list:
+    # Subscribe, run the write, and return the events the subscriber received
+    received = []
+
+    async def run():
+        unsubscribe = event_bus.subscribe(user_id, received.append)
+        try:
+            await write()
+            await event_bus.drain()
+        finally:
+            unsubscribe()
+
+    asyncio.run(run())
+    return received
+
+"""
+EVENT BUS TESTS
+"""
+
+# Ensure that events reach only the subscribers of that user, and a failing handler does not stop the others
+def test_event_bus_fan_out():
+    bus = EventBus(InProcessEventBackend())
+    received = []
+
+    def failing(event):
+        raise RuntimeError("client gone")
+
+    async def run():
+        bus.subscribe(1, failing)
+        unsubscribe = bus.subscribe(1, received.append)
+        bus.subscribe(2, received.append)
+        await bus.publish(MoodLogEvent(1, "created"))
+        await bus.drain()
+        unsubscribe()
+        await bus.publish(MoodLogEvent(1, "created"))
+        await bus.drain()
+
+    asyncio.run(run())
+    assert [event.user_id for event in received] == [1] # Other users and unsubscribed handlers should not be called
+    assert bus.stats()["failed"] == 2 # Failures should be counted, not raised into the publisher
+    assert bus.stats()["subscribers"] == 2
+
+"""
+REPOSITORY TESTS
+"""
+
+# Ensure that repository writes publish what open pages need to update in place
+def test_writes_publish_events(mood_repo):
+    created = collect_events(mood_repo, 5, lambda: mood_repo.create_mood_log(user_id=5, mood_value=4, energy_level=2, notes="hi"))
+    assert [event.kind for event in created] == ["created"]
+    assert created[0].logs[0].mood_value == 4 # The new log should travel with the event
+    assert created[0].logs[0].notes == "hi"
+
+    edited = collect_events(mood_repo, 5, lambda: mood_repo.edit_latest_mood_log(5, mood_value=1))
+    assert edited[0].kind == "edited" and edited[0].logs[0].mood_value == 1
+
+    rows = [
+        {"user_id": 5, "mood_value": 3, "energy_level": 3, "notes": None, "weather": None, "created_at": datetime(2024, 1, 1, minute=i % 60, hour=i // 60)}
+        for i in range(EVENT_MAX_LOGS + 1)
+    ]
+    imported = collect_events(mood_repo, 5, lambda: mood_repo.bulk_create_mood_logs(rows))
+    assert [(event.kind, event.logs) for event in imported] == [("imported", [])] # Big batches should not ship every log
+
+    cleared = collect_events(mood_repo, 5, lambda: mood_repo.clear_mood_logs(5))
+    assert [event.kind for event in cleared] == ["cleared"]
+
+# Ensure that pages append only logs newer than what they show, and reload for backdated ones
+def test_backdated_log_is_not_appended(mood_repo):
+    newest = datetime(2025, 1, 10, 9)
+    later = collect_events(mood_repo, 5, lambda: mood_repo.create_log_on_date(user_id=5, mood_value=4, energy_level=2, date=newest))
+    backdated = collect_events(mood_repo, 5, lambda: mood_repo.create_log_on_date(user_id=5, mood_value=1, energy_level=1, date=datetime(2025, 1, 2, 9)))
+
+    assert extends_history(later[0], None) # An empty page takes any log
+    assert extends_history(later[0], datetime(2025, 1, 9)) # A newer log goes on top
+    assert not extends_history(backdated[0], newest) # A backdated log would land out of order
+    assert not extends_history(MoodLogEvent(5, "edited", later[0].logs), None) # Only created events can be appended
@@ -0,0 +1,206 @@
+import pytest
+import asyncio
+import httpx
+
+from src.shared.http import RetryTransport, create_http_client, get_http_client
+from src.mindfuly.routes import weather, youtube
+from mindfuly.api import app
+
+"""
+FIXTURES AND HELPERS
+"""
+
+def mock_client(handler) -> httpx.AsyncClient:
+    # Same retrying client the app builds, with the network swapped for a MockTransport
+    return create_http_client(transport=httpx.MockTransport(handler))
+
+def video_item(video_id: str) -> dict:
+    return {"id": {"videoId": video_id}, "snippet": {"title": "t", "channelTitle": "c", "thumbnails": {"medium": {"url": "u"}}}}
+
+@pytest.fixture(autouse=True)
+def clear_weather_cache():
+    weather.weather_cache.clear()
+    yield
+
+@pytest.fixture(autouse=True)
+def clear_youtube_cache(monkeypatch):
+    youtube.search_cache.clear()
+    youtube.query_cache.clear()
+    monkeypatch.setattr(youtube, "quota_budget", youtube.QuotaBudget(daily_units=1000))
+    yield
+
+@pytest.fixture(scope='function')
+def upstream_client(client):
+    def install(handler):
+        app.dependency_overrides[get_http_client] = lambda: mock_client(handler)
+    yield install
+    app.dependency_overrides.pop(get_http_client, None)
+
+"""
+RETRY TESTS
+"""
+
+# Ensure that idempotent requests are retried on retryable statuses
+def test_retry_transport_retries_503():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503 if len(calls) < 3 else 200, json={"ok": True})
+
+    transport = RetryTransport(httpx.MockTransport(handler), retries=2, backoff=0)
+
+    async def fetch():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.get("https://upstream.test/")
+
+    response = asyncio.run(fetch())
+    assert response.status_code == 200 # Third attempt should succeed
+    assert len(calls) == 3 # Two retries should have been made
+
+# Ensure that non-idempotent requests are never replayed
+def test_retry_transport_skips_post():
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(503)
+
+    transport = RetryTransport(httpx.MockTransport(handler), retries=2, backoff=0)
+
+    async def post():
+        async with httpx.AsyncClient(transport=transport) as client:
+            return await client.post("https://upstream.test/")
+
+    assert asyncio.run(post()).status_code == 503 # Error should be returned as is
+    assert len(calls) == 1 # Only one attempt should be made
+
+"""
+API TESTS
+"""
+
+# Ensure that the weather route goes through the injected client
+def test_weather_uses_shared_client(upstream_client, client, monkeypatch):
+    monkeypatch.setattr(weather, "WEATHER_API_KEY", "key")
+    upstream_client(lambda request: httpx.Response(200, json={"weather": [{"description": "clear sky"}], "main": {"temp": 12}}))
+
+    response = client.get("/weather?lat=49.28&lon=-123.12")
+    assert response.status_code == 200 # Response should be 200
+    assert response.json()["weather"][0]["description"] == "clear sky" # Body should come from the stand-in
+
+# Ensure that nearby coordinates share one cached upstream call
+def test_weather_cached_per_grid_cell(upstream_client, client, monkeypatch):
+    monkeypatch.setattr(weather, "WEATHER_API_KEY", "key")
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"weather": [{"description": "rain"}], "main": {"temp": 8}})
+
+    upstream_client(handler)
+    before = client.get("/weather/cache").json()["weather_cache"]
+
+    assert client.get("/weather?lat=49.2801&lon=-123.1199").status_code == 200
+    assert client.get("/weather?lat=49.2798&lon=-123.1203").status_code == 200 # Same ~1 km cell
+    assert client.get("/weather?lat=49.3500&lon=-123.1200").status_code == 200 # Different cell
+    assert len(calls) == 2 # Only one upstream call per cell
+
+    after = client.get("/weather/cache").json()["weather_cache"]
+    assert after["hits"] - before["hits"] == 1 # Second lookup should hit
+    assert after["misses"] - before["misses"] == 2 # Each cell should miss once
+
+# Ensure that the YouTube search goes through the injected client
+def test_youtube_search_uses_shared_client(upstream_client, client, monkeypatch):
+    monkeypatch.setattr(youtube, "YOUTUBE_API_KEY", "key")
+    item = {"id": {"videoId": "abc"}, "snippet": {"title": "t", "channelTitle": "c", "thumbnails": {"medium": {"url": "u"}}}}
+    upstream_client(lambda request: httpx.Response(200, json={"items": [item]}))
+
+    response = client.get("/youtube/search?query=lofi")
+    assert response.status_code == 200 # Response should be 200
+    assert response.json() == {"videos": [{"video_id": "abc", "title": "t", "channel": "c", "thumbnail": "u"}]}
+
+# Ensure that repeated mood searches are answered from the cache and shuffled locally
+def test_youtube_by_mood_served_from_cache(upstream_client, client, monkeypatch):
+    monkeypatch.setattr(youtube, "YOUTUBE_API_KEY", "key")
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, json={"items": [video_item(str(i)) for i in range(50)]})
+
+    upstream_client(handler)
+
+    first = client.get("/youtube/search/by-mood/sleepy?max_results=10")
+    second = client.get("/youtube/search/by-mood/sleepy?max_results=10")
+    assert first.status_code == 200 and second.status_code == 200 # Responses should be 200
+    assert len(first.json()["videos"]) == 10 # Sample should be trimmed to max_results
+    assert len(calls) == 1 # Only the cold miss should go upstream
+    assert calls[0].url.params["maxResults"] == "50" # Full page should be fetched once
+    assert youtube.quota_budget.remaining() == 900 # One search should be charged
+
+# Ensure that free-text searches are cached apart from the mood queries, and probes do not count as lookups
+def test_youtube_free_text_cached_apart(upstream_client, client, monkeypatch):
+    monkeypatch.setattr(youtube, "YOUTUBE_API_KEY", "key")
+    upstream_client(lambda request: httpx.Response(200, json={"items": [video_item("a")]}))
+    youtube.search_cache.set("calm piano music", youtube.CachedSearch([youtube.VideoInfo(video_id="b", title="t", channel="c", thumbnail="u")], 0))
+    before = youtube.search_cache.stats()
+
+    assert client.get("/youtube/search?query=lofi").status_code == 200
+    assert client.get("/youtube/search/by-mood/sleepy").status_code == 200
+    assert "lofi music" in youtube.query_cache._entries and "sleepy music playlist" in youtube.query_cache._entries
+    assert list(youtube.search_cache._entries) == ["calm piano music"] # Free text should never reach the mood cache
+    assert youtube.query_cache.ttl == youtube.YOUTUBE_CACHE_TTL # Nothing refreshes free-text entries, so they expire
+
+    assert client.get("/youtube/search/by-mood/calm").json()["videos"][0]["video_id"] == "b"
+    after = youtube.search_cache.stats()
+    assert (after["hits"] - before["hits"], after["misses"] - before["misses"]) == (1, 0) # Only the load counts, not the probes
+
+# Ensure that cached results are still served once the quota is spent
+def test_youtube_by_mood_survives_exhausted_quota(upstream_client, client, monkeypatch):
+    monkeypatch.setattr(youtube, "YOUTUBE_API_KEY", "key")
+    upstream_client(lambda request: httpx.Response(500))
+
+    youtube.query_cache.set("sleepy music playlist", youtube.CachedSearch([youtube.VideoInfo(video_id="a", title="t", channel="c", thumbnail="u")], 0))
+    youtube.quota_budget.exhaust()
+
+    response = client.get("/youtube/search/by-mood/sleepy")
+    assert response.status_code == 200 # Stale entry should still be served
+    assert response.json()["videos"][0]["video_id"] == "a"
+
+    response = client.get("/youtube/search/by-mood/dreamy")
+    assert response.status_code == 503 # Nothing cached and no quota left
+
+# Ensure that a quotaExceeded answer stops further upstream calls for the day
+def test_youtube_quota_exceeded_exhausts_budget(upstream_client, client, monkeypatch):
+    monkeypatch.setattr(youtube, "YOUTUBE_API_KEY", "key")
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(403, json={"error": {"message": "quota", "errors": [{"reason": "quotaExceeded"}]}})
+
+    upstream_client(handler)
+
+    assert client.get("/youtube/search?query=lofi").status_code == 403 # Upstream error should surface
+    assert client.get("/youtube/search?query=jazz").status_code == 503 # Budget should now be empty
+    assert len(calls) == 1 # Second search should not go upstream
+    assert youtube.quota_budget.remaining() == 0
+
+# Ensure that the prefetcher keeps its reserve and skips fresh entries
+def test_youtube_prefetch_respects_budget(monkeypatch):
+    monkeypatch.setattr(youtube, "YOUTUBE_QUOTA_RESERVE", 500)
+    client = mock_client(lambda request: httpx.Response(200, json={"items": [video_item("a")]}))
+
+    refreshed = asyncio.run(youtube.prefetch_mood_searches(client))
+    assert refreshed == 5 # 1000 units with a 500 reserve leaves room for five searches
+    assert youtube.quota_budget.remaining() == 500
+    assert len(youtube.search_cache) == 5
+
+    youtube.quota_budget.spent = 0
+    assert asyncio.run(youtube.prefetch_mood_searches(client)) == 5 # Fresh entries should be skipped, next five fetched
+    assert len(youtube.search_cache) == 10
+
+# Ensure that workers split the daily quota so together they never spend more than it
+def test_youtube_quota_split_between_workers():
+    assert youtube.worker_share(10000, workers=1) == 10000
+    assert youtube.worker_share(10000, workers=3) * 3 <= 10000 # Rounded down, never over the daily quota
@@ -0,0 +1,77 @@
+import asyncio
+import io
+import json
+from datetime import datetime
+
+from src.shared.importer import import_mood_logs, read_rows
+
+"""
+FIXTURES AND HELPERS
+"""
+
+HISTORY_CSV = """created_at,mood_value,energy_level,notes,weather
+2024-01-01T08:00:00,3,4,"first, with comma",sunny
+2024-01-02T08:00:00,9,4,,
+2024-01-03T08:00:00,2,2,,rain
+2024-01-04T08:00:00+02:00,5,1,last,
+2024-01-05T08:00:00,1,5,,
+"""
+
+def run_import(mood_repo, text: str, format: str, **kwargs) -> list:
+    async def collect():
+        return [progress.to_dict() async for progress in import_mood_logs(mood_repo, 5, io.StringIO(text), format, **kwargs)]
+    return asyncio.run(collect())
+
+"""
+IMPORTER TESTS
+"""
+
+# Ensure that rows are validated and committed in chunks with a progress report per chunk
+def test_import_csv_in_chunks(mood_repo):
+    updates = run_import(mood_repo, HISTORY_CSV, "csv", chunk_size=2)
+
+    assert [update["last_committed_row"] for update in updates] == [2, 4, 5] # One report per committed chunk
+    final = updates[-1]
+    assert final["imported"] == 4 # Valid rows should be imported
+    assert final["skipped"] == 1
+    assert final["errors"][0]["row"] == 2 # Out of range mood should be reported by row
+
+    logs = asyncio.run(mood_repo.get_mood_logs(5))
+    assert logs[1].created_at == datetime(2024, 1, 4, 6) # Offsets should be stored as UTC
+    assert logs[-1].notes == "first, with comma" # Quoted CSV values should be kept whole
+    assert logs[-2].notes is None # Empty cells should be stored as NULL
+    assert asyncio.run(mood_repo.get_mood_stats(5))["total_logs"] == 4 # Rollups should follow the import
+
+# Ensure that an import can resume after its last committed row
+def test_import_resumes(mood_repo):
+    updates = run_import(mood_repo, HISTORY_CSV, "csv", chunk_size=2, start_row=3)
+
+    assert updates[-1]["rows_read"] == 2 # Only rows after the resume point should be read
+    assert [log.mood_value for log in asyncio.run(mood_repo.get_mood_logs(5))] == [1, 5]
+
+    assert run_import(mood_repo, HISTORY_CSV, "csv", start_row=5)[-1]["rows_read"] == 0 # Nothing left to import
+
+# Ensure that NDJSON lines are numbered and bad lines reported
+def test_read_rows_ndjson():
+    rows = list(read_rows(io.StringIO('{"mood_value": 1}\n\nnope\n[1]\n'), "ndjson"))
+    assert rows == [(1, {"mood_value": 1}), (2, "Invalid JSON"), (3, "Expected a JSON object")]
+
+"""
+API TESTS
+"""
+
+# Ensure that the upload route streams progress and finishes with the totals
+def test_import_route(client, created_user):
+    response = client.post(
+        f"/mood/import/{created_user['name']}?chunk_size=2",
+        files={"file": ("history.csv", HISTORY_CSV.encode(), "text/csv")}
+    )
+    assert response.status_code == 200 # Response should be 200
+
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line["done"] for line in lines] == [False, False, False, True] # Progress per chunk, then the summary
+    assert lines[-1]["imported"] == 4
+    assert lines[-1]["last_committed_row"] == 5
+
+    response = client.post(f"/mood/import/{created_user['name']}", files={"file": ("history.txt", b"", "text/plain")})
+    assert response.status_code == 400 # Unknown extensions need an explicit format
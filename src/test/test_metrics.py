@@ -0,0 +1,90 @@
+import asyncio
+import httpx
+
+from src.shared.http import create_http_client
+from src.shared.metrics import Counter, Histogram, MetricsRegistry, db_query_duration, http_request_db_queries, http_requests, upstream_request_duration
+
+"""
+FIXTURES AND HELPERS
+"""
+
+def sample(text: str, line_start: str) -> float:
+    # Value of the first exposition line starting with line_start
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"No sample starting with {line_start}")
+
+"""
+METRIC TYPE TESTS
+"""
+
+# Ensure that histogram buckets are rendered cumulatively with +Inf, sum and count
+def test_histogram_render():
+    histogram = Histogram("latency_seconds", "Latency", ("route",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, ("/a",))
+    histogram.observe(0.5, ("/a",))
+    histogram.observe(5, ("/a",))
+
+    lines = histogram.render()
+    assert lines[:2] == ["# HELP latency_seconds Latency", "# TYPE latency_seconds histogram"] # Header lines should come first
+    assert 'latency_seconds_bucket{route="/a",le="0.1"} 1' in lines # Only the fastest observation fits the first bucket
+    assert 'latency_seconds_bucket{route="/a",le="1"} 2' in lines # Buckets should be cumulative
+    assert 'latency_seconds_bucket{route="/a",le="+Inf"} 3' in lines # +Inf should hold every observation
+    assert 'latency_seconds_sum{route="/a"} 5.55' in lines and 'latency_seconds_count{route="/a"} 3' in lines # Sum and count should follow
+
+# Ensure that label values are escaped and scrape-time collectors are rendered
+def test_registry_render():
+    registry = MetricsRegistry()
+    counter = registry.register(Counter("requests_total", "Requests", ("path",)))
+    counter.inc(('say "hi"\\',))
+    registry.collector(lambda: [("entries", "gauge", "Entries", [({"cache": "weather"}, 3)])])
+
+    text = registry.render()
+    assert 'requests_total{path="say \\"hi\\"\\\\"} 1' in text # Quotes and backslashes should be escaped
+    assert '# TYPE entries gauge\nentries{cache="weather"} 3' in text # Collector samples should be rendered with their type
+
+"""
+ENDPOINT TESTS
+"""
+
+# Ensure that requests are counted by route template, with the queries they ran
+def test_metrics_route_labels(client, created_user):
+    key = ("GET", "/mood/stats/{username}")
+    before = http_requests.values.get((*key, "200"), 0)
+    queries_before = http_request_db_queries.values.get(key, [0])[-1]
+
+    assert client.get("/mood/stats/foo").status_code == 200
+    assert client.get("/no/such/route").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4") # Prometheus text format
+    assert sample(response.text, 'mindfuly_http_requests_total{method="GET",route="/mood/stats/{username}",status="200"}') == before + 1 # Labelled by template, not by username
+    assert 'route="/mood/stats/foo"' not in response.text # Raw paths should never become labels
+    assert 'route="unmatched",status="404"' in response.text # Unknown paths should share one label
+    assert http_request_db_queries.values[key][-1] > queries_before # The request's queries should be counted for its route
+    assert "mindfuly_http_requests_in_flight 1" in response.text # The scrape itself is in flight
+    assert 'mindfuly_cache_hits_total{cache="identity"}' in response.text # Cache counters should be exposed
+
+# Ensure that queries outside requests are timed too
+def test_metrics_count_queries(mood_repo, created_user):
+    before = db_query_duration.values.get((), [0])
+    count_before = sum(before[:-1])
+
+    asyncio.run(mood_repo.get_latest_mood_log(5))
+    assert sum(db_query_duration.values[()][:-1]) == count_before + 1 # One SELECT should be observed
+
+# Ensure that outbound calls are timed by upstream and status
+def test_metrics_upstream_latency():
+    async def call():
+        client = create_http_client(transport=httpx.MockTransport(lambda request: httpx.Response(200, json={})))
+        await client.get("https://api.openweathermap.org/data/2.5/weather")
+        await client.get("https://example.com/", extensions={"upstream": "spotify"})
+        await client.aclose()
+
+    before = {key: counts[:-1] for key, counts in upstream_request_duration.values.items()}
+    asyncio.run(call())
+
+    for key in (("weather", "200"), ("spotify", "200")):
+        assert sum(upstream_request_duration.values[key][:-1]) == sum(before.get(key, [0])) + 1 # Named by host or by the call's extension
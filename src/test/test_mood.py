@@ -0,0 +1,521 @@
+import pytest
+import asyncio
+import csv
+import io
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, date, timedelta
+
+from sqlalchemy import event, text, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from src.shared.models import POSTGRES_MAX_BIND_PARAMS, Base, MoodLog, MoodLogRepositoryV2, bulk_insert_statements, decode_cursor
+from src.shared.weather import parse_weather
+from src.shared.identity import cached_user_id
+from src.mindfuly.routes import mood
+from src.shared import dashboard
+from src.shared.dashboard import load_dashboard
+from src.shared.insights import INSIGHT_TYPES, get_insights, insight
+
+"""
+MOOD LOG REPOSITORY TESTS
+"""
+
+# Ensure that the async repository can create and read back a mood log
+def test_create_and_get_latest_mood_log(mood_repo):
+    created = asyncio.run(mood_repo.create_mood_log(user_id=5, mood_value=4, energy_level=2, notes="hi", weather="sunny"))
+    assert created.mood_value == 4 # Returned log should carry the values
+
+    latest = asyncio.run(mood_repo.get_latest_mood_log(5))
+    assert latest.mood_value == 4 # Mood should match
+    assert latest.energy_level == 2 # Energy should match
+    assert latest.notes == "hi" # Notes should match
+
+# Ensure that editing touches only the most recent log
+def test_edit_latest_mood_log(mood_repo):
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=1, energy_level=1, date=datetime(2025, 1, 1)))
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=2, energy_level=2, date=datetime(2025, 1, 2)))
+
+    updated = asyncio.run(mood_repo.edit_latest_mood_log(5, mood_value=5))
+    assert updated.mood_value == 5 # Latest log should be updated
+
+    logs = asyncio.run(mood_repo.get_mood_logs(5))
+    assert [log.mood_value for log in logs] == [5, 1] # Older log should be untouched
+
+# Ensure that stats are aggregated per user
+def test_get_mood_stats(mood_repo):
+    asyncio.run(mood_repo.create_mood_log(user_id=5, mood_value=2, energy_level=4))
+    asyncio.run(mood_repo.create_mood_log(user_id=5, mood_value=4, energy_level=2))
+    asyncio.run(mood_repo.create_mood_log(user_id=6, mood_value=1, energy_level=1))
+
+    stats = asyncio.run(mood_repo.get_mood_stats(5))
+    assert stats == {"avg_mood": 3.0, "avg_energy": 3.0, "total_logs": 2}
+
+# Ensure that weekday stats are grouped in SQL and ordered Monday to Sunday
+def test_get_weekly_mood_stats(mood_repo):
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=1, energy_level=5, date=datetime(2025, 1, 5, 9))) # Sunday
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=4, energy_level=2, date=datetime(2025, 1, 6, 9))) # Monday
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=2, energy_level=2, date=datetime(2025, 1, 13, 21))) # Monday
+
+    weekly_stats = asyncio.run(mood_repo.get_weekly_mood_stats(5))
+    assert weekly_stats == [
+        {"day": "Monday", "avg_mood": 3.0, "avg_energy": 2.0, "total_logs": 2},
+        {"day": "Sunday", "avg_mood": 1.0, "avg_energy": 5.0, "total_logs": 1},
+    ]
+
+# Ensure that the daily rollups follow every write and match a rebuild from the raw logs
+def test_rollups_track_writes(mood_repo):
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=2, energy_level=4, date=datetime(2025, 1, 6, 8), weather="sunny"))
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=4, energy_level=4, date=datetime(2025, 1, 6, 20), weather="rain"))
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=3, energy_level=1, date=datetime(2025, 1, 7, 9), weather="sunny"))
+    asyncio.run(mood_repo.edit_latest_mood_log(5, mood_value=5))
+
+    stats = asyncio.run(mood_repo.get_mood_stats(5))
+    weather_stats = asyncio.run(mood_repo.get_weather_mood_stats(5))
+    assert stats == {"avg_mood": 3.67, "avg_energy": 3.0, "total_logs": 3} # Edit should be reflected
+    assert weather_stats == [
+        {"weather": "rain", "temperature_band": None, "avg_mood": 4.0, "avg_energy": 4.0, "total_logs": 1},
+        {"weather": "sunny", "temperature_band": None, "avg_mood": 3.5, "avg_energy": 2.5, "total_logs": 2},
+    ]
+
+    asyncio.run(mood_repo.rebuild_rollups())
+    assert asyncio.run(mood_repo.get_mood_stats(5)) == stats # Rebuild should agree with incremental upkeep
+    assert asyncio.run(mood_repo.get_weather_mood_stats(5)) == weather_stats
+
+    asyncio.run(mood_repo.clear_mood_logs(5))
+    assert asyncio.run(mood_repo.get_mood_stats(5)) == {"avg_mood": 0.0, "avg_energy": 0.0, "total_logs": 0}
+    assert asyncio.run(mood_repo.get_running_means(5)) == [] # Rollups should be cleared with the logs
+
+# Ensure that weather text is split into a shared condition and a temperature band
+def test_weather_stats_by_condition_and_band(mood_repo):
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=2, energy_level=2, date=datetime(2025, 1, 6, 8), weather="12°C – Light rain"))
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=4, energy_level=4, date=datetime(2025, 1, 7, 8), weather="14.4°C – light rain"))
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=5, energy_level=3, date=datetime(2025, 1, 8, 8), weather="-3°C – light rain"))
+    asyncio.run(mood_repo.create_log_on_date(user_id=6, mood_value=1, energy_level=1, date=datetime(2025, 1, 8, 8), weather="light rain"))
+
+    assert asyncio.run(mood_repo.get_weather_mood_stats(5)) == [
+        {"weather": "light rain", "temperature_band": "-5 to 0°C", "avg_mood": 5.0, "avg_energy": 3.0, "total_logs": 1}, # Negative temperatures should floor
+        {"weather": "light rain", "temperature_band": "10 to 15°C", "avg_mood": 3.0, "avg_energy": 3.0, "total_logs": 2},
+    ]
+    logs = asyncio.run(mood_repo.get_mood_logs(5))
+    assert logs[0].weather == "-3°C – light rain" # Text should be kept for display
+    assert logs[0].temperature_c == -3.0
+    assert len({log.weather_condition_id for log in logs}) == 1 # One condition row per name
+
+# Ensure that logs written before the structured columns existed can be backfilled
+def test_backfill_weather_fields(mood_repo):
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=2, energy_level=2, date=datetime(2025, 1, 6, 8), weather="21°C – sunny"))
+    asyncio.run(mood_repo.session.execute(update(MoodLog).values(temperature_c=None, weather_condition_id=None)))
+    asyncio.run(mood_repo.session.commit())
+
+    assert asyncio.run(mood_repo.backfill_weather_fields(batch_size=1)) == 1
+    log = asyncio.run(mood_repo.get_mood_logs(5))[0]
+    assert (log.temperature_c, log.weather_condition_id) == (21.0, 1)
+    assert asyncio.run(mood_repo.backfill_weather_fields()) == 0 # Nothing left to parse
+
+# Ensure that weather strings are parsed with or without a temperature
+def test_parse_weather():
+    assert parse_weather("12°C – Light rain") == (12.0, "light rain")
+    assert parse_weather("-0.5 C - fog") == (-0.5, "fog")
+    assert parse_weather(" Sunny ") == (None, "sunny")
+    assert parse_weather("") == (None, None)
+
+# Ensure that a bulk insert lands every row and keeps the rollups in step with a rebuild
+def test_bulk_create_mood_logs(mood_repo):
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=1, energy_level=1, date=datetime(2025, 1, 3, 9), weather="rain"))
+
+    rows = [
+        {"user_id": 5, "mood_value": day % 5 + 1, "energy_level": 3, "notes": None, "weather": "sunny", "created_at": datetime(2025, 1, day + 1, 12)}
+        for day in range(10)
+    ]
+    assert asyncio.run(mood_repo.bulk_create_mood_logs(rows)) == 10 # Every row should be inserted
+
+    stats = asyncio.run(mood_repo.get_mood_stats(5))
+    weather_stats = asyncio.run(mood_repo.get_weather_mood_stats(5))
+    assert stats["total_logs"] == 11 # Existing log in the range should be kept in the rollup
+
+    asyncio.run(mood_repo.rebuild_rollups())
+    assert asyncio.run(mood_repo.get_mood_stats(5)) == stats # Rebuild should agree with the bulk upkeep
+    assert asyncio.run(mood_repo.get_weather_mood_stats(5)) == weather_stats
+
+# Ensure that every Postgres bulk INSERT, weather columns included, stays under the protocol's bind parameter limit
+def test_bulk_insert_chunks_fit_postgres():
+    row = {"user_id": 5, "mood_value": 3, "energy_level": 3, "notes": None, "weather": "12°C – rain", "created_at": datetime(2025, 1, 1),
+           "temperature_c": 12.0, "weather_condition_id": 1}
+    statements = list(bulk_insert_statements([dict(row) for _ in range(10000)]))
+
+    compiled = statements[0].compile(dialect=postgresql.dialect())
+    assert len(compiled.params) < POSTGRES_MAX_BIND_PARAMS # asyncpg refuses statements over the limit
+    assert sum(len(statement.compile(dialect=postgresql.dialect()).params) for statement in statements) == 10000 * len(row) # No row dropped
+
+# Ensure that writers on separate connections logging the same day all land in the rollup
+def test_concurrent_same_day_writes(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'mood.db'}", connect_args={"timeout": 30})
+    sessions = async_sessionmaker(bind=engine, expire_on_commit=False, class_=AsyncSession)
+
+    async def write(mood_value):
+        async with sessions() as session:
+            return await MoodLogRepositoryV2(session).create_log_on_date(user_id=5, mood_value=mood_value, energy_level=2, date=datetime(2025, 1, 6, mood_value))
+
+    async def run():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        created = await asyncio.gather(*(write(mood_value) for mood_value in range(1, 6)))
+        async with sessions() as session:
+            stats = await MoodLogRepositoryV2(session).get_mood_stats(5)
+        await engine.dispose()
+        return created, stats
+
+    created, stats = asyncio.run(run())
+    assert None not in created # No write should be lost to a rollup conflict
+    assert stats == {"avg_mood": 3.0, "avg_energy": 2.0, "total_logs": 5} # Every write should be in the day's rollup
+
+# Ensure that a rollup row committed by another writer just before ours is replaced, not a conflict that loses the log
+def test_rollup_written_by_concurrent_writer(async_engine, mood_repo):
+    def other_writer(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("INSERT INTO mood_daily_rollups") and not context.execution_options.get("other_writer"):
+            conn.execute(
+                text("INSERT INTO mood_daily_rollups VALUES (5, '2025-01-06', 1, 1, 1, 1, 1, 1, 1)").execution_options(other_writer=True)
+            )
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", other_writer)
+    try:
+        created = asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=4, energy_level=2, date=datetime(2025, 1, 6, 9)))
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", other_writer)
+
+    assert created is not None # The log should be kept
+    assert asyncio.run(mood_repo.get_mood_stats(5)) == {"avg_mood": 4.0, "avg_energy": 2.0, "total_logs": 1} # Recomputed from the logs
+
+def create_running_mean_logs(mood_repo):
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=1, energy_level=1, date=datetime(2025, 1, 1, 9)))
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=5, energy_level=1, date=datetime(2025, 1, 2, 9)))
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=3, energy_level=1, date=datetime(2025, 1, 2, 18)))
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=2, energy_level=1, date=datetime(2025, 1, 10, 9)))
+
+# Ensure that running means accumulate oldest to newest and remember days before the window
+def test_get_running_means(mood_repo):
+    create_running_mean_logs(mood_repo)
+
+    running_means = asyncio.run(mood_repo.get_running_means(5))
+    assert running_means == [
+        {"date": "2025-01-10", "avg_mood": 2.75, "avg_energy": 1.0},
+        {"date": "2025-01-02", "avg_mood": 3.0, "avg_energy": 1.0},
+        {"date": "2025-01-01", "avg_mood": 1.0, "avg_energy": 1.0},
+    ]
+
+    windowed = asyncio.run(mood_repo.get_running_means(5, start=date(2025, 1, 2), end=date(2025, 1, 9)))
+    assert windowed == [{"date": "2025-01-02", "avg_mood": 3.0, "avg_energy": 1.0}] # Earlier days still count
+
+# Ensure that weekly and monthly points carry the mean as of the end of each period
+def test_get_running_means_resolution(mood_repo):
+    create_running_mean_logs(mood_repo)
+
+    weekly = asyncio.run(mood_repo.get_running_means(5, resolution="week"))
+    assert weekly == [
+        {"date": "2025-01-06", "avg_mood": 2.75, "avg_energy": 1.0},
+        {"date": "2024-12-30", "avg_mood": 3.0, "avg_energy": 1.0},
+    ]
+
+    monthly = asyncio.run(mood_repo.get_running_means(5, resolution="month"))
+    assert monthly == [{"date": "2025-01-01", "avg_mood": 2.75, "avg_energy": 1.0}]
+
+# Ensure that keyset pages walk the whole history without gaps or repeats, ties included
+def test_get_mood_log_page(mood_repo):
+    same_time = datetime(2025, 1, 1, 9)
+    for mood_value in range(1, 6):
+        asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=mood_value, energy_level=1, date=same_time + timedelta(days=mood_value // 2)))
+
+    seen = []
+    page, cursor = asyncio.run(mood_repo.get_mood_log_page(5, limit=2))
+    seen += page
+    while cursor is not None:
+        page, cursor = asyncio.run(mood_repo.get_mood_log_page(5, limit=2, before=decode_cursor(cursor)))
+        seen += page
+
+    assert sorted(log.mood_value for log in seen) == [1, 2, 3, 4, 5] # Every log should appear exactly once
+    assert [(log.created_at, log.id) for log in seen] == sorted(((log.created_at, log.id) for log in seen), reverse=True)
+
+"""
+QUERY PLAN TESTS
+"""
+
+# Ensure that read methods accept a username and resolve it inside the same statement
+def test_repository_accepts_username(async_engine, created_user, mood_repo):
+    asyncio.run(mood_repo.create_log_on_date(user_id=created_user["id"], mood_value=4, energy_level=2, date=datetime(2025, 1, 1)))
+
+    statements = capture_statements(async_engine, lambda: mood_repo.get_latest_mood_log(created_user["name"]))
+    assert len(statements) == 1 # Username lookup should be joined into the query
+    assert asyncio.run(mood_repo.get_latest_mood_log(created_user["name"])).mood_value == 4
+    assert asyncio.run(mood_repo.get_mood_stats(created_user["name"]))["total_logs"] == 1
+    assert asyncio.run(mood_repo.get_latest_mood_log("nobody")) is None # Unknown users have no logs
+
+# Ensure that usernames are resolved once and then served from the identity cache
+def test_resolve_user_id_cached(async_engine, created_user, mood_repo):
+    assert asyncio.run(mood_repo.resolve_user_id("nobody")) is None # Unknown users resolve to None
+    assert cached_user_id("nobody") is None # Misses should not be cached
+
+    statements = capture_statements(async_engine, lambda: mood_repo.resolve_user_id(created_user["name"]))
+    assert len(statements) == 1 # First lookup should query users
+
+    statements = capture_statements(async_engine, lambda: mood_repo.resolve_user_id(created_user["name"]))
+    assert statements == [] # Second lookup should come from the cache
+    assert cached_user_id(created_user["name"]) == created_user["id"]
+
+# Ensure that derived dashboard sections reuse rows instead of issuing their own queries
+def test_load_dashboard_sections(async_engine, mood_repo):
+    create_running_mean_logs(mood_repo)
+
+    statements = capture_statements(async_engine, lambda: load_dashboard(mood_repo, 5, sections=("mood_stats", "weekly_mood_stats")))
+    assert len(statements) == 1 # Stats should come from the weekly rows
+
+    dashboard = asyncio.run(load_dashboard(mood_repo, 5, sections=("mood_stats", "latest_mood_log")))
+    assert dashboard["mood_stats"] == asyncio.run(mood_repo.get_mood_stats(5)) # Totals should match the direct query
+    assert dashboard["latest_mood_log"].mood_value == 2 # Latest log should be the newest one
+
+    with pytest.raises(ValueError):
+        asyncio.run(load_dashboard(mood_repo, 5, sections=("everything",)))
+
+# Ensure that concurrent dashboards never hold more extra connections than the cap, and reuse the request's session
+def test_dashboard_connections_bounded(mood_repo, monkeypatch):
+    open_sessions = []
+    most_open = 0
+
+    @asynccontextmanager
+    async def session_scope():
+        nonlocal most_open
+        open_sessions.append(1)
+        most_open = max(most_open, len(open_sessions))
+        try:
+            yield mood_repo.session
+        finally:
+            open_sessions.pop()
+
+    async def query(repo, user_id, limit):
+        await asyncio.sleep(0.01)
+        return repo.session
+
+    monkeypatch.setattr(dashboard, "async_session_scope", session_scope)
+    monkeypatch.setattr(dashboard, "dashboard_connections", asyncio.Semaphore(2))
+
+    async def run():
+        return await asyncio.gather(*(dashboard.run_concurrently(mood_repo, [query] * 4, 5, 20) for _ in range(3)))
+
+    results = asyncio.run(run())
+    assert most_open == 2 # Six extra queries should share two connections
+    assert all(len(result) == 4 for result in results) # Every query should still be answered
+
+# Ensure that repeat dashboard loads run no aggregate queries until the user writes again
+def test_stats_cached_until_write(async_engine, mood_repo):
+    create_running_mean_logs(mood_repo)
+    sections = ("mood_stats", "weekly_mood_stats", "weather_mood_stats", "running_means")
+
+    first = asyncio.run(load_dashboard(mood_repo, 5, sections=sections))
+    assert capture_statements(async_engine, lambda: load_dashboard(mood_repo, 5, sections=sections)) == [] # Repeat view should be served from the cache
+
+    asyncio.run(mood_repo.create_mood_log(user_id=5, mood_value=5, energy_level=5))
+    assert asyncio.run(load_dashboard(mood_repo, 5, sections=sections))["mood_stats"]["total_logs"] == first["mood_stats"]["total_logs"] + 1 # Writes should bump the version
+    asyncio.run(mood_repo.clear_mood_logs(5))
+    assert asyncio.run(mood_repo.get_mood_stats(5))["total_logs"] == 0 # Clearing should bump it too
+
+# Ensure that the insight set covers every type and is computed once per data version
+def test_insights(async_engine, mood_repo):
+    today = date(2025, 3, 14)
+    for offset in range(10):
+        day = datetime(2025, 3, 14 - offset, 9)
+        asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=5 if offset % 2 else 1, energy_level=5 if offset < 5 else 2,
+                                                 date=day, weather="sunny" if offset % 2 else "rain"))
+
+    result = asyncio.run(get_insights(mood_repo, 5, today=today))
+    insights = result["insights"]
+    assert set(insights) == set(INSIGHT_TYPES) # Every registered type should be computed
+    assert insights["weather"][0] == "You tend to feel the most happy when it is sunny"
+    assert insights["streak"] == ["You have logged your mood 10 days in a row, keep it going!"]
+    assert insights["energy_trend"][0].startswith("Your energy is up") # This week beats the one before
+    assert insights["weather_sensitivity"][0].startswith("The weather makes a real difference to you, your mood is 4.0 points higher when it is sunny")
+
+    assert capture_statements(async_engine, lambda: get_insights(mood_repo, 5, today=today)) == [] # Page renders should read the stored set
+    asyncio.run(mood_repo.create_mood_log(user_id=5, mood_value=3, energy_level=3))
+    assert asyncio.run(get_insights(mood_repo, 5, today=today))["version"] != result["version"] # Writes should trigger a recompute
+
+# Ensure that new insight types are picked up from the registry
+def test_insight_registry(mood_repo, monkeypatch):
+    monkeypatch.setitem(INSIGHT_TYPES, "total", insight("total")(lambda inputs: [f"{len(inputs.daily_stats)} days logged"]))
+    asyncio.run(mood_repo.create_log_on_date(user_id=5, mood_value=3, energy_level=3, date=datetime(2025, 3, 14, 9)))
+
+    insights = asyncio.run(get_insights(mood_repo, 5, today=date(2025, 3, 14)))["insights"]
+    assert insights["total"] == ["1 days logged"]
+    assert insights["streak"] == [] # A single day is not a streak yet
+
+def capture_statements(async_engine, call):
+    # Record every SQL statement (with its parameters) issued while running call()
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        asyncio.run(call())
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", before_cursor_execute)
+    return statements
+
+def query_plan(async_engine, statement, parameters) -> str:
+    async def explain():
+        async with async_engine.connect() as conn:
+            result = await conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+            return " ".join(str(row[-1]) for row in result.all())
+    return asyncio.run(explain())
+
+# Ensure that each hot per-user query is served by an index: raw log reads by the composite
+# (user_id, created_at) index, aggregate reads by the primary key of the daily rollup table
+@pytest.mark.parametrize("method, args, expected", [
+    ("get_latest_mood_log", (5,), "USING INDEX ix_mood_logs_user_id_created_at"),
+    ("get_latest_mood_log", ("foo",), "USING INDEX ix_mood_logs_user_id_created_at"),
+    ("get_most_recent_log_date", (5,), "USING COVERING INDEX ix_mood_logs_user_id_created_at"),
+    ("get_mood_logs", (5,), "USING INDEX ix_mood_logs_user_id_created_at"),
+    ("get_running_means", (5,), "SEARCH mood_daily_rollups USING INDEX"),
+    ("get_weekly_mood_stats", (5,), "SEARCH mood_daily_rollups USING INDEX"),
+])
+def test_hot_queries_use_index(async_engine, mood_repo, method, args, expected):
+    statements = capture_statements(async_engine, lambda: getattr(mood_repo, method)(*args))
+    selects = [(sql, params) for sql, params in statements if sql.lstrip().upper().startswith("SELECT")]
+    assert selects # The method should issue at least one query
+
+    for sql, params in selects:
+        plan = query_plan(async_engine, sql, params)
+        assert expected in plan, plan # Plan should search through the expected index
+
+"""
+API TESTS
+"""
+
+# Ensure that we can create and read a mood log via the async routes
+def test_create_mood_log_route(client, created_user):
+    response = client.post(
+        "/mood/log",
+        json={"username": created_user["name"], "mood_value": 3, "energy_level": 5, "notes": "ok"},
+    )
+    assert response.status_code == 201 # Response should be 201
+
+    latest = client.get(f"/mood/latest_log/{created_user['name']}")
+    assert latest.status_code == 200 # Response should be 200
+    assert latest.json()["latest_mood_log"]["mood_value"] == 3 # Mood should match
+
+# Ensure that mood routes reject unknown users
+def test_mood_logs_unknown_user(client):
+    response = client.get("/mood/logs/fakey")
+    assert response.status_code == 404 # Response should be 404
+    assert response.json() == {"detail": "User not found"} # Error detail should match
+
+# Ensure that the running means route validates the resolution
+def test_running_means_route_resolution(client, created_user):
+    response = client.get(f"/mood/running_means/{created_user['name']}?resolution=week")
+    assert response.status_code == 200 # Response should be 200
+    assert response.json() == {"running_means": []} # No logs yet
+
+    response = client.get(f"/mood/running_means/{created_user['name']}?resolution=year")
+    assert response.status_code == 422 # Unknown resolutions should be rejected
+
+# Ensure that the logs route returns a cursor for the next page and rejects malformed ones
+def test_mood_logs_route_pagination(client, created_user, mood_repo):
+    for day in range(3):
+        asyncio.run(mood_repo.create_log_on_date(user_id=created_user["id"], mood_value=day + 1, energy_level=1, date=datetime(2025, 1, day + 1)))
+
+    first = client.get(f"/mood/logs/{created_user['name']}?limit=2").json()
+    assert [log["mood_value"] for log in first["mood_logs"]] == [3, 2] # Newest first
+    assert first["next_cursor"] is not None # More entries remain
+
+    second = client.get(f"/mood/logs/{created_user['name']}", params={"limit": 2, "before": first["next_cursor"]}).json()
+    assert [log["mood_value"] for log in second["mood_logs"]] == [1] # Only the oldest remains
+    assert second["next_cursor"] is None # Last page
+
+    response = client.get(f"/mood/logs/{created_user['name']}?before=yesterday")
+    assert response.status_code == 400 # Malformed cursors should be rejected
+
+# Ensure that deleting a user drops its cached id
+def test_delete_user_invalidates_identity(client, created_user):
+    assert client.get(f"/mood/latest_log/{created_user['name']}").status_code == 200
+    assert cached_user_id(created_user["name"]) == created_user["id"] # Route should warm the cache
+
+    client.delete(f"/users/{created_user['name']}")
+    assert cached_user_id(created_user["name"]) is None # Entry should be forgotten
+
+# Ensure that the bulk route inserts valid JSON rows and reports the rest
+def test_bulk_route_json(client, created_user, mood_repo):
+    response = client.post("/mood/logs/bulk", json=[
+        {"username": created_user["name"], "mood_value": 3, "energy_level": 4, "created_at": "2025-01-01T09:00:00"},
+        {"username": created_user["name"], "mood_value": 9, "energy_level": 4},
+        {"username": "nobody", "mood_value": 3, "energy_level": 4},
+        {"username": created_user["name"], "mood_value": 5, "energy_level": 1, "created_at": "2025-01-02T09:00:00+02:00"},
+    ])
+    assert response.status_code == 201 # Response should be 201
+    body = response.json()
+    assert body["inserted"] == 2 # Valid rows should be inserted
+    assert [error["row"] for error in body["errors"]] == [1, 2] # Invalid rows should be reported by index
+    assert body["errors"][1]["error"] == "User not found"
+
+    logs = asyncio.run(mood_repo.get_mood_logs(created_user["id"]))
+    assert [log.created_at for log in logs] == [datetime(2025, 1, 2, 7), datetime(2025, 1, 1, 9)] # Offsets should be stored as UTC
+
+# Ensure that the bulk route accepts NDJSON and reports unparseable lines
+def test_bulk_route_ndjson(client, created_user):
+    lines = [
+        '{"username": "foo", "mood_value": 2, "energy_level": 2}',
+        'not json',
+        '{"username": "foo", "mood_value": 4, "energy_level": 2}',
+    ]
+    response = client.post("/mood/logs/bulk", content="\n".join(lines), headers={"content-type": "application/x-ndjson"})
+    assert response.status_code == 201 # Response should be 201
+    assert response.json() == {"inserted": 2, "errors": [{"row": 1, "error": "Invalid JSON"}]}
+
+    stats = client.get(f"/mood/stats/{created_user['name']}").json()["mood_stats"]
+    assert stats["total_logs"] == 2 # Rollups should include the bulk rows
+
+# Ensure that the export route streams the whole history oldest first in both formats
+def test_export_route(client, created_user, mood_repo, monkeypatch):
+    monkeypatch.setattr(mood, "EXPORT_BATCH_SIZE", 2) # Force several cursor batches
+    for day in range(5):
+        asyncio.run(mood_repo.create_log_on_date(user_id=created_user["id"], mood_value=day + 1, energy_level=2, date=datetime(2025, 1, day + 1), notes="a, \"quoted\" note"))
+
+    response = client.get(f"/mood/export/{created_user['name']}")
+    assert response.status_code == 200 # Response should be 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["mood_value"] for row in rows] == [1, 2, 3, 4, 5] # Every log oldest first
+    assert rows[0]["created_at"] == "2025-01-01T00:00:00"
+
+    response = client.get(f"/mood/export/{created_user['name']}?format=csv")
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 5 # Header should be written once
+    assert rows[4]["notes"] == "a, \"quoted\" note" # Values should round-trip through CSV quoting
+
+    assert client.get("/mood/export/nobody").status_code == 404 # Unknown users should be rejected
+
+# Ensure that the dashboard route bundles what the individual routes return
+def test_dashboard_route(client, created_user, mood_repo):
+    for day in range(3):
+        asyncio.run(mood_repo.create_log_on_date(user_id=created_user["id"], mood_value=day + 2, energy_level=3, date=datetime(2025, 1, day + 1), weather="sunny"))
+    name = created_user["name"]
+
+    response = client.get(f"/mood/dashboard/{name}")
+    assert response.status_code == 200 # Response should be 200
+    dashboard = response.json()["dashboard"]
+
+    assert dashboard["mood_stats"] == client.get(f"/mood/stats/{name}").json()["mood_stats"]
+    assert dashboard["weekly_mood_stats"] == client.get(f"/mood/weekly_stats/{name}").json()["weekly_mood_stats"]
+    assert dashboard["weather_mood_stats"] == client.get(f"/mood/weather_stats/{name}").json()["weather_mood_stats"]
+    assert dashboard["running_means"] == client.get(f"/mood/running_means/{name}").json()["running_means"]
+    assert dashboard["latest_mood_log"] == client.get(f"/mood/latest_log/{name}").json()["latest_mood_log"]
+    assert len(dashboard["mood_logs"]) == 3
+
+    assert client.get("/mood/dashboard/nobody").status_code == 404 # Unknown users should be rejected
+
+    insights = client.get(f"/mood/insights/{name}").json()
+    assert insights["insights"]["weekday"] # Tips should be served for the user
+
+    stats = client.get("/mood/stats_cache").json()["stats_cache"]
+    assert stats["queries"]["get_weekly_mood_stats"]["hits"] >= 1 # The weekly route should reuse the dashboard's rows
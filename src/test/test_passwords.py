@@ -0,0 +1,85 @@
+import pytest
+import asyncio
+
+from fastapi import HTTPException
+from pwdlib import PasswordHash
+from pwdlib.hashers.argon2 import Argon2Hasher
+from sqlalchemy import text
+
+from src.mindfuly.auth.passwords import PasswordHashPool, password_pool
+
+"""
+POOL TESTS
+"""
+
+# Ensure that work runs on the pool and its latency is recorded
+def test_pool_runs_and_records():
+    pool = PasswordHashPool(workers=2, max_pending=4)
+
+    assert asyncio.run(pool.run(sum, [1, 2, 3])) == 6 # Result should come back from the worker
+    stats = pool.stats()
+    assert stats["completed"] == 1 # One call should be recorded
+    assert stats["pending"] == 0 # Nothing should be left in flight
+    pool.shutdown()
+
+# Ensure that a full queue is rejected with 503 instead of piling up
+def test_pool_rejects_when_saturated():
+    pool = PasswordHashPool(workers=1, max_pending=0)
+
+    with pytest.raises(HTTPException) as error:
+        asyncio.run(pool.run(sum, [1]))
+    assert error.value.status_code == 503 # Saturation should map to 503
+    assert pool.stats()["rejected"] == 1
+
+"""
+API TESTS
+"""
+
+# Ensure that login verifies the password through the pool
+def test_login_uses_pool(client, created_user):
+    before = password_pool.stats()["completed"]
+
+    response = client.post("/authorization/login", json={"username": created_user["name"], "password": "bass"})
+    assert response.status_code == 200 # Response should be 200
+    assert response.json()["token_type"] == "bearer"
+
+    response = client.post("/authorization/login", json={"username": created_user["name"], "password": "wrong"})
+    assert response.status_code == 401 # Wrong password should be rejected
+
+    assert password_pool.stats()["completed"] - before == 2 # Both checks should run on the pool
+
+# Ensure that sign-up hashes on the pool and still refuses a taken name
+def test_create_user_uses_pool(client, created_user, repo_v2):
+    before = password_pool.stats()["completed"]
+
+    response = client.post("/users/create_user", json={"name": "new", "email": "new@x", "hashed_password": "pass"})
+    assert response.status_code == 201 # Response should be 201
+    assert password_pool.stats()["completed"] - before == 1 # Only the hash should run on the pool
+    assert repo_v2.password_hash.verify("pass", asyncio.run(repo_v2.get_by_name("new")).hashed_password)
+
+    response = client.post("/users/create_user", json={"name": created_user["name"], "email": "other@x", "hashed_password": "pass"})
+    assert response.status_code == 409 # Taken names should still be refused
+
+# Ensure that login answers 503 while the pool is saturated
+def test_login_saturated(client, created_user, monkeypatch):
+    monkeypatch.setattr(password_pool, "max_pending", 0)
+
+    response = client.post("/authorization/login", json={"username": created_user["name"], "password": "bass"})
+    assert response.status_code == 503 # Response should be 503
+
+# Ensure that hashes made with older Argon2 parameters are upgraded on login
+def test_login_rehashes_outdated_hash(client, session, repo_v2):
+    outdated = PasswordHash((Argon2Hasher(time_cost=1, memory_cost=8192),)).hash("bass")
+    session.execute(
+        text("INSERT INTO users (name, id, email, hashed_password, tier) VALUES ('old', 7, 'old@x', :hashed, 1)"),
+        {"hashed": outdated}
+    )
+    session.commit()
+
+    response = client.post("/authorization/token", data={"username": "old", "password": "bass"})
+    assert response.status_code == 200 # Response should be 200
+
+    user = asyncio.run(repo_v2.get_by_name("old"))
+    assert user.hashed_password != outdated # Hash should be replaced
+    assert repo_v2.password_hash.verify("bass", user.hashed_password) # New hash should still verify
+    assert not repo_v2.password_hash.current_hasher.check_needs_rehash(user.hashed_password) # New hash uses current parameters